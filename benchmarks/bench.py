@@ -0,0 +1,442 @@
+"""Banc d'essai des performances de COMPRENDRE, hors ligne et reproductible.
+
+Mesure le démarrage de l'application (premier rendu), la lecture des normes
+et leur rechargement à chaud, la validation de l'import, la cotation (fusion,
+Z-scores, loi normale), la mise en forme du tableau, les graphiques (aperçu et
+300 DPI, évolution), le tableau de bord de cohorte, l'export Excel/ZIP et
+l'historique SQLite, sur les classeurs de normes livrés et des cohortes
+synthétiques.
+Les résultats sont écrits en JSON pour comparer deux commits :
+
+    python benchmarks/bench.py -o avant.json
+    python benchmarks/bench.py -o apres.json
+    python benchmarks/bench.py compare avant.json apres.json
+"""
+
+import argparse
+import datetime
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from comprendre import norms as norms_module  # noqa: E402
+from comprendre.norms import load_norms  # noqa: E402
+from comprendre.scoring import (  # noqa: E402
+    AGE_COLUMN, ID_COLUMN, add_interferences, issues_by_line, score, score_cohort, score_long, to_long,
+    validate_cohort,
+)
+from comprendre.tasks import INTERFERENCES  # noqa: E402
+from comprendre.versions import load_registry, score_versions  # noqa: E402
+
+NORMS_FILES = ["NORMES_NOV_24.xlsx", "NORMES_FEV_25.xlsx"]
+COHORT_SIZES = [1, 100, 10_000, 100_000]
+SEED = 20250201
+
+# Nombre maximal d'enfants pour les étapes coûteuses par ligne (levé par --full)
+STYLE_MAX_CHILDREN = 100
+EXPORT_MAX_CHILDREN = 100
+
+# Premier rendu de l'application dans un processus neuf : imports, normes et étape 1
+STARTUP_SCRIPT = """
+import sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+sys.exit(1 if at.exception else 0)
+"""
+
+# Rapports individuels d'une cohorte (archive ZIP, PDF unique) : taille de la cohorte mesurée
+REPORTS_CHILDREN = 10
+
+
+def synthetic_cohort(norms, n_children, seed=SEED):
+    """Cohorte au format large : scores tirés selon la moyenne et l'écart-type des normes."""
+    rng = np.random.default_rng(seed)
+    tasks = [t for t in norms.tasks if t not in INTERFERENCES]
+    cols = [norms.task_index[t] for t in tasks]
+    ages = rng.integers(len(norms.age_groups), size=n_children)
+
+    mean = norms.stat("Moyenne")[ages][:, cols]
+    std = norms.stat("Ecart-type")[ages][:, cols]
+    values = np.round(rng.normal(mean, np.nan_to_num(std)), 1)
+
+    cohort = pd.DataFrame(values, columns=tasks)
+    cohort.insert(0, AGE_COLUMN, np.asarray(norms.age_groups, dtype=object)[ages])
+    cohort.insert(0, ID_COLUMN, [f"E{i:06d}" for i in range(n_children)])
+    return cohort
+
+
+def measure(func, repeat):
+    """Durées de ``repeat`` appels (après un appel d'échauffement) et résultat du dernier appel."""
+    func()  # échauffement (imports, caches)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+class Suite:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    def run(self, name, func, repeat=None, **params):
+        label = name + "".join(f"[{k}={v}]" for k, v in params.items())
+        print(f"{label} …", end=" ", file=sys.stderr, flush=True)
+        times, output = measure(func, repeat or self.repeat)
+        entry = {
+            "name": label, "benchmark": name, "params": params,
+            "times": times, "min": min(times), "median": statistics.median(times),
+            "mean": statistics.fmean(times),
+        }
+        # Taille des fichiers produits (graphiques, archives, rapports)
+        if isinstance(output, bytes):
+            entry["bytes"] = len(output)
+        print(f"{entry['median'] * 1000:.1f} ms" + (f", {len(output) / 1024:,.0f} Ko" if "bytes" in entry else ""),
+              file=sys.stderr)
+        self.results.append(entry)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _environment():
+    import matplotlib
+    import openpyxl
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "matplotlib": matplotlib.__version__,
+        "openpyxl": openpyxl.__version__,
+    }
+
+
+def bench_startup(suite, repeat):
+    import tempfile
+
+    # Chaque mesure est un processus neuf : rien n'est déjà importé ni mis en cache
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "COMPRENDRE_STORE": os.path.join(tmp, "store.sqlite3")}
+        command = [sys.executable, "-c", STARTUP_SCRIPT, os.path.join(ROOT, "streamlit_app.py")]
+        suite.run("startup_first_render",
+                  lambda: subprocess.run(command, cwd=ROOT, env=env, check=True, capture_output=True), repeat=repeat)
+
+
+def bench_norms(suite, repeat):
+    for file_name in NORMS_FILES:
+        path = os.path.join(ROOT, file_name)
+        stat = os.stat(path)
+        suite.run("norms_parse", lambda: norms_module._parse_workbook(path, "", stat),
+                  repeat=repeat, file=file_name)
+
+        def from_snapshot():
+            norms_module._cache.clear()
+            load_norms(path)
+
+        load_norms(path)  # écrit l'instantané s'il manque
+        suite.run("norms_snapshot", from_snapshot, file=file_name)
+        suite.run("norms_cached", lambda: load_norms(path), file=file_name)
+
+
+def bench_watcher(suite):
+    import shutil
+    import tempfile
+
+    from comprendre.watcher import NormsWatcher
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for file_name in NORMS_FILES:
+            shutil.copy2(os.path.join(ROOT, file_name), tmp)
+        watcher = NormsWatcher(tmp, interval=0)  # relevés à la main, sans thread
+        # Relevé sans changement : le coût payé toutes les COMPRENDRE_NORMS_POLL secondes
+        suite.run("norms_poll", watcher.refresh)
+        # Requête : lecture du registre en service
+        suite.run("norms_registry", lambda: watcher.registry)
+
+        # Classeur republié avec un autre contenu (les deux classeurs livrés en alternance) :
+        # lecture, validation et remplacement du registre, faits par le thread de fond
+        path = os.path.join(tmp, "NORMES_MAR_26.xlsx")
+        sources = itertools.cycle([os.path.join(ROOT, file_name) for file_name in NORMS_FILES])
+
+        def reload():
+            shutil.copyfile(next(sources), path)
+            if not watcher.refresh():
+                raise RuntimeError("registre non remplacé")
+
+        suite.run("norms_reload", reload, repeat=max(1, min(suite.repeat, 3)))
+
+
+def bench_scoring(suite, norms, cohorts):
+    child = cohorts[1]
+    raw_scores = child.drop(columns=[ID_COLUMN, AGE_COLUMN]).iloc[0].dropna().to_dict()
+    age_group = child[AGE_COLUMN].iloc[0]
+    suite.run("score_child", lambda: score(age_group, raw_scores, norms))
+
+    for n, cohort in cohorts.items():
+        suite.run("score_cohort", lambda: score_cohort(cohort, norms), children=n)
+        suite.run("score_cohort", lambda: score_cohort(cohort, norms, "empirical"), children=n, mode="empirical")
+        long = add_interferences(to_long(cohort, norms.task_index))
+        suite.run("score_long", lambda: score_long(long, norms), children=n)
+        suite.run("validate_cohort", lambda: issues_by_line(validate_cohort(cohort, norms)), children=n)
+
+    registry = load_registry([os.path.join(ROOT, file_name) for file_name in NORMS_FILES])
+    for n, cohort in cohorts.items():
+        suite.run("score_versions", lambda: score_versions(cohort, registry), children=n)
+
+
+def _render_styler(styler):
+    # Travail fait par st.dataframe sur un Styler : calcul puis traduction des styles
+    styler._compute()
+    return styler._translate(False, False)
+
+
+def bench_styling(suite, results, max_children):
+    from comprendre.styling import style_results
+
+    for n, data in results.items():
+        if n > max_children:
+            continue
+        suite.run("style_results", lambda: _render_styler(style_results(data)), children=n)
+
+
+def bench_plotting(suite, child_results):
+    from comprendre.plotting import EXPORT_DPI, PREVIEW_DPI, chart_template, render_chart, render_image, render_png
+
+    tasks = child_results["Tâche"].tolist()
+    for dpi in (PREVIEW_DPI, EXPORT_DPI):
+        suite.run("plot_png", lambda: render_png(child_results, tasks, dpi), dpi=dpi)
+    for image_format in ("svg", "pdf"):
+        suite.run("plot_vector", lambda: render_image(child_results, tasks, image_format, EXPORT_DPI),
+                  format=image_format)
+
+    # Graphique d'un enfant de plus avec le gabarit déjà construit (rapports en lot, aperçu)
+    for dpi, image_format in ((PREVIEW_DPI, "png"), (EXPORT_DPI, "png"), (EXPORT_DPI, "svg"), (EXPORT_DPI, "pdf")):
+        suite.run("plot_template", lambda: render_chart(child_results, tasks, image_format, dpi),
+                  dpi=dpi, format=image_format)
+
+    # Détail du PNG 300 DPI du gabarit : recopie du fond sur tout le canevas, recopie et éléments
+    # de l'enfant redessinés, puis recadrage et encodage
+    template = chart_template(tasks, EXPORT_DPI)
+    template.render(child_results)
+    canvas = template.figure.canvas
+    suite.run("plot_template_restore", lambda: canvas.restore_region(template._background), dpi=EXPORT_DPI)
+    suite.run("plot_template_redraw", template._redraw, dpi=EXPORT_DPI)
+    suite.run("plot_template_encode", template._encode_png, dpi=EXPORT_DPI)
+
+
+def synthetic_history(norms, n_sessions, seed=SEED):
+    """Historique d'un enfant : ``n_sessions`` évaluations sur des groupes d'âge successifs."""
+    from comprendre.store import ASSESSMENT_COLUMN, DATE_COLUMN
+    from comprendre.versions import VERSION_COLUMN
+
+    cohort = synthetic_cohort(norms, n_sessions, seed)
+    cohort[AGE_COLUMN] = [norms.age_groups[i % len(norms.age_groups)] for i in range(n_sessions)]
+    history = score_cohort(cohort, norms)
+    sessions = pd.factorize(history[ID_COLUMN])[0]
+    history.insert(0, ASSESSMENT_COLUMN, sessions + 1)
+    history[DATE_COLUMN] = [f"2025-01-01T00:00:{s:02d}+00:00" for s in sessions]
+    history[VERSION_COLUMN] = "FEV_25"
+    history[ID_COLUMN] = "E000000"
+    return history
+
+
+def bench_trajectory(suite, registry, norms, n_sessions=12):
+    from comprendre.plotting import PREVIEW_DPI, render_trajectory_png
+    from comprendre.trajectory import Trajectory, score_trajectory
+
+    history = synthetic_history(norms, n_sessions)
+    scored = score_trajectory(history, registry, "FEV_25")
+    trajectory = Trajectory.from_scores(scored)
+    suite.run("score_trajectory", lambda: Trajectory.from_scores(score_trajectory(history, registry, "FEV_25")),
+              sessions=n_sessions)
+    suite.run("trajectory_png", lambda: render_trajectory_png(trajectory, PREVIEW_DPI),
+              sessions=n_sessions, series=len(trajectory.series))
+
+
+def bench_dashboard(suite, results, norms):
+    from comprendre.dashboard import CohortSummary, cohort_hash
+    from comprendre.records import ResultsRecord
+
+    ages = list(norms.age_groups[: len(norms.age_groups) // 2])
+    for n, data in results.items():
+        record = ResultsRecord.from_results(data, norms)
+        summary = CohortSummary.from_record(record)
+        suite.run("cohort_hash", lambda: cohort_hash(record), children=n)
+        suite.run("cohort_summary", lambda: CohortSummary.from_record(record), children=n)
+        suite.run("cohort_filter", lambda: (summary.band_table(ages), summary.category_table(ages),
+                                            summary.mean_table(ages)), children=n)
+
+
+def _to_bytes(write, data, **kwargs):
+    buffer = io.BytesIO()
+    write(data, buffer, **kwargs)
+    return buffer.getvalue()
+
+
+def bench_export(suite, norms, results, child_results, max_children):
+    from comprendre.export import build_archive, results_workbook
+    from comprendre.jobs import DONE, ExportQueue, archive_key
+    from comprendre.reports import write_pdf_report, write_reports_archive
+
+    for n, data in results.items():
+        if n > max_children:
+            continue
+        suite.run("results_workbook", lambda: results_workbook(data), children=n)
+    tasks = child_results["Tâche"].tolist()
+    for image_format in ("png", "svg", "pdf"):
+        suite.run("build_archive", lambda: build_archive(child_results, tasks, image_format=image_format),
+                  children=1, format=image_format)
+
+    # File d'export : ce que paie la page pour soumettre un export, puis pour interroger un export
+    # déjà fait (même contenu) ; le rendu lui-même se fait dans le thread de la file
+    queue = ExportQueue(workers=1)
+    prefixes = itertools.count()
+
+    def submit():
+        prefix = f"E{next(prefixes)}"
+        key = archive_key(child_results, tasks, prefix, "svg")
+        return queue.submit(key, build_archive, child_results, tasks, prefix, "svg")
+
+    suite.run("export_submit", submit)
+    key = submit().id
+    while queue.job(key).status != DONE:
+        time.sleep(0.05)
+    suite.run("export_poll", lambda: queue.submit(key, build_archive) and queue.result(key))
+    while any(job.status != DONE for job in queue.jobs()):
+        time.sleep(0.05)
+
+    # Rapports de toute une cohorte : archive ZIP (un processus) ou PDF unique
+    data = score_cohort(synthetic_cohort(norms, REPORTS_CHILDREN), norms)
+    for image_format in ("png", "svg"):
+        suite.run("reports_archive", lambda: _to_bytes(write_reports_archive, data, workers=1,
+                                                       image_format=image_format),
+                  repeat=1, children=REPORTS_CHILDREN, format=image_format)
+    suite.run("pdf_report", lambda: _to_bytes(write_pdf_report, data), repeat=1, children=REPORTS_CHILDREN)
+
+
+def bench_store(suite, results):
+    import tempfile
+
+    from comprendre.store import ResultsStore
+
+    # Chaque enregistrement ajoute la cohorte entière : la base grossit au fil des répétitions
+    with tempfile.TemporaryDirectory() as tmp:
+        for n, data in sorted(results.items()):
+            store = ResultsStore(os.path.join(tmp, f"store_{n}.sqlite3"))
+            suite.run("store_save", lambda: store.save(data, "FEV_25"), repeat=1, children=n)
+            child, age_group = data[ID_COLUMN].iloc[-1], data[AGE_COLUMN].iloc[-1]
+            suite.run("store_history", lambda: store.history(child), children=n)
+            suite.run("store_latest", lambda: store.latest(child), children=n)
+            suite.run("store_age_group", lambda: store.assessments(age_group=age_group), children=n)
+            store.close()
+
+
+def run(args):
+    # Les avertissements de dépréciation de pandas brouilleraient la sortie
+    warnings.simplefilter("ignore", FutureWarning)
+    suite = Suite(args.repeat)
+    bench_startup(suite, repeat=max(1, min(args.repeat, 3)))
+    bench_norms(suite, repeat=max(1, min(args.repeat, 3)))
+    bench_watcher(suite)
+
+    norms = load_norms(os.path.join(ROOT, "NORMES_FEV_25.xlsx"))
+    cohorts = {n: synthetic_cohort(norms, n) for n in args.sizes}
+    cohorts.setdefault(1, synthetic_cohort(norms, 1))
+    bench_scoring(suite, norms, cohorts)
+
+    results = {n: score_cohort(cohort, norms) for n, cohort in cohorts.items()}
+    child_results = results[1].drop(columns=[ID_COLUMN, AGE_COLUMN])
+    bench_styling(suite, results, float("inf") if args.full else STYLE_MAX_CHILDREN)
+    bench_plotting(suite, child_results)
+    bench_trajectory(suite, load_registry(), norms)
+    bench_dashboard(suite, results, norms)
+    bench_export(suite, norms, results, child_results, float("inf") if args.full else EXPORT_MAX_CHILDREN)
+    bench_store(suite, results)
+
+    report = {
+        "commit": _git_commit(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "seed": SEED,
+        "repeat": args.repeat,
+        "environment": _environment(),
+        "results": suite.results,
+    }
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{report['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats écrits dans {output}", file=sys.stderr)
+
+
+def compare(args):
+    """Compare les médianes de deux fichiers de résultats ; code 1 en cas de régression."""
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = {r["name"]: r for r in json.load(f)["results"]}
+
+    regressions = 0
+    width = max(len(name) for name in {**baseline, **candidate})
+    for name in dict.fromkeys([*baseline, *candidate]):
+        if name not in baseline or name not in candidate:
+            print(f"{name:<{width}}  {'absent' if name not in candidate else 'nouveau'}")
+            continue
+        before, after = baseline[name]["median"], candidate[name]["median"]
+        ratio = after / before if before else float("inf")
+        flag = ""
+        if ratio > 1 + args.threshold:
+            flag = "  RÉGRESSION"
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            flag = "  amélioration"
+        print(f"{name:<{width}}  {before * 1000:10.2f} ms  {after * 1000:10.2f} ms  ×{ratio:5.2f}{flag}")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["compare"]:
+        parser = argparse.ArgumentParser(prog="bench.py compare", description=compare.__doc__)
+        parser.add_argument("baseline", help="résultats de référence (JSON)")
+        parser.add_argument("candidate", help="résultats à comparer (JSON)")
+        parser.add_argument("--threshold", type=float, default=0.10,
+                            help="écart relatif des médianes signalé (défaut : 0.10)")
+        return compare(parser.parse_args(argv[1:]))
+
+    parser = argparse.ArgumentParser(prog="bench.py", description="Banc d'essai des performances de COMPRENDRE.")
+    parser.add_argument("-o", "--output", help="fichier JSON de résultats (défaut : benchmarks/results/<commit>.json)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=COHORT_SIZES, help="tailles des cohortes synthétiques")
+    parser.add_argument("--repeat", type=int, default=5, help="nombre de mesures par cas")
+    parser.add_argument("--full", action="store_true",
+                        help="met aussi en forme et exporte les grandes cohortes (lent)")
+    run(parser.parse_args(argv))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,15 @@
+"""Outils de cotation de la batterie COMPRENDRE.
+
+Ce paquet ne dépend ni de Streamlit ni de matplotlib : il peut être importé
+depuis un script, un processus de travail ou la commande ``comprendre-score``.
+"""
+
+from comprendre.norms import DEFAULT_NORMS_PATH, NORM_COLUMNS, NormsTable, load_norms
+from comprendre.scoring import read_cohort, reorder_columns, score, score_cohort
+from comprendre.versions import NormsRegistry, compare_versions, load_registry, score_versions
+
+__all__ = [
+    "DEFAULT_NORMS_PATH", "NORM_COLUMNS", "NormsTable", "load_norms",
+    "read_cohort", "reorder_columns", "score", "score_cohort",
+    "NormsRegistry", "compare_versions", "load_registry", "score_versions",
+]
@@ -0,0 +1,5 @@
+import sys
+
+from comprendre.cli import main
+
+sys.exit(main())
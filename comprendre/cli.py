@@ -0,0 +1,158 @@
+"""Commandes ``comprendre-score`` et ``comprendre-reports``.
+
+``comprendre-score`` lit et cote les fichiers CSV par blocs de lignes, ce qui
+permet de traiter des cohortes plus grandes que la mémoire disponible.
+``comprendre-reports`` produit une archive des rapports individuels.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from comprendre.norms import DEFAULT_NORMS_PATH, load_norms
+from comprendre.scoring import (AGE_COLUMN, ID_COLUMN, LINE_COLUMN, PERCENTILE_MODES, issues_by_line, read_cohort,
+                                score_cohort, validate_cohort)
+
+
+def _csv_separator(path):
+    with open(path, encoding="utf-8-sig") as f:
+        header = f.readline()
+    return ";" if header.count(";") > header.count(",") else ","
+
+
+def iter_cohort(path, chunksize):
+    """Blocs de lignes d'une cohorte, sans couper les lignes d'un même enfant."""
+    if os.path.splitext(path)[1].lower() in (".xlsx", ".xlsm"):
+        yield read_cohort(path)
+        return
+
+    reader = pd.read_csv(
+        path, sep=_csv_separator(path), encoding="utf-8-sig",
+        dtype={ID_COLUMN: str, AGE_COLUMN: str}, chunksize=chunksize,
+    )
+    pending = None
+    for chunk in reader:
+        if pending is not None:
+            # L'index reste celui du fichier : il donne le numéro de ligne des anomalies
+            chunk = pd.concat([pending, chunk])
+        # Au format long, les lignes du dernier enfant peuvent continuer dans le bloc suivant
+        last = chunk[ID_COLUMN].iloc[-1]
+        tail = (chunk[ID_COLUMN] == last).to_numpy()
+        pending = chunk[tail]
+        if (~tail).any():
+            yield chunk[~tail]
+    if pending is not None and len(pending):
+        yield pending
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="comprendre-score",
+        description="Calcule les Z-scores et percentiles COMPRENDRE d'une cohorte (CSV ou XLSX).",
+    )
+    parser.add_argument("input", help="fichier de scores bruts (.csv ou .xlsx)")
+    parser.add_argument("-o", "--output", help="fichier CSV de résultats (par défaut : sortie standard)")
+    parser.add_argument("--norms", default=DEFAULT_NORMS_PATH, help="classeur de normes (.xlsx)")
+    parser.add_argument("--percentiles", choices=list(PERCENTILE_MODES), default="normal",
+                        help="calcul des percentiles : loi normale du Z-score ou quantiles des normes")
+    parser.add_argument("--chunksize", type=int, default=50_000, help="nombre de lignes lues par bloc")
+    parser.add_argument("--sep", default=";", help="séparateur du CSV de résultats")
+    parser.add_argument("--anomalies", help="fichier CSV du rapport d'import : une ligne par ligne du fichier signalée")
+    args = parser.parse_args(argv)
+
+    norms = load_norms(args.norms)
+    start = time.perf_counter()
+    n_children = 0
+    n_rows = 0
+    n_flagged = 0
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    anomalies = open(args.anomalies, "w", encoding="utf-8", newline="") if args.anomalies else None
+    try:
+        header = True
+        for chunk in iter_cohort(args.input, args.chunksize):
+            try:
+                if anomalies is not None:
+                    report = issues_by_line(validate_cohort(chunk, norms))
+                results = score_cohort(chunk, norms, args.percentiles)
+            except ValueError as e:
+                parser.error(str(e))
+            if anomalies is not None:
+                # Les colonnes inconnues (ligne d'en-tête) ne sont signalées qu'avec le premier bloc ;
+                # les autres lignes sont numérotées d'après l'index du bloc, qui peut avoir des trous
+                body = (report[LINE_COLUMN] > 1).to_numpy()
+                positions = report.loc[body, LINE_COLUMN].to_numpy(dtype=int) - 2
+                report.loc[body, LINE_COLUMN] = chunk.index.to_numpy()[positions] + 2
+                if not header:
+                    report = report[body]
+                report.to_csv(anomalies, sep=args.sep, index=False, header=header)
+                n_flagged += len(report)
+            results.to_csv(out, sep=args.sep, index=False, header=header)
+            header = False
+            n_children += chunk[ID_COLUMN].nunique()
+            n_rows += len(results)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if anomalies is not None:
+            anomalies.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{n_children} enfants, {n_rows} scores en {elapsed:.2f} s "
+        f"({n_children / max(elapsed, 1e-9):,.0f} enfants/s)",
+        file=sys.stderr,
+    )
+    if args.anomalies:
+        print(f"{n_flagged} lignes signalées dans {args.anomalies}", file=sys.stderr)
+    return 0
+
+
+def reports_main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="comprendre-reports",
+        description="Produit les rapports individuels (graphique + tableau) d'une cohorte : "
+                    "archive ZIP, ou un seul PDF avec --format report.",
+    )
+    parser.add_argument("input", help="fichier de scores bruts (.csv ou .xlsx)")
+    parser.add_argument("-o", "--output", required=True, help="archive ZIP (ou PDF) à créer")
+    parser.add_argument("--norms", default=DEFAULT_NORMS_PATH, help="classeur de normes (.xlsx)")
+    parser.add_argument("--percentiles", choices=list(PERCENTILE_MODES), default="normal",
+                        help="calcul des percentiles : loi normale du Z-score ou quantiles des normes")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="nombre de processus de rendu (par défaut : nombre de cœurs)")
+    parser.add_argument("--dpi", type=int, default=None, help="résolution des graphiques")
+    parser.add_argument("--format", choices=["png", "svg", "pdf", "report"], default="png",
+                        help="format des graphiques dans l'archive, ou « report » : un seul PDF pour tous les enfants")
+    args = parser.parse_args(argv)
+
+    # Import tardif : matplotlib n'est pas nécessaire à comprendre-score
+    from comprendre.plotting import EXPORT_DPI
+    from comprendre.reports import write_pdf_report, write_reports_archive
+
+    norms = load_norms(args.norms)
+    try:
+        results = score_cohort(read_cohort(args.input), norms, args.percentiles)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\r{done}/{total} rapports", end="", file=sys.stderr, flush=True)
+
+    if args.format == "report":
+        total = write_pdf_report(results, args.output, progress=progress)
+    else:
+        total = write_reports_archive(results, args.output, dpi=args.dpi or EXPORT_DPI, workers=args.workers,
+                                      progress=progress, image_format=args.format)
+    elapsed = time.perf_counter() - start
+    print(f"\n{total} rapports en {elapsed:.1f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
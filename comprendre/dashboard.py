@@ -0,0 +1,137 @@
+"""Statistiques agrégées d'une cohorte cotée, pour le tableau de bord.
+
+Les agrégats sont calculés une seule fois par cohorte, en une passe
+``np.bincount`` sur les codes (groupe d'âge, tâche) d'un
+:class:`comprendre.records.ResultsRecord` : effectifs par bande de
+percentiles, histogrammes des percentiles, sommes des Z-scores et des
+percentiles. Filtrer par groupe d'âge ou par catégorie ne fait ensuite que
+sommer ces tableaux, sans relire les lignes de la cohorte.
+"""
+
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from comprendre.scoring import AGE_COLUMN, TASK_COLUMN
+from comprendre.styling import PERCENTILE_BANDS, percentile_bands
+from comprendre.tasks import CATEGORY_BY_TASK, CATEGORY_COLORS
+
+# Libellés des bandes de percentiles (bornes supérieures incluses, voir PERCENTILE_BANDS)
+BAND_LABELS = ["≤ 3", "3 – 15", "15 – 85", "85 – 97", "97 – 100"]
+
+# Histogrammes des percentiles : classes de 5 points, de 0 à 100
+HISTOGRAM_BINS = np.linspace(0, 100, 21)
+
+
+def cohort_hash(record):
+    """Empreinte d'une cohorte cotée (scores, codes, calcul et normes)."""
+    digest = hashlib.sha1()
+    digest.update(f"{record.mode}|{record.norms.path}|{record.norms.sha256}".encode())
+    digest.update("\0".join(map(str, record.ids.categories)).encode())
+    for array in (record.ids.codes, record.age_codes, record.task_codes, record.scores, record.percentiles):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True, eq=False)
+class CohortSummary:
+    """Agrégats d'une cohorte par (groupe d'âge, tâche)."""
+
+    age_groups: tuple
+    tasks: tuple
+    categories: tuple  # catégorie de chaque tâche
+    children: np.ndarray  # (groupe d'âge,) nombre d'enfants
+    band_counts: np.ndarray  # (groupe d'âge, tâche, bande)
+    histograms: np.ndarray  # (groupe d'âge, tâche, classe)
+    counts: np.ndarray  # (groupe d'âge, tâche) scores cotés
+    z_sums: np.ndarray  # (groupe d'âge, tâche)
+    percentile_sums: np.ndarray  # (groupe d'âge, tâche)
+
+    @classmethod
+    def from_record(cls, record):
+        """Agrégats d'un :class:`ResultsRecord`, en une passe sur ses codes."""
+        n_ages, n_tasks = len(record.norms.age_groups), len(record.norms.tasks)
+        n_bands, n_bins = len(PERCENTILE_BANDS), len(HISTOGRAM_BINS) - 1
+        cells = record.age_codes.astype(np.intp) * n_tasks + record.task_codes
+        percentiles = record.percentiles.astype(np.float64)
+        scored = np.isfinite(percentiles) & np.isfinite(record.z)
+        cells, percentiles, z = cells[scored], percentiles[scored], record.z[scored].astype(np.float64)
+
+        bands = percentile_bands(percentiles)
+        in_bands = bands < n_bands
+        band_counts = np.bincount(cells[in_bands] * n_bands + bands[in_bands], minlength=n_ages * n_tasks * n_bands)
+        bins = np.clip(np.digitize(percentiles, HISTOGRAM_BINS[1:-1]), 0, n_bins - 1)
+        histograms = np.bincount(cells * n_bins + bins, minlength=n_ages * n_tasks * n_bins)
+
+        # Enfants distincts par groupe d'âge
+        pairs = np.unique(record.ids.codes.astype(np.intp) * n_ages + record.age_codes)
+        children = np.bincount(pairs % n_ages, minlength=n_ages)
+
+        shape = (n_ages, n_tasks)
+        return cls(
+            age_groups=tuple(record.norms.age_groups),
+            tasks=tuple(record.norms.tasks),
+            categories=tuple(CATEGORY_BY_TASK.get(task, "Autre") for task in record.norms.tasks),
+            children=children,
+            band_counts=band_counts.reshape(*shape, n_bands),
+            histograms=histograms.reshape(*shape, n_bins),
+            counts=np.bincount(cells, minlength=n_ages * n_tasks).reshape(shape),
+            z_sums=np.bincount(cells, weights=z, minlength=n_ages * n_tasks).reshape(shape),
+            percentile_sums=np.bincount(cells, weights=percentiles, minlength=n_ages * n_tasks).reshape(shape),
+        )
+
+    def _masks(self, age_groups=None, categories=None):
+        ages = np.isin(self.age_groups, self.age_groups if age_groups is None else list(age_groups))
+        tasks = np.isin(self.categories, self.categories if categories is None else list(categories))
+        # Seules les tâches cotées dans la sélection sont gardées
+        tasks &= self.counts[ages].sum(axis=0) > 0
+        return ages, tasks
+
+    def n_children(self, age_groups=None):
+        ages, _ = self._masks(age_groups)
+        return int(self.children[ages].sum())
+
+    def band_table(self, age_groups=None, categories=None):
+        """Effectifs par tâche et bande de percentiles."""
+        ages, tasks = self._masks(age_groups, categories)
+        counts = self.band_counts[ages][:, tasks].sum(axis=0)
+        return pd.DataFrame(counts, index=pd.Index(np.asarray(self.tasks)[tasks], name=TASK_COLUMN),
+                            columns=BAND_LABELS)
+
+    def category_table(self, age_groups=None, categories=None):
+        """Par catégorie : effectifs par bande, Z-score et percentile moyens."""
+        ages, tasks = self._masks(age_groups, categories)
+        selected = np.asarray(self.categories)[tasks]
+        names = [name for name in CATEGORY_COLORS if name in set(selected)]
+        codes = pd.Index(names).get_indexer(selected)
+        membership = np.zeros((len(selected), len(names)))
+        membership[np.arange(len(selected)), codes] = 1
+
+        bands = membership.T @ self.band_counts[ages][:, tasks].sum(axis=0)
+        counts = membership.T @ self.counts[ages][:, tasks].sum(axis=0)
+        z = membership.T @ self.z_sums[ages][:, tasks].sum(axis=0)
+        percentiles = membership.T @ self.percentile_sums[ages][:, tasks].sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            table = pd.DataFrame(bands.astype(int), index=pd.Index(names, name="Catégorie"), columns=BAND_LABELS)
+            table["Z-Score moyen"] = z / counts
+            table["Percentile moyen"] = percentiles / counts
+        return table
+
+    def mean_table(self, age_groups=None, categories=None, value="Percentile (%)"):
+        """Moyenne par tâche (lignes) et groupe d'âge (colonnes) des percentiles ou des Z-scores."""
+        ages, tasks = self._masks(age_groups, categories)
+        sums = self.percentile_sums if value == "Percentile (%)" else self.z_sums
+        counts = self.counts[ages][:, tasks]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, sums[ages][:, tasks] / counts, np.nan)
+        return pd.DataFrame(means.T, index=pd.Index(np.asarray(self.tasks)[tasks], name=TASK_COLUMN),
+                            columns=pd.Index(np.asarray(self.age_groups)[ages], name=AGE_COLUMN))
+
+    def histogram(self, task, age_groups=None):
+        """Nombre de percentiles de ``task`` dans chaque classe de 5 points."""
+        ages, _ = self._masks(age_groups)
+        counts = self.histograms[ages, self.tasks.index(task)].sum(axis=0)
+        labels = [f"{low:.0f} – {high:.0f}" for low, high in zip(HISTOGRAM_BINS[:-1], HISTOGRAM_BINS[1:])]
+        return pd.Series(counts, index=pd.Index(labels, name="Percentile (%)"), name="Enfants")
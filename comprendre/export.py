@@ -0,0 +1,113 @@
+"""Export des résultats : archive ZIP contenant le graphique (PNG, SVG ou PDF) et le tableau Excel.
+
+Les archives sont mémorisées par empreinte du contenu (résultats, tâches
+sélectionnées, nom de fichier, format) dans le cache de la file d'export
+(:mod:`comprendre.jobs`) : un second téléchargement ne coûte rien.
+"""
+
+import io
+import zipfile
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import CellIsRule
+from openpyxl.styles import Font, NamedStyle, PatternFill
+from openpyxl.utils import get_column_letter
+
+from comprendre.plotting import EXPORT_DPI, render_chart
+from comprendre.scoring import reorder_columns
+from comprendre.tasks import CATEGORY_COLORS
+
+# Couleurs des bandes de percentiles (borne supérieure incluse)
+PERCENTILE_FILLS = [
+    (3, "D44646"),
+    (15, "F5A72F"),
+    (85, "60CD72"),
+    (97, "8DDF9B"),
+    (100, "AEDFB6"),
+]
+
+# Couleurs pour les catégories (format ARGB d'openpyxl, sans "#")
+EXCEL_CATEGORY_COLORS = {category: color.lstrip("#").upper() for category, color in CATEGORY_COLORS.items()}
+
+
+def _percentile_rules(ws, column_letter, n_rows):
+    # Bandes de percentiles en mise en forme conditionnelle : une règle par bande
+    # pour toute la colonne, au lieu d'un remplissage par cellule
+    cell_range = f"{column_letter}2:{column_letter}{n_rows + 1}"
+    for upper, color in PERCENTILE_FILLS:
+        fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+        ws.conditional_formatting.add(
+            cell_range,
+            CellIsRule(operator="lessThanOrEqual", formula=[str(upper)], fill=fill, stopIfTrue=True),
+        )
+
+
+def write_results_workbook(dataframe, target):
+    """Écrit le tableau des résultats dans un classeur Excel en mode écriture seule.
+
+    Les lignes sont écrites au fil de l'eau et partagent des styles nommés :
+    le temps et la mémoire par ligne restent constants, quelle que soit la
+    taille du tableau.
+    """
+    dataframe = reorder_columns(dataframe)
+    headers = list(dataframe.columns)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Résultats")
+
+    wb.add_named_style(NamedStyle(name="En-tête", font=Font(bold=True)))
+    for category, color in EXCEL_CATEGORY_COLORS.items():
+        wb.add_named_style(NamedStyle(name=f"Tâche {category}", font=Font(color=color, bold=True)))
+    category_styles = {category: f"Tâche {category}" for category in EXCEL_CATEGORY_COLORS}
+
+    if "Percentile (%)" in headers:
+        _percentile_rules(ws, get_column_letter(headers.index("Percentile (%)") + 1), len(dataframe))
+
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.style = "En-tête"
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    task_col = headers.index("Tâche") if "Tâche" in headers else None
+    categories = dataframe["Catégorie"].tolist() if "Catégorie" in headers else None
+    for i, row in enumerate(dataframe.itertuples(index=False, name=None)):
+        # NaN n'est pas une valeur Excel valide : cellule vide
+        row = [None if value != value else value for value in row]
+        if task_col is not None:
+            cell = WriteOnlyCell(ws, value=row[task_col])
+            if categories is not None:
+                cell.style = category_styles.get(categories[i], category_styles["Autre"])
+            row[task_col] = cell
+        ws.append(row)
+
+    wb.save(target)
+
+
+def results_workbook(dataframe):
+    """Tableau des résultats au format Excel (octets)."""
+    buffer = io.BytesIO()
+    write_results_workbook(dataframe, buffer)
+    return buffer.getvalue()
+
+
+def build_archive(dataframe, selected_tasks, file_name_prefix="resultats", image_format="png", progress=None):
+    """Archive ZIP du graphique (PNG 300 DPI, SVG ou PDF) et du tableau Excel.
+
+    Le graphique est rendu avec le gabarit partagé de ses tâches (voir
+    :func:`comprendre.plotting.render_chart`). ``progress(done, total)`` est
+    appelé après chacun des deux fichiers.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr(f"{file_name_prefix}_Graphique.{image_format}",
+                    render_chart(dataframe, list(selected_tasks), image_format, dpi=EXPORT_DPI))
+        if progress is not None:
+            progress(1, 2)
+        zf.writestr(f"{file_name_prefix}_Tableau.xlsx", results_workbook(dataframe))
+        if progress is not None:
+            progress(2, 2)
+    return buffer.getvalue()
+
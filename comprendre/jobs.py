@@ -0,0 +1,198 @@
+"""File d'attente des exports : les rendus lourds ne bloquent pas la page.
+
+Les exports (graphique 300 DPI et archive ZIP d'un enfant, rapports d'une
+cohorte) sont confiés à un petit groupe de threads partagé par tout le
+serveur (``COMPRENDRE_EXPORT_WORKERS``, 2 par défaut). Un travail est
+identifié par l'empreinte de son contenu : le soumettre une seconde fois,
+depuis la même session ou une autre, renvoie le travail en cours ou son
+résultat. La page ne fait qu'interroger l'avancement du travail.
+
+Les résultats terminés sont gardés dans un cache LRU borné en octets
+(``COMPRENDRE_EXPORT_CACHE_MB``, 256 Mo par défaut) ; le plus récent est
+toujours conservé, même s'il dépasse à lui seul la borne.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+WORKERS_ENV_VAR = "COMPRENDRE_EXPORT_WORKERS"
+DEFAULT_WORKERS = 2
+CACHE_ENV_VAR = "COMPRENDRE_EXPORT_CACHE_MB"
+DEFAULT_CACHE_MB = 256
+
+# États d'un travail
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+# Intervalle d'interrogation de l'avancement par la page (secondes)
+POLL_SECONDS = 0.5
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def _env_number(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def content_key(dataframe, *parts):
+    """Empreinte du contenu d'un DataFrame (valeurs et colonnes) et de paramètres."""
+    digest = hashlib.sha256()
+    digest.update(repr(list(dataframe.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(dataframe, index=False).to_numpy().tobytes())
+    for part in parts:
+        digest.update(repr(part).encode())
+    return digest.hexdigest()
+
+
+def archive_key(dataframe, selected_tasks, file_name_prefix="resultats", image_format="png"):
+    """Identifiant de l'archive d'un enfant (voir :func:`comprendre.export.build_archive`)."""
+    return content_key(dataframe, tuple(selected_tasks), file_name_prefix, image_format)
+
+
+class ResultCache:
+    """Résultats terminés (octets ou chemin de fichier), évincés du plus ancien au plus récent."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items = OrderedDict()  # clé -> (valeur, taille, nettoyage)
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def put(self, key, value, size, cleanup=None):
+        """Range ``value`` ; ``cleanup(value)`` est appelé quand elle est évincée ou remplacée."""
+        evicted = []
+        with self._lock:
+            if key in self._items:
+                evicted.append(self._items.pop(key))
+                self.nbytes -= evicted[-1][1]
+            self._items[key] = (value, size, cleanup)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes and len(self._items) > 1:
+                _, item = self._items.popitem(last=False)
+                self.nbytes -= item[1]
+                evicted.append(item)
+        for old, _, old_cleanup in evicted:
+            if old_cleanup is not None and old is not value:
+                old_cleanup(old)
+
+
+@dataclass(eq=False)
+class ExportJob:
+    """Un export soumis à la file ; ``done`` / ``total`` donnent son avancement."""
+
+    id: str  # empreinte du contenu exporté
+    label: str
+    status: str = PENDING
+    done: int = 0
+    total: int = 0
+    error: str = None
+    submitted: float = field(default_factory=time.monotonic)
+    finished: float = None
+
+    @property
+    def fraction(self):
+        if self.status == DONE:
+            return 1.0
+        return self.done / self.total if self.total else 0.0
+
+
+class ExportQueue:
+    """Groupe de threads d'export et cache de leurs résultats, partagés par le processus."""
+
+    def __init__(self, workers=None, max_bytes=None):
+        workers = int(workers or _env_number(WORKERS_ENV_VAR, DEFAULT_WORKERS))
+        if max_bytes is None:
+            max_bytes = int(_env_number(CACHE_ENV_VAR, DEFAULT_CACHE_MB) * 1024 * 1024)
+        self.cache = ResultCache(max_bytes)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="comprendre-export")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, func, *args, label="", cleanup=None, **kwargs):
+        """Soumet ``func(*args, progress=..., **kwargs)`` sous l'identifiant ``key``.
+
+        ``func`` renvoie des octets ou le chemin d'un fichier, et appelle
+        ``progress(done, total)`` au fil de son travail. Un travail de même
+        identifiant en attente, en cours ou dont le résultat est encore en
+        cache est renvoyé tel quel, sans nouveau rendu.
+        """
+        with self._lock:
+            job = self._live(key)
+            if job is not None and job.status != FAILED:
+                return job
+            # Les travaux terminés dont le résultat a été évincé sont oubliés
+            self._jobs = {k: j for k, j in self._jobs.items() if self._live(k) is not None}
+            job = self._jobs[key] = ExportJob(key, label)
+        self._executor.submit(self._run, job, func, args, kwargs, cleanup)
+        return job
+
+    def _live(self, key):
+        job = self._jobs.get(key)
+        if job is not None and job.status == DONE and key not in self.cache:
+            return None
+        return job
+
+    def _run(self, job, func, args, kwargs, cleanup):
+        job.status = RUNNING
+
+        def progress(done, total):
+            job.done, job.total = done, total
+
+        try:
+            result = func(*args, progress=progress, **kwargs)
+            size = len(result) if isinstance(result, bytes) else os.path.getsize(result)
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            job.status = FAILED
+        else:
+            self.cache.put(job.id, result, size, cleanup)
+            job.status = DONE
+        job.finished = time.monotonic()
+
+    def job(self, key):
+        """Travail ``key`` (en attente, en cours, en échec ou terminé et en cache), ou None."""
+        with self._lock:
+            return self._live(key)
+
+    def result(self, key):
+        """Résultat du travail ``key`` s'il est terminé et encore en cache, sinon None."""
+        return self.cache.get(key)
+
+    def jobs(self):
+        with self._lock:
+            return [job for key, job in self._jobs.items() if self._live(key) is not None]
+
+
+def export_queue():
+    """File d'export du processus (créée au premier appel)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ExportQueue()
+        return _queue
@@ -0,0 +1,228 @@
+"""Chargement des normes COMPRENDRE.
+
+Le classeur de normes (un onglet par groupe d'âge) est lu une seule fois par
+processus et converti en tableaux NumPy typés. Un instantané binaire ``.npz``
+est écrit à côté du fichier Excel pour que les démarrages suivants n'aient
+plus besoin d'openpyxl.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Colonnes statistiques lues dans chaque onglet, dans l'ordre d'affichage
+NORM_COLUMNS = [
+    "Moyenne", "Ecart-type", "Minimum",
+    "5e percentile", "10e percentile", "Q1",
+    "Q2 - mediane", "Q3", "90e percentile", "Maximum",
+]
+
+# Colonnes exigées dans chaque onglet : celles que l'étape 2 affiche
+REQUIRED_COLUMNS = ["Tâche", *NORM_COLUMNS]
+
+# Quantiles stockés dans les onglets et leur niveau (%), pour les percentiles empiriques
+QUANTILE_LEVELS = {
+    "Minimum": 0, "5e percentile": 5, "10e percentile": 10, "Q1": 25,
+    "Q2 - mediane": 50, "Q3": 75, "90e percentile": 90, "Maximum": 100,
+}
+
+# Classeur de normes livré avec l'application
+DEFAULT_NORMS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "NORMES_FEV_25.xlsx")
+
+SNAPSHOT_SUFFIX = ".norms.npz"
+SNAPSHOT_FORMAT = 1
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def quantile_knots(values):
+    """Nœuds d'interpolation des quantiles stockés : (valeurs croissantes, niveaux en %).
+
+    ``values`` est indexé d'abord par statistique ; le résultat a une dernière
+    dimension de la taille de :data:`QUANTILE_LEVELS`.
+    """
+    knots = np.moveaxis(values[[NORM_COLUMNS.index(c) for c in QUANTILE_LEVELS]], 0, -1)
+    levels = np.broadcast_to(np.array(list(QUANTILE_LEVELS.values()), dtype=float), knots.shape)
+    # Certains onglets donnent les quantiles dans l'ordre décroissant (variable de signe opposé)
+    descending = (knots[..., -2] < knots[..., 1])[..., None]
+    knots = np.where(descending, knots[..., ::-1], knots)
+    levels = np.where(descending, 100 - levels[..., ::-1], levels)
+    # D'autres inversent Minimum et Maximum : les valeurs sont remises dans l'ordre
+    return np.sort(knots, axis=-1), levels
+
+
+@dataclass(frozen=True, eq=False)
+class NormsTable:
+    """Normes d'un classeur : un tableau (groupe d'âge × tâche) par statistique."""
+
+    path: str
+    sha256: str
+    mtime_ns: int
+    size: int
+    age_groups: tuple
+    tasks: tuple
+    values: np.ndarray  # (statistique, groupe d'âge, tâche), float64
+    present: np.ndarray  # (groupe d'âge, tâche), bool : ligne présente dans l'onglet
+    task_index: dict = field(init=False, repr=False)
+    age_index: dict = field(init=False, repr=False)
+    complete: np.ndarray = field(init=False, repr=False)
+    knots: np.ndarray = field(init=False, repr=False)  # (groupe d'âge, tâche, quantile)
+    knot_levels: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "task_index", {t: i for i, t in enumerate(self.tasks)})
+        object.__setattr__(self, "age_index", {a: i for i, a in enumerate(self.age_groups)})
+        # Tâches utilisables pour la cotation : ligne présente et aucune statistique manquante
+        object.__setattr__(self, "complete", self.present & ~np.isnan(self.values).any(axis=0))
+        knots, levels = quantile_knots(self.values)
+        object.__setattr__(self, "knots", knots)
+        object.__setattr__(self, "knot_levels", levels)
+
+    def stat(self, name):
+        """Tableau (groupe d'âge × tâche) d'une statistique (vue, sans copie)."""
+        return self.values[NORM_COLUMNS.index(name)]
+
+    def frame(self, age_group):
+        """Normes d'un groupe d'âge, au format d'un onglet du classeur."""
+        if age_group not in self.age_index:
+            raise KeyError(f"Groupe d'âge inconnu : {age_group}")
+        row = self.age_index[age_group]
+        mask = self.present[row]
+        data = {"Tâche": np.asarray(self.tasks, dtype=object)[mask]}
+        for i, column in enumerate(NORM_COLUMNS):
+            data[column] = self.values[i, row, mask]
+        return pd.DataFrame(data)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_path(path):
+    return os.path.splitext(path)[0] + SNAPSHOT_SUFFIX
+
+
+def check_sheets(sheets):
+    """Vérifie que chaque onglet (groupe d'âge) contient les colonnes des normes."""
+    if not sheets:
+        raise ValueError("Le classeur de normes ne contient aucun onglet")
+    problems = []
+    for name, sheet in sheets.items():
+        missing = [c for c in REQUIRED_COLUMNS if c not in sheet.columns]
+        if missing:
+            problems.append(f"{name} ({', '.join(missing)})")
+    if problems:
+        raise ValueError(f"Colonnes manquantes dans les onglets : {'; '.join(problems)}")
+
+
+def _parse_workbook(path, sha256, stat):
+    # Une seule lecture openpyxl pour tous les onglets
+    sheets = pd.read_excel(path, sheet_name=None, engine="openpyxl")
+    check_sheets(sheets)
+
+    age_groups = tuple(sheets.keys())
+    tasks = []
+    seen = set()
+    for sheet in sheets.values():
+        for task in sheet["Tâche"].dropna():
+            if task not in seen:
+                seen.add(task)
+                tasks.append(task)
+    task_index = {t: i for i, t in enumerate(tasks)}
+
+    values = np.full((len(NORM_COLUMNS), len(age_groups), len(tasks)), np.nan)
+    present = np.zeros((len(age_groups), len(tasks)), dtype=bool)
+    for row, sheet in enumerate(sheets.values()):
+        sheet = sheet.dropna(subset=["Tâche"]).drop_duplicates(subset="Tâche")
+        cols = [task_index[t] for t in sheet["Tâche"]]
+        present[row, cols] = True
+        for i, column in enumerate(NORM_COLUMNS):
+            values[i, row, cols] = pd.to_numeric(sheet[column], errors="coerce").to_numpy()
+
+    return NormsTable(
+        path=path, sha256=sha256, mtime_ns=stat.st_mtime_ns, size=stat.st_size,
+        age_groups=age_groups, tasks=tuple(tasks), values=values, present=present,
+    )
+
+
+def _write_snapshot(table):
+    target = snapshot_path(table.path)
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target) or ".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                format=np.int64(SNAPSHOT_FORMAT),
+                sha256=np.str_(table.sha256),
+                mtime_ns=np.int64(table.mtime_ns),
+                size=np.int64(table.size),
+                stat_names=np.array(NORM_COLUMNS),
+                age_groups=np.array(table.age_groups),
+                tasks=np.array(table.tasks),
+                values=table.values,
+                present=table.present,
+            )
+        os.replace(tmp, target)
+    except OSError:
+        # Dossier en lecture seule : on se contente du cache mémoire
+        if tmp is not None and os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def _read_snapshot(path, stat):
+    """Instantané valide pour ``path``, ou None.
+
+    La date de modification sert de test rapide ; si elle a changé (copie,
+    checkout git), on compare l'empreinte SHA-256 du contenu.
+    """
+    try:
+        with np.load(snapshot_path(path), allow_pickle=False) as snap:
+            if int(snap["format"]) != SNAPSHOT_FORMAT or list(snap["stat_names"]) != NORM_COLUMNS:
+                return None
+            sha256 = str(snap["sha256"])
+            fresh = int(snap["mtime_ns"]) == stat.st_mtime_ns and int(snap["size"]) == stat.st_size
+            if not fresh and _file_sha256(path) != sha256:
+                return None
+            table = NormsTable(
+                path=path, sha256=sha256, mtime_ns=stat.st_mtime_ns, size=stat.st_size,
+                age_groups=tuple(str(a) for a in snap["age_groups"]),
+                tasks=tuple(str(t) for t in snap["tasks"]),
+                values=snap["values"], present=snap["present"],
+            )
+    except (OSError, KeyError, ValueError):
+        return None
+    if not fresh:
+        _write_snapshot(table)
+    return table
+
+
+def load_norms(path):
+    """Normes du classeur ``path``, partagées par tout le processus.
+
+    Le fichier n'est relu que si sa taille ou sa date de modification change.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    with _cache_lock:
+        table = _cache.get(path)
+        if table is not None and table.mtime_ns == stat.st_mtime_ns and table.size == stat.st_size:
+            return table
+
+        table = _read_snapshot(path, stat)
+        if table is None:
+            table = _parse_workbook(path, _file_sha256(path), stat)
+            _write_snapshot(table)
+        _cache[path] = table
+        return table
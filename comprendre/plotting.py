@@ -0,0 +1,382 @@
+"""Graphique des résultats COMPRENDRE.
+
+Les figures sont construites avec l'API objet de matplotlib (``Figure``),
+sans passer par pyplot, pour pouvoir être rendues depuis plusieurs sessions
+ou processus sans fuite mémoire.
+"""
+
+import io
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from matplotlib.patches import FancyBboxPatch, Patch
+from matplotlib.transforms import Bbox
+
+from comprendre.styling import PERCENTILE_ZONES
+from comprendre.tasks import CATEGORY_BY_TASK, CATEGORY_COLORS, TASK_NAME_MAPPING, category_color
+
+# Résolution de l'aperçu à l'écran et de l'image exportée
+PREVIEW_DPI = 100
+EXPORT_DPI = 300
+
+# Marge autour du graphique dans l'image (pouces), comme pad_inches de savefig
+TIGHT_PAD = 0.1
+
+# Niveau de compression zlib des PNG tramés
+PNG_COMPRESSION = 6
+
+# Gabarits de graphique gardés en mémoire par processus (voir chart_template)
+CHART_TEMPLATES = 2
+
+# Formats du graphique exporté et leur type MIME : le PNG est tramé à EXPORT_DPI,
+# le SVG et le PDF sont vectoriels (rendu et fichiers bien plus légers)
+IMAGE_FORMATS = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+
+# Libellés des zones de percentiles dans les légendes
+ZONE_LABELS = ["≤ 3", "3 – 15", "15 – 85", "85 – 97", "97 – 100"]
+
+# Colonnes du tableau des résultats dans le rapport PDF
+REPORT_TABLE_COLUMNS = ["Tâche", "Score Enfant", "Moyenne", "Ecart-type", "Z-Score", "Percentile (%)"]
+
+# Marqueurs des séries d'une même couleur dans le graphique d'évolution
+TRAJECTORY_MARKERS = ["o", "s", "^", "D", "v", "P", "X"]
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(pixels, dpi):
+    """PNG d'une image RGB (tableau hauteur × largeur × 3 octets), résolution ``dpi`` incluse.
+
+    Les lignes ne sont pas filtrées : sur ces graphiques faits de grands
+    aplats, le filtre adaptatif de Pillow doublait le temps d'encodage à
+    300 DPI pour un fichier à peine plus petit.
+    """
+    height, width, _ = pixels.shape
+    rows = np.empty((height, 1 + 3 * width), dtype=np.uint8)
+    rows[:, 0] = 0  # type de filtre « aucun » en tête de chaque ligne
+    rows[:, 1:] = pixels.reshape(height, -1)
+    pixels_per_meter = round(dpi / 0.0254)
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+        _png_chunk(b"pHYs", struct.pack(">IIB", pixels_per_meter, pixels_per_meter, 1)),
+        _png_chunk(b"IDAT", zlib.compress(rows, PNG_COMPRESSION)),
+        _png_chunk(b"IEND", b""),
+    ])
+
+
+class ChartTemplate:
+    """Graphique des percentiles d'une liste de tâches, réutilisable d'un enfant à l'autre.
+
+    Le fond (zones de percentiles, axes, titres de catégorie, cadres des
+    scores) ne dépend que des tâches : il est construit une seule fois. Pour
+    chaque enfant, :meth:`update` ne modifie que les points, les lignes par
+    catégorie et le texte des scores ; le rendu PNG part d'une image du fond
+    et ne redessine que ces éléments.
+    """
+
+    def __init__(self, tasks, dpi=PREVIEW_DPI):
+        self.tasks = list(tasks)
+        self.dpi = dpi
+        self.lock = threading.Lock()  # un enfant à la fois
+        self._background = None
+
+        categories = [CATEGORY_BY_TASK.get(task, "Autre") for task in self.tasks]
+        labels = [TASK_NAME_MAPPING.get(task, task) for task in self.tasks]
+        n = len(self.tasks)
+        positions = np.arange(n)
+        self._positions = positions
+
+        # Créer la figure
+        fig = Figure(figsize=(14, max(10, n * 1.5)), dpi=dpi)
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+
+        # Points de chaque tâche (percentiles mis à jour par enfant)
+        self._points = ax.scatter(np.full(n, np.nan), positions, color=[category_color(c) for c in categories],
+                                  s=100, zorder=3)
+
+        # Cadres des scores de l'enfant ; la hauteur suit l'espacement des points sur l'axe Y
+        box_height = 0.2
+        self._texts = []
+        for position, category in zip(positions, categories):
+            ax.add_patch(FancyBboxPatch(
+                (105, position - box_height / 2), width=28, height=box_height,
+                boxstyle="square,pad=0.1", linewidth=3, edgecolor=category_color(category),
+                facecolor="white", zorder=1,
+            ))
+            self._texts.append(ax.text(x=119, y=position, s="", fontsize=13, color="black",
+                                       ha="center", va="center", zorder=2, usetex=False))
+
+        # Ajouter des zones colorées pour les catégories
+        for low, high, color in PERCENTILE_ZONES:
+            ax.fill_betweenx(range(-1, n + 1), low, high, color=color, alpha=0.2, zorder=1)
+
+        # Ligne de référence Z=0
+        ax.axvline(50, color="black", linestyle="--", linewidth=0.8, zorder=2)
+
+        ax.set_xlim(0, 140)  # Axe X : percentiles de 0 à 100
+        ax.set_ylim(-1, n)
+
+        # Configurer les ticks et les labels
+        ax.set_xticks([0, 3, 15, 50, 85, 97, 100])
+        ax.set_xticklabels(["0", "3", "15", "50", "85", "97", "100"], fontsize=11, fontweight="bold", rotation=-40)
+        ax.set_yticks(positions)
+        ax.set_yticklabels(labels, fontsize=16, fontweight="bold")
+        ax.set_xlabel("Percentiles (%)", fontsize=14)
+        ax.xaxis.set_label_coords(0.85, -0.02)
+        ax.set_ylabel("")
+        for task_label, category in zip(ax.get_yticklabels(), categories):
+            task_label.set_color(category_color(category))
+
+        # Titre juste sous le bord de la figure, pour que la marge de l'image reste dans la figure
+        fig.suptitle("Résultats Batterie Comprendre", fontsize=24, fontweight="bold", x=0.5,
+                     y=1 - TIGHT_PAD / fig.get_size_inches()[1])
+
+        # Une ligne par catégorie reliant ses tâches, et son titre sur l'axe Y
+        self._lines = []
+        for category, color in CATEGORY_COLORS.items():
+            members = np.flatnonzero(np.asarray(categories, dtype=object) == category)
+            if not len(members):
+                continue
+            line, = ax.plot(np.full(len(members), np.nan), positions[members], marker="o", linestyle="-",
+                            color=color, label=category, zorder=4, linewidth=2)
+            self._lines.append((line, members))
+            ax.text(
+                x=-40, y=positions[members].mean(), s=category.upper(), color="white", fontsize=20,
+                fontweight="bold", ha="center", va="center", rotation=90,
+                bbox=dict(facecolor=color, edgecolor=color, boxstyle="round,pad=0.3", linewidth=2, alpha=1),
+            )
+
+        for spine in ax.spines.values():
+            spine.set_linewidth(0)
+        ax.spines["right"].set_visible(False)
+
+        # Ajuster la mise en page, puis fixer le cadrage de l'image (équivalent de bbox_inches="tight")
+        fig.subplots_adjust(left=0.3, right=0.95, top=0.85, bottom=0.15)
+        fig.tight_layout()
+        renderer = fig.canvas.get_renderer()
+        tight = fig.get_tightbbox(renderer)
+        # Titres de catégorie à gauche des axes et titre de l'axe X en bas : marges élargies pour
+        # qu'ils restent dans la figure, seule partie dessinée dans l'image du fond
+        width, height = fig.get_size_inches()
+        if tight.x0 < TIGHT_PAD or tight.y0 < TIGHT_PAD:
+            fig.subplots_adjust(left=fig.subplotpars.left + max(0, TIGHT_PAD - tight.x0) / width,
+                                bottom=fig.subplotpars.bottom + max(0, TIGHT_PAD - tight.y0) / height)
+            tight = fig.get_tightbbox(renderer)
+        self.bbox = Bbox.intersection(tight.padded(TIGHT_PAD), fig.bbox_inches)
+
+        self.figure = fig
+        self.ax = ax
+        # Éléments redessinés pour chaque enfant, dans l'ordre d'affichage
+        self._dynamic = sorted([*self._texts, self._points, *(line for line, _ in self._lines)],
+                               key=lambda artist: artist.get_zorder())
+
+    def update(self, data):
+        """Place les résultats d'un enfant (une ligne par tâche) sur le graphique."""
+        data = data.drop_duplicates("Tâche").set_index("Tâche").reindex(self.tasks)
+        percentiles = data["Percentile (%)"].to_numpy(dtype=float)
+        self._points.set_offsets(np.column_stack([percentiles, self._positions]))
+        for line, members in self._lines:
+            line.set_xdata(percentiles[members])
+        for text, score, mean, std_dev in zip(self._texts, data["Score Enfant"], data["Moyenne"], data["Ecart-type"]):
+            # Formatage du texte avec le score en gras
+            text.set_text("" if score != score else f"$\\bf{{{score:.0f}}}$\n[M = {mean:.1f} ± {std_dev:.1f}]")
+
+    def render(self, data, image_format="png"):
+        """Graphique d'un enfant au format ``image_format`` (octets)."""
+        with self.lock:
+            self.update(data)
+            if image_format == "png":
+                return self._render_png()
+            buffer = io.BytesIO()
+            with matplotlib.rc_context({"svg.fonttype": "none"}):
+                self.figure.savefig(buffer, format=image_format, dpi=self.dpi, bbox_inches=self.bbox)
+            return buffer.getvalue()
+
+    def _render_png(self):
+        self._redraw()
+        return self._encode_png()
+
+    def _redraw(self):
+        # Fond recopié sur tout le canevas, puis éléments de l'enfant redessinés par-dessus
+        canvas = self.figure.canvas
+        if self._background is None:
+            # Image du fond seul, dessinée une fois
+            for artist in self._dynamic:
+                artist.set_visible(False)
+            canvas.draw()
+            self._background = canvas.copy_from_bbox(self.figure.bbox)
+            for artist in self._dynamic:
+                artist.set_visible(True)
+        canvas.restore_region(self._background)
+        for artist in self._dynamic:
+            self.ax.draw_artist(artist)
+
+    def _encode_png(self):
+        # Recadrage puis PNG sans canal alpha (fond blanc opaque) ; l'image a la taille de celle
+        # de savefig(bbox_inches=...), dont le canevas tronque la largeur et la hauteur en pixels
+        canvas = self.figure.canvas
+        width, height = canvas.get_width_height()
+        x0, top = round(self.bbox.x0 * self.dpi), height - round(self.bbox.y1 * self.dpi)
+        crop_width, crop_height = int(self.bbox.width * self.dpi), int(self.bbox.height * self.dpi)
+        pixels = np.asarray(canvas.buffer_rgba())[top:top + crop_height, x0:x0 + crop_width, :3]
+        return encode_png(pixels, self.dpi)
+
+
+_templates = OrderedDict()
+_templates_lock = threading.Lock()
+
+
+def chart_template(tasks, dpi=PREVIEW_DPI):
+    """Gabarit du graphique pour ``tasks``, gardé pour les prochains enfants.
+
+    Seuls les CHART_TEMPLATES derniers gabarits sont conservés : à 300 DPI,
+    chacun garde en mémoire l'image de son fond.
+    """
+    key = (tuple(tasks), dpi)
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is not None:
+            _templates.move_to_end(key)
+            return template
+    template = ChartTemplate(tasks, dpi)
+    with _templates_lock:
+        template = _templates.setdefault(key, template)
+        while len(_templates) > CHART_TEMPLATES:
+            _templates.popitem(last=False)
+    return template
+
+
+def _selected(data, selected_tasks):
+    # Tâches sélectionnées, dans l'ordre du tableau des résultats
+    return data[data["Tâche"].isin(selected_tasks)]
+
+
+def plot_grouped_scores(data, selected_tasks, dpi=PREVIEW_DPI):
+    """Graphique des percentiles de l'enfant, sous forme de ``Figure`` autonome.
+
+    La figure n'est pas enregistrée dans l'état global de pyplot : elle est
+    libérée dès qu'elle n'est plus référencée.
+    """
+    data = _selected(data, selected_tasks)
+    template = ChartTemplate(data["Tâche"].tolist(), dpi)
+    template.update(data)
+    return template.figure
+
+
+def render_chart(data, selected_tasks, image_format="png", dpi=PREVIEW_DPI):
+    """Graphique d'un enfant rendu avec le gabarit partagé de ses tâches.
+
+    À utiliser pour une suite d'enfants (rapports en lot, aperçu à l'écran) :
+    seuls les éléments propres à l'enfant sont redessinés.
+    """
+    data = _selected(data, selected_tasks)
+    return chart_template(data["Tâche"].tolist(), dpi).render(data, image_format)
+
+
+def plot_trajectory(trajectory, dpi=PREVIEW_DPI):
+    """Graphique de l'évolution des percentiles, une courbe par série.
+
+    ``trajectory`` est une :class:`comprendre.trajectory.Trajectory` ; toutes
+    les courbes sont tracées en un seul appel à partir de sa matrice.
+    """
+    n_sessions, n_series = trajectory.percentiles.shape
+    fig = Figure(figsize=(14, 8), dpi=dpi)
+    ax = fig.subplots()
+
+    for low, high, color in PERCENTILE_ZONES:
+        ax.axhspan(low, high, color=color, alpha=0.2, zorder=1)
+    ax.axhline(50, color="black", linestyle="--", linewidth=0.8, zorder=2)
+
+    # Séries de même couleur (même catégorie) distinguées par leur marqueur
+    colors = pd.Series(trajectory.colors, dtype=object)
+    markers = np.asarray(TRAJECTORY_MARKERS, dtype=object)[colors.groupby(colors).cumcount() % len(TRAJECTORY_MARKERS)]
+    if n_series:
+        ax.set_prop_cycle(color=list(trajectory.colors), marker=list(markers))
+        lines = ax.plot(np.arange(n_sessions), trajectory.percentiles, linewidth=2, markersize=8, zorder=3)
+        labels = [TASK_NAME_MAPPING.get(name, name).replace("\n", " ") for name in trajectory.series]
+        ax.legend(lines, labels, loc="upper left", bbox_to_anchor=(1.01, 1), fontsize=10, frameon=False)
+
+    ax.set_xlim(-0.5, max(n_sessions - 0.5, 0.5))
+    ax.set_ylim(0, 100)
+    ax.set_xticks(np.arange(n_sessions))
+    ax.set_xticklabels(trajectory.labels, fontsize=11)
+    ax.set_yticks([0, 3, 15, 50, 85, 97, 100])
+    ax.set_yticklabels(["0", "3", "15", "50", "85", "97", "100"], fontsize=11, fontweight="bold")
+    ax.set_ylabel("Percentiles (%)", fontsize=14)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+
+    fig.suptitle("Évolution des résultats Batterie Comprendre", fontsize=20, fontweight="bold")
+    fig.tight_layout()
+    return fig
+
+
+def _save(fig, image_format="png", dpi=PREVIEW_DPI):
+    buffer = io.BytesIO()
+    try:
+        # Texte SVG gardé en texte plutôt que converti en chemins : fichier plus léger
+        with matplotlib.rc_context({"svg.fonttype": "none"}):
+            fig.savefig(buffer, format=image_format, dpi=dpi, bbox_inches="tight")
+    finally:
+        fig.clear()
+    return buffer.getvalue()
+
+
+def render_trajectory_png(trajectory, dpi=PREVIEW_DPI):
+    """Image PNG du graphique d'évolution ; la figure est libérée après l'enregistrement."""
+    return _save(plot_trajectory(trajectory, dpi=dpi), "png", dpi)
+
+
+def plot_results_table(data, title=None):
+    """Page du tableau des résultats : une ligne par tâche, percentiles colorés par zone."""
+    data = data[[column for column in REPORT_TABLE_COLUMNS if column in data.columns]]
+    fig = Figure(figsize=(11.7, max(4, 1.5 + 0.2 * len(data))))
+    ax = fig.subplots()
+    ax.axis("off")
+
+    cells = data.copy()
+    numbers = cells.columns.drop("Tâche", errors="ignore")
+    cells[numbers] = cells[numbers].apply(lambda column: column.map("{:.2f}".format)).where(cells[numbers].notna(), "")
+    table = ax.table(cellText=cells.to_numpy(), colLabels=list(cells.columns), loc="upper center",
+                     cellLoc="center", colLoc="center")
+    table.auto_set_font_size(False)
+    table.set_fontsize(9)
+    table.auto_set_column_width(range(len(cells.columns)))
+
+    if "Percentile (%)" in data.columns:
+        column = list(data.columns).index("Percentile (%)")
+        uppers = [high for _, high, _ in PERCENTILE_ZONES]
+        zones = np.digitize(data["Percentile (%)"].to_numpy(dtype=float), uppers, right=True)
+        for row, zone in enumerate(zones, start=1):
+            if zone < len(PERCENTILE_ZONES):
+                table[row, column].set_facecolor(to_rgba(PERCENTILE_ZONES[zone][2], 0.5))
+
+    legend = [Patch(facecolor=color, alpha=0.5, label=label)
+              for (_, _, color), label in zip(PERCENTILE_ZONES, ZONE_LABELS)]
+    ax.legend(handles=legend, title="Percentiles (%)", loc="lower center", ncol=len(legend),
+              bbox_to_anchor=(0.5, -0.02), frameon=False)
+    if title:
+        fig.suptitle(title, fontsize=16, fontweight="bold")
+    return fig
+
+
+def render_image(data, selected_tasks, image_format="png", dpi=PREVIEW_DPI):
+    """Graphique au format ``image_format`` (voir IMAGE_FORMATS) ; la figure est libérée après l'enregistrement."""
+    return _save(plot_grouped_scores(data, selected_tasks, dpi=dpi), image_format, dpi)
+
+
+def render_png(data, selected_tasks, dpi=PREVIEW_DPI):
+    """Image PNG du graphique ; la figure est libérée après l'enregistrement."""
+    return render_image(data, selected_tasks, "png", dpi)
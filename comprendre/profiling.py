@@ -0,0 +1,205 @@
+"""Mesures de latence et de mémoire par étape (optionnelles).
+
+Le profilage est activé par la variable d'environnement ``COMPRENDRE_PROFILE=1``
+(ou, dans l'application, par le paramètre d'URL ``?profile=1``). Chaque étape
+mesurée enregistre sa durée et son pic d'allocations (``tracemalloc``) dans un
+registre partagé par tout le processus, qui conserve une fenêtre glissante
+des dernières mesures pour en calculer les percentiles.
+
+Le pic d'allocations est mesuré pour tout le processus : avec plusieurs
+sessions simultanées, il inclut les allocations des autres sessions.
+``tracemalloc`` ne trace les allocations que pendant les étapes mesurées : il
+est arrêté dès que la dernière étape en cours dans le processus se termine.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+ENV_VAR = "COMPRENDRE_PROFILE"
+DUMP_ENV_VAR = "COMPRENDRE_PROFILE_DUMP"
+WINDOW = 1000
+PERCENTILES = (50, 90, 99)
+
+_local = threading.local()
+
+# Étapes en cours dans tout le processus, et tracemalloc démarré par ce module
+_tracing_lock = threading.Lock()
+_tracing_stages = 0
+_tracing_owned = False
+
+
+def enabled():
+    return os.environ.get(ENV_VAR, "").lower() in ("1", "true", "yes", "on")
+
+
+def _acquire_tracing():
+    global _tracing_stages, _tracing_owned
+    with _tracing_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_stages += 1
+
+
+def _release_tracing():
+    # Le traçage ralentit toutes les allocations du processus : il est arrêté dès que plus
+    # aucune étape n'est mesurée (sauf s'il a été démarré hors de ce module)
+    global _tracing_stages, _tracing_owned
+    with _tracing_lock:
+        _tracing_stages -= 1
+        if _tracing_stages == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+class StageStats:
+    def __init__(self, window=WINDOW):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.seconds = deque(maxlen=window)
+        self.peak_bytes = deque(maxlen=window)
+
+    def add(self, seconds, peak_bytes):
+        self.count += 1
+        self.total_seconds += seconds
+        self.seconds.append(seconds)
+        self.peak_bytes.append(peak_bytes)
+
+    def summary(self):
+        seconds = np.fromiter(self.seconds, dtype=float)
+        peaks = np.fromiter(self.peak_bytes, dtype=float)
+        result = {"count": self.count, "total_seconds": self.total_seconds}
+        for q, s, p in zip(PERCENTILES, np.percentile(seconds, PERCENTILES),
+                           np.percentile(peaks, PERCENTILES)):
+            result[f"p{q}_seconds"] = float(s)
+            result[f"p{q}_peak_bytes"] = float(p)
+        result["max_seconds"] = float(seconds.max())
+        result["max_peak_bytes"] = float(peaks.max())
+        return result
+
+
+class ProfileRegistry:
+    """Mesures de toutes les étapes, partagées par toutes les sessions du processus."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds, peak_bytes=0):
+        with self._lock:
+            if stage not in self._stages:
+                self._stages[stage] = StageStats(self.window)
+            self._stages[stage].add(seconds, peak_bytes)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def summary(self):
+        with self._lock:
+            return {stage: stats.summary() for stage, stats in sorted(self._stages.items())}
+
+    def to_json(self):
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self):
+        """Mesures au format texte Prometheus (résumés par étape)."""
+        lines = [
+            "# HELP comprendre_stage_seconds Durée des étapes de l'application.",
+            "# TYPE comprendre_stage_seconds summary",
+        ]
+        summary = self.summary()
+        for stage, stats in summary.items():
+            for q in PERCENTILES:
+                lines.append(f'comprendre_stage_seconds{{stage="{stage}",quantile="{q / 100}"}} '
+                             f'{stats[f"p{q}_seconds"]:.6f}')
+            lines.append(f'comprendre_stage_seconds_sum{{stage="{stage}"}} {stats["total_seconds"]:.6f}')
+            lines.append(f'comprendre_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        lines += [
+            "# HELP comprendre_stage_peak_bytes Pic d'allocations pendant les étapes.",
+            "# TYPE comprendre_stage_peak_bytes gauge",
+        ]
+        for stage, stats in summary.items():
+            for q in PERCENTILES:
+                lines.append(f'comprendre_stage_peak_bytes{{stage="{stage}",quantile="{q / 100}"}} '
+                             f'{stats[f"p{q}_peak_bytes"]:.0f}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path=None):
+        """Écrit le format Prometheus dans ``path`` (par défaut ``$COMPRENDRE_PROFILE_DUMP``)."""
+        path = path or os.environ.get(DUMP_ENV_VAR)
+        if not path:
+            return
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+REGISTRY = ProfileRegistry()
+
+
+class Stage:
+    """Mesure d'une étape, utilisable comme gestionnaire de contexte ou via start()/stop().
+
+    Les étapes peuvent être imbriquées ; si ``active`` est faux, rien n'est mesuré.
+    """
+
+    def __init__(self, name, active=None, registry=None):
+        self.name = name
+        self.active = enabled() if active is None else active
+        self.registry = registry or REGISTRY
+        self._start = None
+
+    def start(self):
+        if not self.active:
+            return self
+        _acquire_tracing()
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            # Le pic atteint jusqu'ici appartient à l'étape englobante
+            stack[-1][1] = max(stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        stack.append([current, 0])
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self):
+        if not self.active or self._start is None:
+            return
+        elapsed = time.perf_counter() - self._start
+        self._start = None
+        _, peak = tracemalloc.get_traced_memory()
+        _release_tracing()
+        base, inner_peak = _local.stack.pop()
+        peak = max(peak, inner_peak)
+        if _local.stack:
+            _local.stack[-1][1] = max(_local.stack[-1][1], peak)
+        self.registry.record(self.name, elapsed, max(peak - base, 0))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def stage(name, active=None):
+    return Stage(name, active)
+
+
+def profiled(name, active, func, *args, **kwargs):
+    """Appelle ``func`` en mesurant l'étape ``name`` (pour les appels différés)."""
+    with Stage(name, active):
+        return func(*args, **kwargs)
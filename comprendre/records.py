@@ -0,0 +1,116 @@
+"""Résultats cotés en mémoire compacte, pour les garder en session.
+
+Un :class:`ResultsRecord` ne conserve que les codes des identifiants, des
+groupes d'âge et des tâches, les scores bruts et, pour l'affichage, les
+Z-scores et percentiles en float32. Les statistiques des normes ne sont pas
+copiées : elles sont relues dans la table partagée par tout le processus quand
+le tableau complet est reconstruit, et les Z-scores et percentiles sont alors
+recalculés exactement.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from comprendre.norms import NORM_COLUMNS, NormsTable
+from comprendre.scoring import (
+    AGE_COLUMN, CHILD_RESULT_COLUMNS, ID_COLUMN, RESULT_COLUMNS, SCORE_COLUMN, TASK_COLUMN,
+    result_percentiles, z_scores,
+)
+from comprendre.tasks import categorize
+
+# Colonnes du tableau compact affiché sans reconstruire les normes
+COMPACT_COLUMNS = [ID_COLUMN, AGE_COLUMN, TASK_COLUMN, SCORE_COLUMN, "Z-Score", "Percentile (%)", "Catégorie"]
+
+
+@dataclass(frozen=True, eq=False)
+class ResultsRecord:
+    """Résultats cotés : codes, scores bruts et valeurs d'affichage en float32."""
+
+    norms: NormsTable  # table partagée par le processus, non copiée
+    mode: str
+    ids: pd.Categorical
+    age_codes: np.ndarray  # int16, indices dans norms.age_groups
+    task_codes: np.ndarray  # int16, indices dans norms.tasks
+    scores: np.ndarray  # float64 : scores bruts saisis, conservés exactement
+    z: np.ndarray  # float32, pour l'affichage
+    percentiles: np.ndarray  # float32, pour l'affichage
+
+    @classmethod
+    def from_results(cls, results, norms, mode="normal", child_id=None, age_group=None):
+        """Enregistrement compact d'un tableau de résultats (cohorte ou enfant).
+
+        Pour les résultats d'un seul enfant, sans colonnes d'identifiant ni de
+        groupe d'âge, ``child_id`` et ``age_group`` les complètent.
+        """
+        n = len(results)
+        ids = results[ID_COLUMN] if ID_COLUMN in results else np.full(n, child_id or "", dtype=object)
+        ages = results[AGE_COLUMN] if AGE_COLUMN in results else np.full(n, age_group, dtype=object)
+        return cls(
+            norms=norms,
+            mode=mode,
+            ids=pd.Categorical(np.asarray(ids, dtype=object)),
+            age_codes=pd.Series(ages).map(norms.age_index).to_numpy(dtype=np.int16),
+            task_codes=results[TASK_COLUMN].map(norms.task_index).to_numpy(dtype=np.int16),
+            scores=results[SCORE_COLUMN].to_numpy(dtype=np.float64),
+            z=results["Z-Score"].to_numpy(dtype=np.float32),
+            percentiles=results["Percentile (%)"].to_numpy(dtype=np.float32),
+        )
+
+    def __len__(self):
+        return len(self.scores)
+
+    @property
+    def nbytes(self):
+        """Mémoire occupée par l'enregistrement (hors normes partagées)."""
+        arrays = (self.ids.codes, self.age_codes, self.task_codes, self.scores, self.z, self.percentiles)
+        categories = self.ids.categories.memory_usage(deep=True)
+        return sum(a.nbytes for a in arrays) + categories
+
+    def _tasks(self):
+        return np.asarray(self.norms.tasks, dtype=object)[self.task_codes]
+
+    def compact_frame(self):
+        """Tableau des résultats sans les statistiques des normes (affichage)."""
+        return pd.DataFrame({
+            ID_COLUMN: self.ids,
+            AGE_COLUMN: pd.Categorical.from_codes(self.age_codes, self.norms.age_groups),
+            TASK_COLUMN: pd.Categorical.from_codes(self.task_codes, self.norms.tasks),
+            SCORE_COLUMN: self.scores,
+            "Z-Score": self.z,
+            "Percentile (%)": self.percentiles,
+            "Catégorie": categorize(pd.Series(self._tasks())).astype("category").to_numpy(),
+        }, columns=COMPACT_COLUMNS)
+
+    def frame(self, with_ids=True):
+        """Tableau complet, identique à celui de la cotation.
+
+        Sans ``with_ids``, les colonnes d'identifiant et de groupe d'âge sont
+        omises (résultats d'un seul enfant).
+        """
+        a, t = self.age_codes.astype(np.intp), self.task_codes.astype(np.intp)
+        stats = self.norms.values[:, a, t]
+        tasks = self._tasks()
+        z = z_scores(self.scores, stats, tasks)
+        data = {
+            ID_COLUMN: np.asarray(self.ids, dtype=object),
+            AGE_COLUMN: np.asarray(self.norms.age_groups, dtype=object)[a],
+            TASK_COLUMN: tasks,
+            SCORE_COLUMN: self.scores,
+            "Z-Score": z,
+            **{column: stats[i] for i, column in enumerate(NORM_COLUMNS)},
+            "Percentile (%)": result_percentiles(self.mode, z, self.scores, self.norms.knots[a, t],
+                                                 self.norms.knot_levels[a, t], tasks),
+            "Catégorie": categorize(pd.Series(tasks)).to_numpy(),
+        }
+        return pd.DataFrame(data, columns=RESULT_COLUMNS if with_ids else CHILD_RESULT_COLUMNS)
+
+    def raw_scores(self):
+        """Scores bruts au format long, pour coter à nouveau (autres normes, autre calcul)."""
+        return pd.DataFrame({
+            ID_COLUMN: np.asarray(self.ids, dtype=object),
+            AGE_COLUMN: np.asarray(self.norms.age_groups, dtype=object)[self.age_codes],
+            TASK_COLUMN: self._tasks(),
+            SCORE_COLUMN: self.scores,
+        })
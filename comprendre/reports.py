@@ -0,0 +1,117 @@
+"""Génération en lot des rapports individuels (graphique + tableau Excel).
+
+Le rendu matplotlib est fait dans des processus de travail. Les rapports sont
+écrits dans l'archive au fur et à mesure de leur production : seul un petit
+nombre de rapports est en mémoire à un instant donné. Les graphiques d'une même
+sélection de tâches partagent un gabarit (voir
+:class:`comprendre.plotting.ChartTemplate`). Le graphique est un PNG
+(tramé) ou un SVG/PDF (vectoriel) ; :func:`write_pdf_report` réunit plutôt
+graphique et tableau de tous les enfants dans un seul PDF de plusieurs pages.
+"""
+
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from comprendre.export import results_workbook
+from comprendre.plotting import EXPORT_DPI, chart_template, plot_results_table, render_chart
+from comprendre.scoring import AGE_COLUMN, ID_COLUMN, TASK_COLUMN
+
+
+def report_prefix(child_id):
+    return f"{child_id}_Resultats_Comprendre"
+
+
+def render_child_report(child_id, data, selected_tasks=None, dpi=EXPORT_DPI, image_format="png"):
+    """Fichiers du rapport d'un enfant : liste de (nom dans l'archive, octets)."""
+    data = data.drop(columns=[ID_COLUMN, AGE_COLUMN], errors="ignore").reset_index(drop=True)
+    if selected_tasks is None:
+        selected_tasks = data[TASK_COLUMN].tolist()
+    prefix = report_prefix(child_id)
+    return [
+        (f"{child_id}/{prefix}_Graphique.{image_format}", render_chart(data, selected_tasks, image_format, dpi)),
+        (f"{child_id}/{prefix}_Tableau.xlsx", results_workbook(data)),
+    ]
+
+
+def _render_job(job):
+    return render_child_report(*job)
+
+
+def iter_child_reports(results, selected_tasks=None, dpi=EXPORT_DPI, workers=None, image_format="png"):
+    """Rapports de chaque enfant d'une cohorte cotée, dans l'ordre de production.
+
+    Au plus ``2 × workers`` rapports sont en cours ou en attente d'écriture.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = ((child_id, data, selected_tasks, dpi, image_format)
+            for child_id, data in results.groupby(ID_COLUMN, sort=False))
+
+    if workers == 1:
+        for job in jobs:
+            yield _render_job(job)
+        return
+
+    # "spawn" : pas de fork d'un serveur multi-thread (Streamlit)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        pending = set()
+        for job in jobs:
+            pending.add(executor.submit(_render_job, job))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def write_reports_archive(results, target, selected_tasks=None, dpi=EXPORT_DPI,
+                          workers=None, progress=None, image_format="png"):
+    """Écrit les rapports de tous les enfants dans une archive ZIP.
+
+    ``target`` est un chemin ou un fichier binaire ; ``progress(done, total)``
+    est appelé après chaque enfant.
+    """
+    total = results[ID_COLUMN].nunique()
+    done = 0
+    with zipfile.ZipFile(target, "w") as zf:
+        for files in iter_child_reports(results, selected_tasks, dpi, workers, image_format):
+            for name, content in files:
+                zf.writestr(name, content)
+            done += 1
+            if progress is not None:
+                progress(done, total)
+    return total
+
+
+def write_pdf_report(results, target, selected_tasks=None, progress=None):
+    """Écrit un seul PDF pour toute la cohorte : graphique puis tableau de chaque enfant.
+
+    Les pages sont vectorielles et écrites au fil de l'eau : une seule figure
+    est en mémoire à un instant donné. ``target`` est un chemin ou un fichier
+    binaire ; ``progress(done, total)`` est appelé après chaque enfant.
+    """
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    total = results[ID_COLUMN].nunique()
+    done = 0
+    with PdfPages(target, metadata={"Title": "Résultats Batterie Comprendre"}) as pdf:
+        for child_id, data in results.groupby(ID_COLUMN, sort=False):
+            age_group = data[AGE_COLUMN].iloc[0] if AGE_COLUMN in data else ""
+            data = data.drop(columns=[ID_COLUMN, AGE_COLUMN], errors="ignore").reset_index(drop=True)
+            tasks = data[TASK_COLUMN].tolist() if selected_tasks is None else selected_tasks
+            template = chart_template(data.loc[data[TASK_COLUMN].isin(tasks), TASK_COLUMN].tolist())
+            with template.lock:
+                template.update(data)
+                pdf.savefig(template.figure, bbox_inches=template.bbox)
+            table = plot_results_table(data, f"{child_id} — {age_group}")
+            pdf.savefig(table)
+            table.clear()
+            done += 1
+            if progress is not None:
+                progress(done, total)
+    return total
@@ -0,0 +1,407 @@
+"""Cotation vectorisée d'une cohorte d'enfants.
+
+Tous les enfants, tous groupes d'âge confondus, sont cotés en une seule passe
+NumPy contre les normes pré-indexées de :class:`comprendre.norms.NormsTable`.
+"""
+
+import io
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from comprendre.norms import DEFAULT_NORMS_PATH, NORM_COLUMNS, load_norms
+from comprendre.tasks import INTERFERENCES, TIME_TASKS, assign_category, categorize
+
+ID_COLUMN = "ID enfant"
+AGE_COLUMN = "Groupe d'âge"
+TASK_COLUMN = "Tâche"
+SCORE_COLUMN = "Score Enfant"
+
+# Colonnes des résultats d'un enfant, puis d'une cohorte
+CHILD_RESULT_COLUMNS = [TASK_COLUMN, SCORE_COLUMN, "Z-Score", *NORM_COLUMNS, "Percentile (%)", "Catégorie"]
+RESULT_COLUMNS = [ID_COLUMN, AGE_COLUMN, *CHILD_RESULT_COLUMNS]
+
+# Calcul des percentiles : loi normale du Z-score, ou interpolation entre les quantiles des normes
+PERCENTILE_MODES = {
+    "normal": "Loi normale (Z-score)",
+    "empirical": "Quantiles des normes (interpolation)",
+}
+
+# Fonction de répartition de la loi normale, sans SciPy (dont l'import coûte
+# plus d'une seconde au démarrage) : approximations rationnelles de Cephes
+# (ndtr), les mêmes que scipy.stats.norm.cdf, à 2e-16 près.
+_ERF_T = (9.60497373987051638749e0, 9.00260197203842689217e1, 2.23200534594684319226e3,
+          7.00332514112805075473e3, 5.55923013010394962768e4)
+_ERF_U = (1.0, 3.35617141647503099647e1, 5.21357949780152679795e2, 4.59432382970980127987e3,
+          2.26290000613890934246e4, 4.92673942608635921086e4)
+_ERFC_P = (2.46196981473530512524e-10, 5.64189564831068821977e-1, 7.46321056442269912687e0,
+           4.86371970985681366614e1, 1.96520832956077098242e2, 5.26445194995477358631e2,
+           9.34528527171957607540e2, 1.02755188689515710272e3, 5.57535335369399327526e2)
+_ERFC_Q = (1.0, 1.32281951154744992508e1, 8.67072140885989742329e1, 3.54937778887819891062e2,
+           9.75708501743205489753e2, 1.82390916687909736289e3, 2.24633760818710981792e3,
+           1.65666309194161350182e3, 5.57535340817727675546e2)
+_ERFC_R = (5.64189583547755073984e-1, 1.27536670759978104416e0, 5.01905042251180477414e0,
+           6.16021097993053585195e0, 7.40974269950448939160e0, 2.97886665372100240670e0)
+_ERFC_S = (1.0, 2.26052863220117276590e0, 9.39603524938001434673e0, 1.20489539808096656605e1,
+           1.70814450747565897222e1, 9.60896809063285878198e0, 3.36907645100081516050e0)
+
+# Rapport d'import : anomalies d'une cohorte (voir validate_cohort)
+LINE_COLUMN = "Ligne"
+ISSUE_COLUMN = "Anomalie"
+# Minimum et Maximum : étendue des normes, renseignée pour les scores hors étendue
+ISSUE_COLUMNS = [LINE_COLUMN, ID_COLUMN, AGE_COLUMN, TASK_COLUMN, "Valeur", ISSUE_COLUMN, "Minimum", "Maximum"]
+ISSUE_NOT_NUMERIC = "Score non numérique"
+ISSUE_UNKNOWN_AGE = "Groupe d'âge inconnu"
+ISSUE_UNKNOWN_TASK = "Tâche inconnue"
+ISSUE_NO_NORMS = "Pas de normes disponibles"
+ISSUE_OUT_OF_RANGE = "Hors de l'étendue des normes"
+
+# Ordre d'affichage des colonnes du tableau de résultats
+COLUMNS_ORDER = [ID_COLUMN, AGE_COLUMN, TASK_COLUMN, SCORE_COLUMN, "Z-Score", *NORM_COLUMNS, "Percentile (%)"]
+
+
+def read_cohort(source, name=None):
+    """Lit un fichier de cohorte CSV ou XLSX (chemin ou objet fichier)."""
+    name = name or getattr(source, "name", None) or str(source)
+    if os.path.splitext(name)[1].lower() in (".xlsx", ".xlsm"):
+        return pd.read_excel(source, engine="openpyxl")
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            raw = f.read()
+    else:
+        raw = source.read()
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8-sig")
+    # Les exports Excel français utilisent le point-virgule comme séparateur
+    header = raw.split("\n", 1)[0]
+    sep = ";" if header.count(";") > header.count(",") else ","
+    return pd.read_csv(io.StringIO(raw), sep=sep, dtype={ID_COLUMN: str, AGE_COLUMN: str})
+
+
+def _cells(cohort, tasks):
+    # Format long brut : une ligne par cellule de score, valeurs non converties,
+    # avec le numéro de la ligne du fichier (l'en-tête est la ligne 1)
+    missing = [c for c in (ID_COLUMN, AGE_COLUMN) if c not in cohort.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans le fichier : {', '.join(missing)}")
+
+    # Identifiants et groupes d'âge en texte, convertis avant la mise au format long
+    cohort = cohort.assign(**{ID_COLUMN: cohort[ID_COLUMN].astype(str), AGE_COLUMN: cohort[AGE_COLUMN].astype(str)})
+    lines = np.arange(2, len(cohort) + 2)
+    if TASK_COLUMN in cohort.columns:
+        if SCORE_COLUMN not in cohort.columns:
+            raise ValueError(f"Colonne manquante dans le fichier : {SCORE_COLUMN}")
+        long = cohort[[ID_COLUMN, AGE_COLUMN, TASK_COLUMN, SCORE_COLUMN]]
+    else:
+        task_columns = [c for c in cohort.columns if c in tasks]
+        long = cohort.melt(
+            id_vars=[ID_COLUMN, AGE_COLUMN], value_vars=task_columns,
+            var_name=TASK_COLUMN, value_name=SCORE_COLUMN,
+        )
+        lines = np.tile(lines, len(task_columns))
+    return long, lines
+
+
+def to_long(cohort, tasks):
+    """Convertit une cohorte au format long (une ligne par enfant et par tâche).
+
+    Le format long contient une colonne ``Tâche`` et une colonne ``Score Enfant`` ;
+    le format large contient une colonne par tâche, dont le nom est celui de la
+    tâche dans les normes.
+    """
+    long, _ = _cells(cohort, tasks)
+    long = long.assign(**{SCORE_COLUMN: pd.to_numeric(long[SCORE_COLUMN], errors="coerce")})
+    return long.dropna(subset=[SCORE_COLUMN]).reset_index(drop=True)
+
+
+def validate_cohort(cohort, norms):
+    """Anomalies d'une cohorte, en une passe vectorisée : une ligne par anomalie.
+
+    Sont signalés les scores non numériques, les groupes d'âge et les tâches
+    inconnus, les tâches sans normes pour le groupe d'âge de l'enfant et les
+    scores hors de l'étendue (Minimum – Maximum) des normes. Au format large,
+    chaque colonne inconnue est signalée une fois, sur la ligne d'en-tête
+    (ligne 1). Les cellules vides ne sont pas des anomalies. Le rapport
+    n'interrompt pas la cotation : les scores hors étendue sont cotés, les
+    autres cellules signalées sont ignorées.
+    """
+    long, lines = _cells(cohort, norms.task_index)
+    raw = long[SCORE_COLUMN]
+    scores = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=float)
+    numeric = ~np.isnan(scores)
+    # Cellules vides : manquantes, ou texte fait seulement d'espaces
+    blank = raw.isna().to_numpy()
+    text = ~blank & ~numeric
+    blank[text] = raw[text].astype(str).str.strip().eq("").to_numpy()
+
+    age_idx = long[AGE_COLUMN].map(norms.age_index).to_numpy(dtype=float)
+    task_idx = long[TASK_COLUMN].map(norms.task_index).to_numpy(dtype=float)
+    known = ~np.isnan(age_idx) & ~np.isnan(task_idx)
+    a = np.where(known, age_idx, 0).astype(np.intp)
+    t = np.where(known, task_idx, 0).astype(np.intp)
+    usable = known & norms.complete[a, t]
+    low, high = norms.knots[a, t, 0], norms.knots[a, t, -1]
+    with np.errstate(invalid="ignore"):
+        out_of_range = usable & numeric & ((scores < low) | (scores > high))
+
+    # Un groupe d'âge inconnu est signalé une seule fois par ligne du fichier
+    unknown_age = np.isnan(age_idx)
+    unknown_age[unknown_age] = ~pd.Series(lines[unknown_age]).duplicated().to_numpy()
+    checks = [
+        (unknown_age, ISSUE_UNKNOWN_AGE),
+        (~blank & ~numeric, ISSUE_NOT_NUMERIC),
+        (~blank & np.isnan(task_idx), ISSUE_UNKNOWN_TASK),
+        (~blank & known & ~usable, ISSUE_NO_NORMS),
+        (out_of_range, ISSUE_OUT_OF_RANGE),
+    ]
+    masks = np.stack([mask for mask, _ in checks])
+    kinds, rows = np.nonzero(masks)
+    problems = np.array([issue for _, issue in checks], dtype=object)[kinds]
+    tasks = long[TASK_COLUMN].to_numpy(dtype=object)[rows]
+    tasks[problems == ISSUE_UNKNOWN_AGE] = ""
+    ranged = problems == ISSUE_OUT_OF_RANGE
+
+    issues = pd.DataFrame({
+        LINE_COLUMN: lines[rows],
+        ID_COLUMN: long[ID_COLUMN].to_numpy()[rows],
+        AGE_COLUMN: long[AGE_COLUMN].to_numpy()[rows],
+        TASK_COLUMN: tasks,
+        "Valeur": raw.to_numpy(dtype=object)[rows],
+        ISSUE_COLUMN: problems,
+        "Minimum": np.where(ranged, low[rows], np.nan),
+        "Maximum": np.where(ranged, high[rows], np.nan),
+    }, columns=ISSUE_COLUMNS)
+
+    # Au format large, une colonne qui n'est pas une tâche des normes n'est pas cotée :
+    # elle est signalée une fois, sur la ligne d'en-tête
+    if TASK_COLUMN not in cohort.columns:
+        unknown = [c for c in cohort.columns if c not in (ID_COLUMN, AGE_COLUMN) and c not in norms.task_index]
+        if unknown:
+            header = pd.DataFrame({LINE_COLUMN: 1, ID_COLUMN: "", AGE_COLUMN: "", TASK_COLUMN: unknown,
+                                   ISSUE_COLUMN: ISSUE_UNKNOWN_TASK})
+            issues = pd.concat([header, issues], ignore_index=True)[ISSUE_COLUMNS]
+    return issues.sort_values(LINE_COLUMN, kind="stable").reset_index(drop=True)
+
+
+def issues_by_line(issues):
+    """Rapport compact de :func:`validate_cohort` : une ligne par ligne du fichier signalée."""
+    if issues.empty:
+        return pd.DataFrame(columns=[LINE_COLUMN, ID_COLUMN, AGE_COLUMN, "Anomalies"])
+    labels = issues[ISSUE_COLUMN].where(issues[TASK_COLUMN] == "", issues[TASK_COLUMN] + " : " + issues[ISSUE_COLUMN])
+    lines = issues[LINE_COLUMN].to_numpy()
+    starts = np.flatnonzero(np.r_[True, lines[1:] != lines[:-1]])
+    # Concaténation des libellés de chaque ligne en une passe (les anomalies sont triées par ligne)
+    joined = np.add.reduceat((labels + " ; ").to_numpy(dtype=object), starts)
+    report = issues.iloc[starts][[LINE_COLUMN, ID_COLUMN, AGE_COLUMN]].reset_index(drop=True)
+    report["Anomalies"] = [text[:-3] for text in joined]
+    return report
+
+
+def interference_frame(wide):
+    """Scores d'interférence de chaque ligne de ``wide`` (une colonne par tâche).
+
+    Les quatre mesures de :data:`comprendre.tasks.INTERFERENCES` sont
+    calculées en une seule soustraction de tableaux ; une mesure dont l'un des
+    opérandes manque vaut NaN.
+    """
+    firsts = [first for first, _ in INTERFERENCES.values()]
+    seconds = [second for _, second in INTERFERENCES.values()]
+    values = (wide.reindex(columns=firsts).to_numpy(dtype=float)
+              - wide.reindex(columns=seconds).to_numpy(dtype=float))
+    return pd.DataFrame(values, index=wide.index, columns=pd.Index(list(INTERFERENCES), name=TASK_COLUMN))
+
+
+def add_interferences(long):
+    """Ajoute les scores d'interférence calculés pour chaque enfant.
+
+    Une interférence n'est calculée que si ses deux opérandes sont renseignés.
+    """
+    operands = {task for pair in INTERFERENCES.values() for task in pair}
+    wide = (
+        long[long[TASK_COLUMN].isin(operands)]
+        .drop_duplicates(subset=[ID_COLUMN, AGE_COLUMN, TASK_COLUMN])
+        .pivot(index=[ID_COLUMN, AGE_COLUMN], columns=TASK_COLUMN, values=SCORE_COLUMN)
+    )
+    if wide.empty:
+        return long
+
+    derived = interference_frame(wide).stack().dropna().rename(SCORE_COLUMN).reset_index()
+
+    # Un score d'interférence fourni dans le fichier prime sur le score calculé
+    combined = pd.concat([long, derived], ignore_index=True)
+    return combined.drop_duplicates(subset=[ID_COLUMN, AGE_COLUMN, TASK_COLUMN], keep="first")
+
+
+def interference_scores(raw_scores):
+    """Scores d'interférence d'un enfant (NaN si l'un des opérandes n'est pas renseigné)."""
+    return {
+        name: raw_scores.get(first, math.nan) - raw_scores.get(second, math.nan)
+        for name, (first, second) in INTERFERENCES.items()
+    }
+
+
+def z_scores(scores, stats, tasks):
+    """Z-scores de scores bruts, à partir des normes rassemblées (statistique × ligne).
+
+    Un temps plus long correspond à une moins bonne performance : le Z-score
+    des variables de temps est inversé.
+    """
+    z = (scores - stats[NORM_COLUMNS.index("Moyenne")]) / stats[NORM_COLUMNS.index("Ecart-type")]
+    return np.where(pd.Series(tasks).isin(TIME_TASKS).to_numpy(), -z, z)
+
+
+def _horner(x, coefs):
+    out = np.full_like(x, coefs[0])
+    for c in coefs[1:]:
+        out *= x
+        out += c
+    return out
+
+
+def normal_cdf(z):
+    """Fonction de répartition de la loi normale centrée réduite (NaN conservés)."""
+    z = np.asarray(z, dtype=float)
+    x = np.abs(z) * math.sqrt(0.5)
+    # tail = P(Z > |z|) = erfc(x) / 2, calculé par intervalle de x
+    tail = np.empty_like(x)
+    small = x < 1
+    xs = x[small]
+    x2 = xs * xs
+    tail[small] = 0.5 - 0.5 * xs * _horner(x2, _ERF_T) / _horner(x2, _ERF_U)
+    mid = (x >= 1) & (x < 8)
+    xm = x[mid]
+    tail[mid] = 0.5 * np.exp(-xm * xm) * _horner(xm, _ERFC_P) / _horner(xm, _ERFC_Q)
+    far = ~(small | mid)  # x >= 8, infini ou NaN
+    xf = x[far]
+    with np.errstate(over="ignore", invalid="ignore"):
+        tail[far] = np.where(np.isinf(xf), 0.0, 0.5 * np.exp(-xf * xf) * _horner(xf, _ERFC_R) / _horner(xf, _ERFC_S))
+    return np.where(z < 0, tail, 1 - tail)
+
+
+def percentiles(z):
+    """Percentiles (%) de la loi normale correspondant aux Z-scores."""
+    return normal_cdf(z) * 100
+
+
+def _interpolate(scores, knots, levels, idx):
+    # Interpolation linéaire entre les nœuds idx - 1 et idx de chaque ligne
+    n = knots.shape[1]
+    rows = np.arange(len(scores))
+    lo = np.clip(idx - 1, 0, n - 2)
+    k0, k1 = knots[rows, lo], knots[rows, lo + 1]
+    l0, l1 = levels[rows, lo], levels[rows, lo + 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = l0 + (scores - k0) / (k1 - k0) * (l1 - l0)
+    return np.where(idx == 0, 0.0, np.where(idx == n, 100.0, p))
+
+
+def empirical_percentiles(scores, knots, levels, tasks):
+    """Percentiles (%) par interpolation linéaire (monotone) entre les quantiles des normes.
+
+    ``knots`` et ``levels`` ont une ligne par score (voir
+    :func:`comprendre.norms.quantile_knots`). Un score égal à plusieurs
+    quantiles identiques reçoit le niveau moyen ; comme pour le Z-score, le
+    percentile des variables de temps est inversé.
+    """
+    scores = np.asarray(scores, dtype=float)
+    below = (knots < scores[:, None]).sum(axis=1)
+    at_or_below = (knots <= scores[:, None]).sum(axis=1)
+    p = (_interpolate(scores, knots, levels, below) + _interpolate(scores, knots, levels, at_or_below)) / 2
+    return np.where(pd.Series(tasks).isin(TIME_TASKS).to_numpy(), 100 - p, p)
+
+
+def result_percentiles(mode, z, scores, knots, levels, tasks):
+    """Percentiles (%) selon ``mode`` (voir :data:`PERCENTILE_MODES`)."""
+    if mode == "normal":
+        return percentiles(z)
+    if mode == "empirical":
+        return empirical_percentiles(scores, knots, levels, tasks)
+    raise ValueError(f"Mode de calcul des percentiles inconnu : {mode}")
+
+
+def score_value(norms, age_group, task, value, mode="normal"):
+    """Résultat d'une seule tâche (dict d'une ligne), ou None si la tâche n'a pas de normes."""
+    a = norms.age_index[age_group]
+    t = norms.task_index.get(task)
+    if t is None or not norms.complete[a, t]:
+        return None
+    stats = norms.values[:, a, t]
+    z = (value - stats[NORM_COLUMNS.index("Moyenne")]) / stats[NORM_COLUMNS.index("Ecart-type")]
+    if task in TIME_TASKS:
+        z = -z
+    if not np.isfinite(z):
+        return None
+    percentile = result_percentiles(mode, np.array([z]), np.array([value], dtype=float),
+                                    norms.knots[a, t][None], norms.knot_levels[a, t][None], [task])
+    return {
+        TASK_COLUMN: task, SCORE_COLUMN: float(value), "Z-Score": float(z),
+        **{column: float(stats[i]) for i, column in enumerate(NORM_COLUMNS)},
+        "Percentile (%)": float(percentile[0]),
+        "Catégorie": assign_category(task),
+    }
+
+
+def score_long(long, norms, mode="normal"):
+    """Z-scores et percentiles de scores au format long, en une passe vectorisée."""
+    age_idx = long[AGE_COLUMN].map(norms.age_index)
+    task_idx = long[TASK_COLUMN].map(norms.task_index)
+    known = age_idx.notna() & task_idx.notna()
+    long = long[known.to_numpy()]
+    a = age_idx[known].to_numpy(dtype=np.intp)
+    t = task_idx[known].to_numpy(dtype=np.intp)
+
+    # Seules les tâches dont les normes sont complètes sont cotées
+    usable = norms.complete[a, t]
+    long, a, t = long[usable], a[usable], t[usable]
+
+    stats = norms.values[:, a, t]
+    scores = long[SCORE_COLUMN].to_numpy(dtype=float)
+    z = z_scores(scores, stats, long[TASK_COLUMN].to_numpy())
+
+    result = pd.DataFrame({
+        ID_COLUMN: long[ID_COLUMN].to_numpy(),
+        AGE_COLUMN: long[AGE_COLUMN].to_numpy(),
+        TASK_COLUMN: long[TASK_COLUMN].to_numpy(),
+        SCORE_COLUMN: scores,
+        "Z-Score": z,
+        **{column: stats[i] for i, column in enumerate(NORM_COLUMNS)},
+        "Percentile (%)": result_percentiles(mode, z, scores, norms.knots[a, t], norms.knot_levels[a, t],
+                                             long[TASK_COLUMN].to_numpy()),
+        "Catégorie": categorize(long[TASK_COLUMN]).to_numpy(),
+    })
+    result = result[np.isfinite(z)]
+
+    # Ordre : enfants dans l'ordre du fichier, tâches dans l'ordre des normes
+    child_order = pd.factorize(result[ID_COLUMN])[0]
+    task_order = result[TASK_COLUMN].map(norms.task_index).to_numpy()
+    order = np.lexsort((task_order, child_order))
+    return result.iloc[order].reset_index(drop=True)
+
+
+def score_cohort(cohort, norms, mode="normal"):
+    """Cote une cohorte entière (format long ou large) contre ``norms``."""
+    long = to_long(cohort, norms.task_index)
+    return score_long(add_interferences(long), norms, mode)
+
+
+def score(age_group, raw_scores, norms=None, mode="normal"):
+    """Résultats d'un enfant : une ligne par tâche cotée.
+
+    ``raw_scores`` associe à chaque tâche le score brut de l'enfant. Les
+    scores d'interférence sont calculés et ajoutés automatiquement.
+    """
+    if norms is None:
+        norms = load_norms(DEFAULT_NORMS_PATH)
+    child = pd.DataFrame([{ID_COLUMN: "", AGE_COLUMN: age_group, **raw_scores}])
+    results = score_cohort(child, norms, mode).drop(columns=[ID_COLUMN, AGE_COLUMN])
+    return reorder_columns(results)
+
+
+def reorder_columns(dataframe):
+    # Colonnes dans l'ordre souhaité, puis les colonnes restantes à la fin
+    reordered_columns = [col for col in COLUMNS_ORDER if col in dataframe.columns]
+    remaining_columns = [col for col in dataframe.columns if col not in reordered_columns]
+    return dataframe[reordered_columns + remaining_columns]
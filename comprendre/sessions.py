@@ -0,0 +1,180 @@
+"""Objets volumineux des sessions : mesure de leur mémoire et libération des sessions inactives.
+
+Chaque session range ses gros objets (résultats, feuille de scores…) dans un
+:class:`SessionData` plutôt que directement dans son état. Le suivi est
+partagé par tout le processus : il permet d'afficher la mémoire de chaque
+session et de libérer les objets des sessions inactives depuis plus de
+``COMPRENDRE_SESSION_IDLE`` secondes (15 minutes par défaut).
+"""
+
+import itertools
+import os
+import sys
+import threading
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+
+IDLE_ENV_VAR = "COMPRENDRE_SESSION_IDLE"
+DEFAULT_IDLE_SECONDS = 15 * 60
+STATE_KEY = "_comprendre_session"
+
+_ids = itertools.count(1)
+
+
+def idle_seconds():
+    try:
+        return float(os.environ.get(IDLE_ENV_VAR, DEFAULT_IDLE_SECONDS))
+    except ValueError:
+        return DEFAULT_IDLE_SECONDS
+
+
+def deep_size(obj, _seen=None):
+    """Estimation de la mémoire occupée par ``obj`` (objets partagés exclus)."""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True, index=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if hasattr(obj, "nbytes") and not isinstance(obj, type):
+        # ResultsRecord, ScoreSheet… : leur propre mesure, sans les normes partagées
+        return int(obj.nbytes)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+class SessionData:
+    """Gros objets d'une session, libérables quand la session est inactive."""
+
+    def __init__(self):
+        self.id = next(_ids)
+        self.created = time.monotonic()
+        self.last_seen = self.created
+        self.freed = set()  # clés libérées pour inactivité, pas encore signalées à l'utilisateur
+        self._values = {}
+        self._cleanups = {}
+        self._lock = threading.Lock()
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._values.get(key, default)
+
+    def set(self, key, value, cleanup=None):
+        """Range ``value`` ; ``cleanup(value)`` est appelé quand elle est remplacée ou libérée."""
+        self.pop(key)
+        with self._lock:
+            self._values[key] = value
+            self.freed.discard(key)
+            if cleanup is not None:
+                self._cleanups[key] = cleanup
+
+    def pop(self, key):
+        with self._lock:
+            value = self._values.pop(key, None)
+            cleanup = self._cleanups.pop(key, None)
+        if cleanup is not None:
+            cleanup(value)
+        return value
+
+    def __len__(self):
+        with self._lock:
+            return len(self._values)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._values
+
+    def free(self):
+        """Libère tous les objets de la session."""
+        with self._lock:
+            keys = list(self._values)
+        for key in keys:
+            self.pop(key)
+        with self._lock:
+            self.freed.update(keys)
+
+    def take_freed(self, prefix=""):
+        """Clés commençant par ``prefix`` libérées depuis le dernier appel : chaque page signale les siennes."""
+        with self._lock:
+            keys = {key for key in self.freed if key.startswith(prefix)}
+            self.freed -= keys
+        return keys
+
+    def nbytes(self):
+        with self._lock:
+            values = dict(self._values)
+        return {key: deep_size(value) for key, value in values.items()}
+
+
+class SessionTracker:
+    """Sessions actives du processus (références faibles)."""
+
+    def __init__(self):
+        self._sessions = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def add(self, data):
+        with self._lock:
+            self._sessions.add(data)
+
+    def sessions(self):
+        with self._lock:
+            return sorted(self._sessions, key=lambda data: data.id)
+
+    def sweep(self, idle=None):
+        """Libère les objets des sessions inactives ; renvoie le nombre de sessions libérées."""
+        idle = idle_seconds() if idle is None else idle
+        now = time.monotonic()
+        freed = 0
+        for data in self.sessions():
+            if now - data.last_seen > idle and len(data):
+                data.free()
+                freed += 1
+        return freed
+
+    def report(self):
+        """Mémoire de chaque session : une ligne par session."""
+        now = time.monotonic()
+        rows = []
+        for data in self.sessions():
+            sizes = data.nbytes()
+            rows.append({
+                "session": data.id,
+                "inactive depuis (s)": round(now - data.last_seen, 1),
+                "mémoire (octets)": sum(sizes.values()),
+                "objets": ", ".join(f"{key} ({size:,} o)" for key, size in sizes.items()),
+            })
+        return rows
+
+
+TRACKER = SessionTracker()
+
+
+def attach(state, tracker=None):
+    """:class:`SessionData` de la session dont ``state`` est l'état (créé au besoin).
+
+    Marque la session comme active et libère au passage les sessions inactives.
+    """
+    tracker = tracker or TRACKER
+    data = state.get(STATE_KEY)
+    if data is None:
+        data = SessionData()
+        state[STATE_KEY] = data
+        tracker.add(data)
+    data.touch()
+    tracker.sweep()
+    return data
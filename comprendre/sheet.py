@@ -0,0 +1,80 @@
+"""Feuille de scores d'un enfant, recalculée de façon incrémentale.
+
+À chaque modification d'une saisie, seule la ligne de la tâche concernée et
+celles des scores d'interférence qui en dépendent sont recalculées ; le
+tableau de résultats n'est reconstruit que si quelque chose a changé.
+"""
+
+import math
+
+import pandas as pd
+
+from comprendre.scoring import CHILD_RESULT_COLUMNS, interference_scores, score_value
+from comprendre.sessions import deep_size
+from comprendre.tasks import DEPENDENTS, INTERFERENCES
+
+
+class ScoreSheet:
+    def __init__(self, age_group, norms, mode="normal"):
+        self.age_group = age_group
+        self.norms = norms
+        self.mode = mode  # calcul des percentiles (voir PERCENTILE_MODES)
+        self.raw = {}  # tâche -> score brut
+        self.errors = {}  # tâche -> saisie non numérique
+        self.version = 0  # incrémenté à chaque changement des résultats
+        self._rows = {}
+        self._frame = None
+        self._frame_version = -1
+
+    def update(self, task, text):
+        """Met à jour la saisie d'une tâche ; renvoie True si les résultats changent."""
+        text = (text or "").strip()
+        self.errors.pop(task, None)
+        value = None
+        if text:
+            try:
+                value = float(text)
+            except ValueError:
+                self.errors[task] = text
+
+        if self.raw.get(task) == value:
+            return False
+        if value is None:
+            del self.raw[task]
+        else:
+            self.raw[task] = value
+
+        for name in [task, *DEPENDENTS.get(task, [])]:
+            self._refresh(name)
+        self.version += 1
+        return True
+
+    @property
+    def nbytes(self):
+        """Mémoire occupée par la feuille (hors normes partagées)."""
+        return sum(deep_size(part) for part in (self.raw, self.errors, self._rows, self._frame))
+
+    def interferences(self):
+        return interference_scores(self.raw)
+
+    def _refresh(self, task):
+        if task in INTERFERENCES:
+            # Comme score() : pas d'interférence sans ses deux opérandes
+            value = self.interferences()[task]
+            if math.isnan(value):
+                value = None
+        else:
+            value = self.raw.get(task)
+        row = None if value is None else score_value(self.norms, self.age_group, task, value, self.mode)
+        if row is None:
+            self._rows.pop(task, None)
+        else:
+            self._rows[task] = row
+
+    def frame(self):
+        """Tableau des résultats, reconstruit seulement après un changement."""
+        if self._frame_version != self.version:
+            rows = sorted(self._rows.values(), key=lambda row: self.norms.task_index[row["Tâche"]])
+            self._frame = pd.DataFrame(rows, columns=CHILD_RESULT_COLUMNS)
+            self._frame_version = self.version
+        return self._frame
@@ -0,0 +1,177 @@
+"""Historique des évaluations, enregistré dans une base SQLite locale.
+
+Chaque évaluation (un enfant, un groupe d'âge, une version des normes, une
+date) est une ligne de ``assessments`` ; ses scores sont des lignes de
+``scores``. Les index sur l'identifiant de l'enfant et sur le groupe d'âge
+permettent de retrouver un historique en quelques millisecondes, même avec des
+centaines de milliers d'évaluations. Les statistiques des normes ne sont pas
+enregistrées : elles se retrouvent à partir de la version des normes.
+"""
+
+import datetime
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from comprendre.scoring import AGE_COLUMN, ID_COLUMN, SCORE_COLUMN, TASK_COLUMN
+from comprendre.versions import VERSION_COLUMN
+
+STORE_ENV_VAR = "COMPRENDRE_STORE"
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "resultats_comprendre.sqlite3")
+
+DATE_COLUMN = "Date"
+ASSESSMENT_COLUMN = "Évaluation"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+    id INTEGER PRIMARY KEY,
+    child_id TEXT NOT NULL,
+    age_group TEXT NOT NULL,
+    norms_version TEXT NOT NULL,
+    percentile_mode TEXT NOT NULL,
+    assessed_at TEXT NOT NULL  -- ISO 8601, UTC
+);
+CREATE INDEX IF NOT EXISTS assessments_child ON assessments (child_id, assessed_at);
+CREATE INDEX IF NOT EXISTS assessments_age_group ON assessments (age_group, assessed_at);
+CREATE TABLE IF NOT EXISTS scores (
+    assessment_id INTEGER NOT NULL REFERENCES assessments (id) ON DELETE CASCADE,
+    task TEXT NOT NULL,
+    raw_score REAL NOT NULL,
+    z_score REAL,
+    percentile REAL,
+    PRIMARY KEY (assessment_id, task)
+) WITHOUT ROWID;
+"""
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+
+
+class ResultsStore:
+    """Base d'historique ; une seule connexion, partagée entre threads sous verrou."""
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get(STORE_ENV_VAR) or DEFAULT_STORE_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def save(self, results, norms_version, mode="normal", assessed_at=None):
+        """Enregistre des résultats cotés : une évaluation par enfant et groupe d'âge.
+
+        ``results`` est un tableau de :func:`comprendre.scoring.score_cohort`.
+        Toutes les lignes sont insérées en une seule transaction ; renvoie les
+        identifiants des évaluations créées.
+        """
+        if results.empty:
+            return []
+        assessed_at = assessed_at or _now()
+        keys = results[[ID_COLUMN, AGE_COLUMN]].astype(str)
+        codes, uniques = pd.MultiIndex.from_frame(keys).factorize()
+
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                start = cur.execute("SELECT COALESCE(MAX(id), 0) FROM assessments").fetchone()[0] + 1
+                ids = np.arange(start, start + len(uniques))
+                cur.executemany(
+                    "INSERT INTO assessments (id, child_id, age_group, norms_version, percentile_mode, assessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    ((int(i), child, age, norms_version, mode, assessed_at)
+                     for i, (child, age) in zip(ids, uniques)),
+                )
+                cur.executemany(
+                    "INSERT OR REPLACE INTO scores (assessment_id, task, raw_score, z_score, percentile) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    zip(ids[codes].tolist(), results[TASK_COLUMN].tolist(),
+                        results[SCORE_COLUMN].to_numpy(dtype=float).tolist(),
+                        results["Z-Score"].to_numpy(dtype=float).tolist(),
+                        results["Percentile (%)"].to_numpy(dtype=float).tolist()),
+                )
+                cur.execute("COMMIT")
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+        return ids.tolist()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            columns = [d[0] for d in cur.description]
+            rows = cur.fetchall()
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    def assessments(self, child_id=None, age_group=None, norms_version=None):
+        """Évaluations enregistrées (une ligne par évaluation), de la plus ancienne à la plus récente."""
+        conditions, params = [], []
+        for column, value in (("child_id", child_id), ("age_group", age_group),
+                              ("norms_version", norms_version)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        frame = self._query(
+            "SELECT id, child_id, age_group, norms_version, percentile_mode, assessed_at "
+            f"FROM assessments {where} ORDER BY assessed_at, id", params)
+        return frame.rename(columns={
+            "id": ASSESSMENT_COLUMN, "child_id": ID_COLUMN, "age_group": AGE_COLUMN,
+            "norms_version": VERSION_COLUMN, "percentile_mode": "Calcul des percentiles",
+            "assessed_at": DATE_COLUMN,
+        })
+
+    def history(self, child_id):
+        """Scores de toutes les évaluations d'un enfant, de la plus ancienne à la plus récente."""
+        frame = self._query(
+            "SELECT a.id, a.child_id, a.age_group, a.norms_version, a.assessed_at, "
+            "s.task, s.raw_score, s.z_score, s.percentile "
+            "FROM assessments a JOIN scores s ON s.assessment_id = a.id "
+            "WHERE a.child_id = ? ORDER BY a.assessed_at, a.id", (child_id,))
+        return frame.rename(columns={
+            "id": ASSESSMENT_COLUMN, "child_id": ID_COLUMN, "age_group": AGE_COLUMN,
+            "norms_version": VERSION_COLUMN, "assessed_at": DATE_COLUMN, "task": TASK_COLUMN,
+            "raw_score": SCORE_COLUMN, "z_score": "Z-Score", "percentile": "Percentile (%)",
+        })
+
+    def latest(self, child_id):
+        """Dernière évaluation d'un enfant : (métadonnées, {tâche: score brut}), ou None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, age_group, norms_version, percentile_mode, assessed_at FROM assessments "
+                "WHERE child_id = ? ORDER BY assessed_at DESC, id DESC LIMIT 1", (child_id,)).fetchone()
+            if row is None:
+                return None
+            scores = dict(self._conn.execute(
+                "SELECT task, raw_score FROM scores WHERE assessment_id = ?", (row[0],)).fetchall())
+        meta = {ASSESSMENT_COLUMN: row[0], AGE_COLUMN: row[1], VERSION_COLUMN: row[2],
+                "Calcul des percentiles": row[3], DATE_COLUMN: row[4]}
+        return meta, scores
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM assessments").fetchone()[0]
+
+
+def open_store(path=None):
+    """Base d'historique ``path``, ouverte une seule fois par processus."""
+    path = os.path.abspath(path or os.environ.get(STORE_ENV_VAR) or DEFAULT_STORE_PATH)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = ResultsStore(path)
+        return store
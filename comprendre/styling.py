@@ -0,0 +1,60 @@
+"""Mise en forme du tableau des résultats pour l'affichage.
+
+Les styles sont calculés en une passe vectorisée (bandes de percentiles par
+``np.digitize``, couleur de chaque tâche selon sa catégorie) et seules les
+colonnes concernées reçoivent du CSS. Les nombres restent numériques : leur
+format d'affichage est laissé à l'application (``st.column_config``).
+"""
+
+import numpy as np
+import pandas as pd
+
+from comprendre.scoring import TASK_COLUMN, reorder_columns
+from comprendre.tasks import COLOR_BY_TASK, CATEGORY_COLORS
+
+PERCENTILE_COLUMN = "Percentile (%)"
+
+# Bornes supérieures (incluses) des bandes de percentiles et style de chaque bande
+PERCENTILE_BANDS = [3, 15, 85, 97, 100]
+PERCENTILE_BAND_STYLES = np.array([
+    'background-color: rgba(212, 70, 70, 0.5); color: black;',
+    'background-color: rgba(245, 167, 47, 0.5); color: black;',
+    'background-color: rgba(96, 205, 114, 0.5); color: black;',
+    'background-color: rgba(141, 223, 155, 0.5); color: black;',
+    'background-color: rgba(174, 222, 182, 0.5); color: black;',
+    '',  # au-delà de 100 ou valeur manquante
+], dtype=object)
+
+# Zones de percentiles des graphiques (mêmes bandes) : rouge, orange, verte, vert clair, bleue
+PERCENTILE_ZONES = [(0, 3, "#d44646"), (3, 15, "#f5a72f"), (15, 85, "#60cd72"),
+                    (85, 97, "#8ddf9b"), (97, 100, "#aedeb6")]
+
+
+def percentile_bands(percentiles):
+    """Indice de la bande de chaque percentile (0 à 4), 5 hors bandes ou manquant."""
+    values = np.asarray(percentiles, dtype=float)
+    bands = np.digitize(values, PERCENTILE_BANDS, right=True)
+    return np.where(np.isnan(values), len(PERCENTILE_BANDS), bands)
+
+
+def table_styles(dataframe):
+    """CSS de chaque cellule du tableau (chaîne vide pour les cellules sans style)."""
+    styles = pd.DataFrame("", index=dataframe.index, columns=dataframe.columns, dtype=object)
+    if PERCENTILE_COLUMN in dataframe.columns:
+        styles[PERCENTILE_COLUMN] = PERCENTILE_BAND_STYLES[percentile_bands(dataframe[PERCENTILE_COLUMN])]
+    if TASK_COLUMN in dataframe.columns:
+        colors = dataframe[TASK_COLUMN].map(COLOR_BY_TASK).fillna(CATEGORY_COLORS["Autre"])
+        styles[TASK_COLUMN] = "color: " + colors + "; font-weight: bold;"
+    return styles
+
+
+def style_results(dataframe, styles=None):
+    """Tableau des résultats mis en forme (bandes de percentiles, couleur des tâches).
+
+    ``styles`` peut être fourni s'il a déjà été calculé par :func:`table_styles`
+    pour ce tableau (colonnes réordonnées).
+    """
+    dataframe = reorder_columns(dataframe)
+    if styles is None:
+        styles = table_styles(dataframe)
+    return dataframe.style.format(precision=2).apply(lambda _: styles, axis=None)
@@ -0,0 +1,190 @@
+"""Description des tâches de la batterie COMPRENDRE.
+
+Les tables ci-dessous sont la seule source de vérité ; elles sont compilées
+une fois, à l'import, en un registre :data:`TASKS` (une fiche par tâche) et en
+dictionnaires de correspondance utilisables directement avec ``Series.map``.
+"""
+
+from dataclasses import dataclass
+
+# Tâches saisies à l'étape 2, regroupées par paires
+CATEGORIES = {
+    "Langage": [
+        ("Discrimination Phonologique", "Décision Lexicale Auditive"),
+        ("Mots Outils", "Stock Lexical"),
+        ("Compréhension Syntaxique", "Mots Outils - BOEHM")
+    ],
+    "Mémoire de Travail Verbale": [
+        ("Mémoire de travail verbale endroit empan", "Mémoire de travail verbale endroit brut"),
+        ("Mémoire de travail verbale envers empan", "Mémoire de travail verbale envers brut")
+    ],
+    "Mémoire de Travail Non Verbale": [
+        ("Mémoire de travail non verbale endroit empan", "Mémoire de travail non verbale endroit brut"),
+        ("Mémoire de travail non verbale envers empan", "Mémoire de travail non verbale envers brut")
+    ],
+    "Mise à jour Verbale": [
+        ("Mise à jour verbale empan", "Mise à jour verbale score"),
+    ],
+    "Mise à jour Non Verbale": [
+        ("Mise à jour non verbale empan", "Mise à jour non verbale score"),
+    ],
+    "INHIB verbale": [
+        ("Inhibition verbale congruent score", "Inhibition verbale incongruent score"),
+        ("Inhibition verbale congruent temps", "Inhibition verbale incongruent temps")
+    ],
+    "INHIB non verbale": [
+        ("Inhibition non verbale congruent score", "Inhibition non verbale incongruent score"),
+        ("Inhibition non verbale congruent temps", "Inhibition non verbale incongruent temps")
+    ]
+}
+
+# Catégories utilisées pour les résultats (tableau et graphique)
+CATEGORIES_MAPPING = {
+    "Langage": [
+        "Discrimination Phonologique", "Décision Lexicale Auditive",
+        "Mots Outils", "Stock Lexical", "Compréhension Syntaxique", "Mots Outils - BOEHM"
+    ],
+    "Mémoire de Travail": [
+        "Mémoire de travail verbale endroit empan", "Mémoire de travail verbale endroit brut",
+        "Mémoire de travail verbale envers empan", "Mémoire de travail verbale envers brut",
+        "Mémoire de travail non verbale endroit empan", "Mémoire de travail non verbale endroit brut",
+        "Mémoire de travail non verbale envers empan", "Mémoire de travail non verbale envers brut"
+    ],
+    "Mise à jour": [
+        "Mise à jour verbale empan", "Mise à jour verbale score",
+        "Mise à jour non verbale empan", "Mise à jour non verbale score"
+    ],
+    "Inhibition": [
+        "Inhibition verbale congruent score", "Inhibition verbale incongruent score",
+        "Inhibition verbale congruent temps", "Inhibition verbale incongruent temps",
+        "Inhibition verbale interférence score", "Inhibition verbale interférence temps",
+        "Inhibition non verbale congruent score", "Inhibition non verbale incongruent score",
+        "Inhibition non verbale congruent temps", "Inhibition non verbale incongruent temps",
+        "Inhibition non verbale interférence score", "Inhibition non verbale interférence temps"
+    ]
+}
+
+# Couleur de chaque catégorie de résultats
+CATEGORY_COLORS = {
+    "Langage": "#3798da",
+    "Mémoire de Travail": "#eca113",
+    "Mise à jour": "#e365d6",
+    "Inhibition": "#8353da",
+    "Autre": "#808080"
+}
+
+# Libellés abrégés pour l'axe Y du graphique
+TASK_NAME_MAPPING = {
+    "Discrimination Phonologique": "Discrimination\nPhonologique",
+    "Décision Lexicale Auditive": "Décision\nLexicale\nAuditive",
+    "Mots Outils": "Mots\nOutils",
+    "Stock Lexical": "Stock\nLexical",
+    "Compréhension Syntaxique": "Compréhension\nSyntaxique",
+    "Mots Outils - BOEHM": "BOEHM",
+    "Mémoire de travail verbale endroit empan": "Mémoire de travail\nVebrale\nendroit\nempan",
+    "Mémoire de travail verbale endroit brut": "Mémoire de travail\nVerbale\nendroit\nbrut",
+    "Mémoire de travail verbale envers empan": "Mémoire de travail\nVerbale\nenvers\nempan",
+    "Mémoire de travail verbale envers brut": "Mémoire de travail\nVerbale\nenvers\nbrut",
+    "Mémoire de travail non verbale endroit empan": "Mémoire de travail\nNon Verbale\nendroit\nempan",
+    "Mémoire de travail non verbale endroit brut": "Mémoire de travail\nNon Verbale\nendroit\nbrut",
+    "Mémoire de travail non verbale envers empan": "Mémoire de travail\nNon Verbale\nenvers\nempan",
+    "Mémoire de travail non verbale envers brut": "Mémoire de travail\nNon Verbale\nenvers\nbrut",
+    "Mise à jour verbale empan": "Mise-à-jour\nVerbale\nempan",
+    "Mise à jour verbale score": "Mise-à-jour\nVerbale\nbrut",
+    "Mise à jour non verbale empan": "Mise-à-jour\nNon Verbale\nempan",
+    "Mise à jour non verbale score": "Mise-à-jour\nNon Verbale\nbrut",
+    "Inhibition verbale congruent score": "Inhibition\nVerbale\nCongruent\nscore",
+    "Inhibition verbale incongruent score": "Inhibition\nVerbale\nIncongruent\nscore",
+    "Inhibition verbale congruent temps": "Inhibition\nVerbale\nCongruent\ntemps",
+    "Inhibition verbale incongruent temps": "Inhibition\nVerbale\nIncongruent\ntemps",
+    "Inhibition verbale interférence score": "Inhibition\nVerbale\nscore",
+    "Inhibition verbale interférence temps": "Inhibition\nVerbale\ntemps",
+    "Inhibition non verbale congruent score": "Inhibition\nNon Verbale\nCongruent\nscore",
+    "Inhibition non verbale incongruent score": "Inhibition\nNon Verbale\nIncongruent\nscore",
+    "Inhibition non verbale congruent temps": "Inhibition\nNon Verbale\nCongruent\ntemps",
+    "Inhibition non verbale incongruent temps": "Inhibition\nNon Verbale\nIncongruent\ntemps",
+    "Inhibition non verbale interférence score": "Inhibition\nNon Verbale\nscore",
+    "Inhibition non verbale interférence temps": "Inhibition\nNon Verbale\ntemps"
+}
+
+# Variables de temps : un temps plus long correspond à une moins bonne performance,
+# le Z-score est donc inversé
+TIME_VARIABLES = [
+    "Inhibition verbale congruent temps",
+    "Inhibition verbale incongruent temps",
+    "Inhibition non verbale congruent temps",
+    "Inhibition non verbale incongruent temps"]
+    #"Inhibition non verbale interférence temps",
+    #"Inhibition verbale interférence temps"]
+
+# Scores d'interférence : tâche = premier opérande - second opérande
+INTERFERENCES = {
+    "Inhibition verbale interférence score": (
+        "Inhibition verbale incongruent score", "Inhibition verbale congruent score"),
+    "Inhibition non verbale interférence score": (
+        "Inhibition non verbale incongruent score", "Inhibition non verbale congruent score"),
+    "Inhibition verbale interférence temps": (
+        "Inhibition verbale congruent temps", "Inhibition verbale incongruent temps"),
+    "Inhibition non verbale interférence temps": (
+        "Inhibition non verbale congruent temps", "Inhibition non verbale incongruent temps"),
+}
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    category: str
+    label: str
+    color: str
+    is_time: bool
+    input_group: str = None  # rubrique de saisie à l'étape 2 (None pour les scores calculés)
+    interference: tuple = None  # (premier opérande, second opérande) pour un score calculé
+
+
+def _build_registry():
+    input_groups = {task: group for group, pairs in CATEGORIES.items()
+                    for pair in pairs for task in pair}
+    category_by_task = {task: category for category, tasks in CATEGORIES_MAPPING.items()
+                        for task in tasks}
+    names = list(dict.fromkeys([*category_by_task, *input_groups, *INTERFERENCES]))
+    registry = {}
+    for name in names:
+        category = category_by_task.get(name, "Autre")
+        registry[name] = Task(
+            name=name,
+            category=category,
+            label=TASK_NAME_MAPPING.get(name, name),
+            color=CATEGORY_COLORS[category],
+            is_time=name in TIME_VARIABLES,
+            input_group=input_groups.get(name),
+            interference=INTERFERENCES.get(name),
+        )
+    return registry
+
+
+# Registre des tâches, construit une fois par processus
+TASKS = _build_registry()
+
+# Correspondances tâche -> attribut, pour des recherches en O(1) et ``Series.map``
+CATEGORY_BY_TASK = {name: task.category for name, task in TASKS.items()}
+COLOR_BY_TASK = {name: task.color for name, task in TASKS.items()}
+TIME_TASKS = frozenset(name for name, task in TASKS.items() if task.is_time)
+
+# Scores calculés qui dépendent de chaque tâche saisie
+DEPENDENTS = {}
+for _name, (_first, _second) in INTERFERENCES.items():
+    DEPENDENTS.setdefault(_first, []).append(_name)
+    DEPENDENTS.setdefault(_second, []).append(_name)
+
+
+def assign_category(task):
+    return CATEGORY_BY_TASK.get(task, "Autre")
+
+
+def categorize(tasks):
+    """Catégorie de chaque tâche d'une Series, en une seule passe vectorisée."""
+    return tasks.map(CATEGORY_BY_TASK).fillna("Autre")
+
+
+def category_color(category):
+    return CATEGORY_COLORS.get(category, CATEGORY_COLORS["Autre"])
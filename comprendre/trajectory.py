@@ -0,0 +1,111 @@
+"""Évolution des percentiles d'un enfant au fil de ses évaluations.
+
+Toutes les évaluations d'un enfant (chacune avec son groupe d'âge) sont
+cotées en une seule passe contre le registre des normes, puis rangées dans
+une matrice évaluations × tâches : le graphique trace toutes les séries en un
+seul appel, sans boucle par point.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from comprendre.scoring import AGE_COLUMN, SCORE_COLUMN, TASK_COLUMN, result_percentiles, z_scores
+from comprendre.store import ASSESSMENT_COLUMN, DATE_COLUMN
+from comprendre.tasks import CATEGORY_BY_TASK, CATEGORY_COLORS, COLOR_BY_TASK, TASKS, categorize
+from comprendre.versions import NORMS_AGE_COLUMN, VERSION_COLUMN
+
+TRAJECTORY_COLUMNS = [ASSESSMENT_COLUMN, DATE_COLUMN, AGE_COLUMN, VERSION_COLUMN, NORMS_AGE_COLUMN,
+                      TASK_COLUMN, SCORE_COLUMN, "Z-Score", "Percentile (%)", "Catégorie"]
+
+# Ordre des tâches dans les séries : celui du registre des tâches
+_TASK_ORDER = {name: i for i, name in enumerate(TASKS)}
+
+
+def score_trajectory(history, registry, version=None, mode="normal"):
+    """Cote toutes les évaluations d'un enfant en une seule passe.
+
+    ``history`` est l'historique de :meth:`comprendre.store.ResultsStore.history`.
+    Chaque évaluation est cotée avec son groupe d'âge ; les normes sont celles
+    de ``version`` pour toutes les évaluations (groupe d'âge correspondant
+    dans cette version), ou à défaut la version de chaque évaluation.
+    """
+    age_idx = history[AGE_COLUMN].map(registry.age_index)
+    task_idx = history[TASK_COLUMN].map(registry.task_index)
+    if version is None:
+        version_idx = history[VERSION_COLUMN].map(registry.version_index)
+    else:
+        version_idx = pd.Series(registry.version_index[version], index=history.index)
+    known = (age_idx.notna() & task_idx.notna() & version_idx.notna()).to_numpy()
+    history = history[known]
+
+    v = version_idx[known].to_numpy(dtype=np.intp)
+    a = registry.age_lookup[age_idx[known].to_numpy(dtype=np.intp), v]
+    t = task_idx[known].to_numpy(dtype=np.intp)
+    usable = a >= 0
+    usable[usable] = registry.complete[v[usable], a[usable], t[usable]]
+    history, v, a, t = history[usable], v[usable], a[usable], t[usable]
+
+    stats = registry.values[:, v, a, t]
+    scores = history[SCORE_COLUMN].to_numpy(dtype=float)
+    tasks = history[TASK_COLUMN].to_numpy()
+    z = z_scores(scores, stats, tasks)
+
+    result = pd.DataFrame({
+        ASSESSMENT_COLUMN: history[ASSESSMENT_COLUMN].to_numpy(),
+        DATE_COLUMN: history[DATE_COLUMN].to_numpy(),
+        AGE_COLUMN: history[AGE_COLUMN].to_numpy(),
+        VERSION_COLUMN: np.asarray(registry.versions, dtype=object)[v],
+        NORMS_AGE_COLUMN: np.asarray(registry.age_groups, dtype=object)[a],
+        TASK_COLUMN: tasks,
+        SCORE_COLUMN: scores,
+        "Z-Score": z,
+        "Percentile (%)": result_percentiles(mode, z, scores, registry.knots[v, a, t],
+                                             registry.knot_levels[v, a, t], tasks),
+        "Catégorie": categorize(pd.Series(tasks)).to_numpy(),
+    }, columns=TRAJECTORY_COLUMNS)
+    return result[np.isfinite(z)].reset_index(drop=True)
+
+
+@dataclass(frozen=True, eq=False)
+class Trajectory:
+    """Séries de percentiles : une ligne par évaluation, une colonne par série."""
+
+    labels: tuple  # une étiquette par évaluation (date et groupe d'âge)
+    series: tuple  # nom de chaque série (tâche ou catégorie)
+    colors: tuple  # couleur de chaque série
+    percentiles: np.ndarray  # (évaluation, série), NaN si la série manque à l'évaluation
+
+    @classmethod
+    def from_scores(cls, scored, tasks=None):
+        """Matrice des percentiles d'un résultat de :func:`score_trajectory`."""
+        if tasks is not None:
+            scored = scored[scored[TASK_COLUMN].isin(tasks)]
+        scored = scored.sort_values([DATE_COLUMN, ASSESSMENT_COLUMN], kind="stable")
+        sessions, session_keys = pd.factorize(scored[ASSESSMENT_COLUMN])
+        series = sorted(scored[TASK_COLUMN].unique(), key=lambda task: _TASK_ORDER.get(task, len(_TASK_ORDER)))
+        columns = pd.Index(series).get_indexer(scored[TASK_COLUMN])
+
+        values = np.full((len(session_keys), len(series)), np.nan)
+        values[sessions, columns] = scored["Percentile (%)"].to_numpy(dtype=float)
+
+        first = scored.drop_duplicates(ASSESSMENT_COLUMN)
+        labels = tuple(f"{date[:10]}\n{age}" for date, age in zip(first[DATE_COLUMN], first[AGE_COLUMN]))
+        colors = tuple(COLOR_BY_TASK.get(task, CATEGORY_COLORS["Autre"]) for task in series)
+        return cls(labels, tuple(series), colors, values)
+
+    def by_category(self):
+        """Moyenne des percentiles des tâches de chaque catégorie, par évaluation."""
+        categories = [CATEGORY_BY_TASK.get(task, "Autre") for task in self.series]
+        codes, names = pd.factorize(pd.Series(categories))
+        membership = np.zeros((len(self.series), len(names)))
+        membership[np.arange(len(self.series)), codes] = 1
+
+        present = ~np.isnan(self.percentiles)
+        totals = np.where(present, self.percentiles, 0) @ membership
+        counts = present @ membership
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, totals / counts, np.nan)
+        colors = tuple(CATEGORY_COLORS.get(name, CATEGORY_COLORS["Autre"]) for name in names)
+        return Trajectory(self.labels, tuple(names), colors, means)
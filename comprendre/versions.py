@@ -0,0 +1,280 @@
+"""Registre des versions des normes (``NORMES_NOV_24.xlsx``, ``NORMES_FEV_25.xlsx``…).
+
+Toutes les versions livrées sont chargées une seule fois par processus et
+empilées dans un même tableau (statistique × version × groupe d'âge × tâche),
+ce qui permet de coter un enfant contre plusieurs versions en une seule passe
+vectorisée et d'en comparer les résultats.
+
+Les groupes d'âge ne sont pas les mêmes d'une version à l'autre (« 5 ans -
+5 ans 11 mois » en novembre 2024, « 58 - 64 mois » en février 2025) : un groupe
+d'âge est rapproché de celui d'une autre version qui contient le milieu de sa
+tranche d'âge.
+"""
+
+import glob
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from comprendre.norms import NORM_COLUMNS, load_norms, quantile_knots
+from comprendre.scoring import (
+    AGE_COLUMN, CHILD_RESULT_COLUMNS, ID_COLUMN, SCORE_COLUMN, TASK_COLUMN,
+    add_interferences, result_percentiles, to_long, z_scores,
+)
+from comprendre.tasks import categorize
+
+# Dossier et motif des classeurs de normes livrés avec l'application
+NORMS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NORMS_PATTERN = "NORMES_*.xlsx"
+
+VERSION_COLUMN = "Version des normes"
+NORMS_AGE_COLUMN = "Groupe d'âge (normes)"
+VERSION_RESULT_COLUMNS = [ID_COLUMN, AGE_COLUMN, VERSION_COLUMN, NORMS_AGE_COLUMN, *CHILD_RESULT_COLUMNS]
+
+MONTHS = {
+    "JAN": 1, "FEV": 2, "MAR": 3, "AVR": 4, "MAI": 5, "JUIN": 6,
+    "JUIL": 7, "AOUT": 8, "SEP": 9, "OCT": 10, "NOV": 11, "DEC": 12,
+}
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def version_name(path):
+    """Nom de version d'un classeur : ``NORMES_FEV_25.xlsx`` -> ``FEV_25``."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return stem[len("NORMES_"):] if stem.upper().startswith("NORMES_") else stem
+
+
+def _version_sort_key(name):
+    # Ordre chronologique (MOIS_AA), les noms non reconnus à la fin
+    match = re.fullmatch(r"([A-Z]+)_(\d{2,4})", name.upper())
+    if match and match.group(1) in MONTHS:
+        return (0, int(match.group(2)), MONTHS[match.group(1)], name)
+    return (1, 0, 0, name)
+
+
+def _months(text):
+    match = re.fullmatch(r"\s*(\d+)\s*(?:ans?\s*(?:(\d+)\s*mois)?|mois)?\s*", text)
+    if match is None:
+        return None
+    if "an" in text:
+        return 12 * int(match.group(1)) + int(match.group(2) or 0)
+    return int(match.group(1))
+
+
+def age_bounds(label):
+    """Tranche d'âge en mois ``(début, fin)`` (fin exclue) d'un groupe d'âge, ou None.
+
+    « 58 - 64 mois » donne (58, 64) ; « 5 ans - 5 ans 11 mois » donne (60, 72).
+    """
+    parts = label.split(" - ")
+    if len(parts) != 2:
+        return None
+    low, high = _months(parts[0]), _months(parts[1])
+    if low is None or high is None:
+        return None
+    if "an" in parts[1]:
+        high += 1  # « 5 ans 11 mois » : borne incluse
+    return (low, high) if low < high else None
+
+
+@dataclass(frozen=True, eq=False)
+class NormsRegistry:
+    """Toutes les versions des normes, indexées par version × groupe d'âge × tâche."""
+
+    versions: tuple  # ordre chronologique
+    tables: tuple  # NormsTable de chaque version (partagées avec load_norms)
+    age_groups: tuple  # réunion des groupes d'âge de toutes les versions
+    tasks: tuple  # réunion des tâches de toutes les versions
+    values: np.ndarray  # (statistique, version, groupe d'âge, tâche), float64
+    present: np.ndarray  # (version, groupe d'âge, tâche), bool
+    version_index: dict = field(init=False, repr=False)
+    age_index: dict = field(init=False, repr=False)
+    task_index: dict = field(init=False, repr=False)
+    complete: np.ndarray = field(init=False, repr=False)
+    age_lookup: np.ndarray = field(init=False, repr=False)
+    knots: np.ndarray = field(init=False, repr=False)  # (version, groupe d'âge, tâche, quantile)
+    knot_levels: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "version_index", {v: i for i, v in enumerate(self.versions)})
+        object.__setattr__(self, "age_index", {a: i for i, a in enumerate(self.age_groups)})
+        object.__setattr__(self, "task_index", {t: i for i, t in enumerate(self.tasks)})
+        object.__setattr__(self, "complete", self.present & ~np.isnan(self.values).any(axis=0))
+        object.__setattr__(self, "age_lookup", self._age_lookup())
+        knots, levels = quantile_knots(self.values)
+        object.__setattr__(self, "knots", knots)
+        object.__setattr__(self, "knot_levels", levels)
+
+    def _age_lookup(self):
+        # (groupe d'âge, version) -> groupe d'âge à utiliser dans cette version, ou -1
+        lookup = np.full((len(self.age_groups), len(self.versions)), -1, dtype=np.intp)
+        bounds = [age_bounds(a) for a in self.age_groups]
+        for v, table in enumerate(self.tables):
+            own = [self.age_index[a] for a in table.age_groups]
+            for a, label in enumerate(self.age_groups):
+                if label in table.age_index:
+                    lookup[a, v] = a
+                elif bounds[a] is not None:
+                    middle = sum(bounds[a]) / 2
+                    for candidate in own:
+                        low_high = bounds[candidate]
+                        if low_high is not None and low_high[0] <= middle < low_high[1]:
+                            lookup[a, v] = candidate
+                            break
+        return lookup
+
+    @property
+    def latest(self):
+        return self.versions[-1]
+
+    @property
+    def key(self):
+        """Empreinte du registre : chemin et SHA-256 de chaque classeur."""
+        return tuple((table.path, table.sha256) for table in self.tables)
+
+    def table(self, version):
+        """Normes d'une version, au format :class:`comprendre.norms.NormsTable`."""
+        return self.tables[self.version_index[version]]
+
+    def stat(self, name):
+        """Tableau (version × groupe d'âge × tâche) d'une statistique (vue, sans copie)."""
+        return self.values[NORM_COLUMNS.index(name)]
+
+    def matching_age_group(self, age_group, version):
+        """Groupe d'âge de ``version`` correspondant à ``age_group``, ou None."""
+        a = self.age_index.get(age_group)
+        if a is None:
+            return None
+        match = self.age_lookup[a, self.version_index[version]]
+        return None if match < 0 else self.age_groups[match]
+
+
+def build_registry(tables):
+    """Registre des versions des tables ``tables`` (dans n'importe quel ordre)."""
+    tables = sorted(tables, key=lambda t: _version_sort_key(version_name(t.path)))
+    versions = tuple(version_name(t.path) for t in tables)
+    age_groups = tuple(dict.fromkeys(a for t in tables for a in t.age_groups))
+    tasks = tuple(dict.fromkeys(task for t in tables for task in t.tasks))
+    age_index = {a: i for i, a in enumerate(age_groups)}
+    task_index = {t: i for i, t in enumerate(tasks)}
+
+    values = np.full((len(NORM_COLUMNS), len(versions), len(age_groups), len(tasks)), np.nan)
+    present = np.zeros((len(versions), len(age_groups), len(tasks)), dtype=bool)
+    for v, table in enumerate(tables):
+        rows = np.array([age_index[a] for a in table.age_groups], dtype=np.intp)
+        cols = np.array([task_index[t] for t in table.tasks], dtype=np.intp)
+        values[:, v, rows[:, None], cols] = table.values
+        present[v, rows[:, None], cols] = table.present
+
+    return NormsRegistry(
+        versions=versions, tables=tuple(tables), age_groups=age_groups, tasks=tasks,
+        values=values, present=present,
+    )
+
+
+def norms_paths(directory=NORMS_DIR):
+    return sorted(glob.glob(os.path.join(directory, NORMS_PATTERN)))
+
+
+def load_registry(paths=None):
+    """Registre de toutes les versions des normes, partagé par tout le processus.
+
+    Par défaut, tous les classeurs ``NORMES_*.xlsx`` livrés avec l'application.
+    Le registre n'est reconstruit que si l'un des classeurs change.
+    """
+    paths = norms_paths() if paths is None else paths
+    if not paths:
+        raise FileNotFoundError("Aucun classeur de normes trouvé")
+    tables = [load_norms(path) for path in paths]
+    key = tuple((table.path, table.sha256) for table in tables)
+    with _cache_lock:
+        registry = _cache.get(key)
+        if registry is None:
+            registry = build_registry(tables)
+            _cache.clear()
+            _cache[key] = registry
+        return registry
+
+
+def score_versions(cohort, registry, versions=None, mode="normal"):
+    """Cote une cohorte contre plusieurs versions des normes, en une seule passe.
+
+    Renvoie une ligne par enfant, tâche et version, avec le groupe d'âge de la
+    version utilisé pour la cotation.
+    """
+    versions = list(registry.versions if versions is None else versions)
+    vi = np.array([registry.version_index[v] for v in versions], dtype=np.intp)
+
+    long = add_interferences(to_long(cohort, registry.task_index))
+    age_idx = long[AGE_COLUMN].map(registry.age_index)
+    task_idx = long[TASK_COLUMN].map(registry.task_index)
+    known = (age_idx.notna() & task_idx.notna()).to_numpy()
+    long = long[known]
+
+    # Une colonne par version : groupe d'âge de la version (ou -1) pour chaque ligne
+    a = registry.age_lookup[age_idx[known].to_numpy(dtype=np.intp)][:, vi]
+    v = np.broadcast_to(vi, a.shape)
+    t = np.broadcast_to(task_idx[known].to_numpy(dtype=np.intp)[:, None], a.shape)
+    usable = a >= 0
+    usable[usable] = registry.complete[v[usable], a[usable], t[usable]]
+
+    rows, cols = np.nonzero(usable)
+    a, v, t = a[rows, cols], v[rows, cols], t[rows, cols]
+    stats = registry.values[:, v, a, t]
+    scores = long[SCORE_COLUMN].to_numpy(dtype=float)[rows]
+    tasks = long[TASK_COLUMN].to_numpy()[rows]
+    z = z_scores(scores, stats, tasks)
+
+    result = pd.DataFrame({
+        ID_COLUMN: long[ID_COLUMN].to_numpy()[rows],
+        AGE_COLUMN: long[AGE_COLUMN].to_numpy()[rows],
+        VERSION_COLUMN: np.asarray(registry.versions, dtype=object)[v],
+        NORMS_AGE_COLUMN: np.asarray(registry.age_groups, dtype=object)[a],
+        TASK_COLUMN: tasks,
+        SCORE_COLUMN: scores,
+        "Z-Score": z,
+        **{column: stats[i] for i, column in enumerate(NORM_COLUMNS)},
+        "Percentile (%)": result_percentiles(mode, z, scores, registry.knots[v, a, t],
+                                             registry.knot_levels[v, a, t], tasks),
+        "Catégorie": categorize(pd.Series(tasks)).to_numpy(),
+    })
+    finite = np.isfinite(z)
+    result, t, v = result[finite], t[finite], v[finite]
+
+    # Ordre : enfants dans l'ordre du fichier, tâches dans l'ordre des normes, puis versions
+    child_order = pd.factorize(result[ID_COLUMN])[0]
+    order = np.lexsort((v, t, child_order))
+    return result.iloc[order].reset_index(drop=True)
+
+
+def compare_versions(results, reference=None):
+    """Tableau comparatif des résultats de :func:`score_versions`.
+
+    Une ligne par enfant et par tâche, avec le Z-score et le percentile de
+    chaque version, et leur écart à la version de référence (par défaut la
+    plus récente).
+    """
+    versions = list(dict.fromkeys(results[VERSION_COLUMN]))
+    reference = versions[-1] if reference is None else reference
+    keys = [ID_COLUMN, AGE_COLUMN, TASK_COLUMN]
+
+    wide = results.pivot(index=keys, columns=VERSION_COLUMN, values=["Z-Score", "Percentile (%)"])
+    order = results.drop_duplicates(subset=keys)
+    comparison = order[[*keys, SCORE_COLUMN]].set_index(keys)
+    for version in versions:
+        comparison[f"Z-Score {version}"] = wide[("Z-Score", version)]
+        comparison[f"Percentile (%) {version}"] = wide[("Percentile (%)", version)]
+    if reference in versions:
+        for version in versions:
+            if version == reference:
+                continue
+            comparison[f"Δ Z-Score {version}"] = wide[("Z-Score", version)] - wide[("Z-Score", reference)]
+            comparison[f"Δ Percentile {version}"] = (wide[("Percentile (%)", version)]
+                                                     - wide[("Percentile (%)", reference)])
+    return comparison.reset_index()
@@ -0,0 +1,154 @@
+"""Rechargement à chaud des normes : surveillance du dossier des classeurs.
+
+Un thread de fond relève toutes les ``COMPRENDRE_NORMS_POLL`` secondes (5 par
+défaut) la taille et la date de modification des ``NORMES_*.xlsx`` du dossier.
+Un classeur nouveau ou modifié est lu et validé dans ce thread, puis le
+registre partagé est remplacé d'un seul coup : une requête ne fait que lire la
+référence courante, sans jamais attendre une relecture. Un classeur invalide
+(colonnes manquantes, copie en cours) est écarté et l'ancienne version de ses
+normes reste servie.
+
+Chaque session garde le registre en service à son ouverture
+(:func:`session_registry`) : ses cotations ne changent pas de normes en cours
+de route, et elle passe aux nouvelles normes quand elle le demande.
+"""
+
+import os
+import threading
+
+from comprendre.norms import load_norms
+from comprendre.versions import NORMS_DIR, build_registry, norms_paths
+
+POLL_ENV_VAR = "COMPRENDRE_NORMS_POLL"
+DEFAULT_POLL_SECONDS = 5.0
+STATE_KEY = "_comprendre_norms"
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def poll_seconds():
+    try:
+        return float(os.environ.get(POLL_ENV_VAR, DEFAULT_POLL_SECONDS))
+    except ValueError:
+        return DEFAULT_POLL_SECONDS
+
+
+class NormsWatcher:
+    """Registre des normes d'un dossier, tenu à jour par un thread de fond."""
+
+    def __init__(self, directory=NORMS_DIR, interval=None):
+        self.directory = directory
+        self.interval = poll_seconds() if interval is None else interval
+        self.errors = {}  # chemin -> raison de l'échec de la dernière lecture
+        self._signature = {}  # chemin -> (date de modification, taille) au dernier relevé
+        self._tables = {}  # chemin -> dernière NormsTable valide
+        self._registry = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # Premier chargement synchrone : l'application ne peut pas démarrer sans normes
+        self.refresh()
+        if self._registry is None:
+            raise FileNotFoundError(f"Aucun classeur de normes valide dans {directory}")
+
+    @property
+    def registry(self):
+        """Registre en service (simple lecture de référence, sans verrou ni E/S)."""
+        return self._registry
+
+    def _scan(self):
+        signature = {}
+        for path in norms_paths(self.directory):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # supprimé entre le glob et le stat
+            signature[path] = (stat.st_mtime_ns, stat.st_size)
+        return signature
+
+    def refresh(self):
+        """Relit les classeurs nouveaux ou modifiés ; vrai si le registre a été remplacé."""
+        with self._refresh_lock:
+            signature = self._scan()
+            if signature == self._signature:
+                return False
+            tables = {}
+            # Nouveau dictionnaire, publié d'un seul coup : la page peut parcourir l'ancien
+            errors = dict(self.errors)
+            for path, (mtime_ns, size) in signature.items():
+                previous = self._tables.get(path)
+                if previous is not None and (previous.mtime_ns, previous.size) == (mtime_ns, size):
+                    tables[path] = previous
+                    continue
+                if signature.get(path) == self._signature.get(path) and path in errors:
+                    # Toujours invalide : relu seulement s'il change encore, l'ancienne version reste servie
+                    if previous is not None:
+                        tables[path] = previous
+                    continue
+                try:
+                    tables[path] = load_norms(path)
+                except Exception as e:
+                    # Classeur invalide ou en cours de copie : l'ancienne version reste servie
+                    errors[path] = str(e) or type(e).__name__
+                    if previous is not None:
+                        tables[path] = previous
+                else:
+                    errors.pop(path, None)
+            self._signature = signature
+            self.errors = {path: error for path, error in errors.items() if path in signature}
+
+            current = self._registry
+            key = sorted((table.path, table.sha256) for table in tables.values())
+            if not tables or (current is not None and key == sorted(current.key)):
+                self._tables.update(tables)
+                return False
+            self._tables = tables
+            # Remplacement atomique : les lecteurs voient l'ancien ou le nouveau registre, jamais un mélange
+            self._registry = build_registry(list(tables.values()))
+            return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception:
+                pass  # dossier momentanément illisible : nouvel essai au prochain relevé
+
+    def start(self):
+        """Démarre la surveillance (une seule fois)."""
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="comprendre-norms-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+def watch_norms(directory=NORMS_DIR):
+    """Surveillance du dossier ``directory``, démarrée une seule fois par processus."""
+    directory = os.path.abspath(directory)
+    with _watchers_lock:
+        watcher = _watchers.get(directory)
+        if watcher is None:
+            watcher = _watchers[directory] = NormsWatcher(directory).start()
+        return watcher
+
+
+def session_registry(state, watcher=None):
+    """Registre des normes de la session dont ``state`` est l'état.
+
+    C'est celui qui était en service à l'ouverture de la session (ou lors de
+    son dernier :func:`use_latest`), même si le dossier a changé depuis.
+    """
+    registry = state.get(STATE_KEY)
+    if registry is None:
+        registry = state[STATE_KEY] = (watcher or watch_norms()).registry
+    return registry
+
+
+def use_latest(state, watcher=None):
+    """Fait passer la session au registre en service ; renvoie ce registre."""
+    registry = state[STATE_KEY] = (watcher or watch_norms()).registry
+    return registry
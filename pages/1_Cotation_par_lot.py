@@ -0,0 +1,259 @@
+import os
+import tempfile
+import time
+
+import streamlit as st
+
+from comprendre.dashboard import CohortSummary, cohort_hash
+from comprendre import profiling, sessions
+from comprendre.jobs import FAILED, PENDING, POLL_SECONDS, RUNNING, export_queue
+from comprendre.profiling import stage
+from comprendre.records import ResultsRecord
+from comprendre.scoring import (AGE_COLUMN, ID_COLUMN, ISSUE_COLUMN, PERCENTILE_MODES, issues_by_line, read_cohort,
+                                score_cohort, validate_cohort)
+from comprendre.store import open_store
+from comprendre.styling import PERCENTILE_ZONES
+from comprendre.versions import compare_versions, score_versions
+from comprendre.watcher import session_registry, use_latest, watch_norms
+
+# Profilage optionnel, comme dans l'application principale : COMPRENDRE_PROFILE=1 ou ?profile=1
+profiling_active = profiling.enabled() or st.query_params.get("profile") == "1"
+
+# Normes de la session (voir l'application principale) : les nouvelles normes publiées
+# ne remplacent celles de la session que sur demande
+watcher = watch_norms()
+registry = session_registry(st.session_state, watcher)
+if registry is not watcher.registry:
+    st.sidebar.info("De nouvelles normes ont été publiées.")
+    st.sidebar.button("Utiliser les nouvelles normes", on_click=use_latest, args=(st.session_state, watcher))
+selected_version = st.sidebar.selectbox("Version des normes :", registry.versions,
+                                        index=len(registry.versions) - 1)
+norms = registry.table(selected_version)
+percentile_mode = st.sidebar.radio("Calcul des percentiles :", list(PERCENTILE_MODES),
+                                   format_func=PERCENTILE_MODES.get)
+
+# Résultats de la session, en mémoire compacte et libérés après une longue inactivité
+session = sessions.attach(st.session_state)
+if session.take_freed("batch_"):
+    st.info("Session inactive : les résultats ont été libérés. Relancez le calcul pour les retrouver.")
+
+
+# Agrégats de la cohorte, calculés une fois par empreinte puis seulement filtrés
+@st.cache_data(max_entries=8, show_spinner=False)
+def cohort_summary(digest, _record):
+    return CohortSummary.from_record(_record)
+
+
+def cohort_workbook(record):
+    # Import tardif : openpyxl n'est chargé qu'au téléchargement du classeur
+    from comprendre.export import results_workbook
+
+    return results_workbook(record.frame())
+
+
+def build_reports(record, report_format, active, progress=None):
+    # Rapports de la cohorte écrits sur disque par la file d'export ; le fichier est supprimé
+    # quand il quitte le cache de la file. Import tardif : matplotlib et openpyxl
+    from comprendre.reports import write_pdf_report, write_reports_archive
+
+    suffix = ".pdf" if report_format == "report" else ".zip"
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as archive:
+        try:
+            with stage("batch_reports", active):
+                if report_format == "report":
+                    write_pdf_report(record.frame(), archive, progress=progress)
+                else:
+                    write_reports_archive(record.frame(), archive, progress=progress, image_format=report_format)
+        except BaseException:
+            archive.close()
+            remove_file(archive.name)
+            raise
+    return archive.name
+
+
+# Avancement des rapports : seul ce fragment est réexécuté pendant la génération
+@st.fragment(run_every=POLL_SECONDS)
+def reports_progress(key):
+    job = export_queue().job(key)
+    if job is None or job.status not in (PENDING, RUNNING):
+        st.rerun()
+    st.progress(job.fraction, text=f"{job.done}/{job.total} rapports" if job.total else "Génération des rapports…")
+
+
+def remove_file(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+st.header("Cotation d'une cohorte")
+st.markdown(
+    f"""
+    Importez un fichier **CSV** ou **XLSX** contenant une ligne par enfant :
+
+    - format large : colonnes `{ID_COLUMN}`, `{AGE_COLUMN}`, puis une colonne par tâche
+      (nom de la tâche tel qu'il apparaît dans les normes) ;
+    - format long : colonnes `{ID_COLUMN}`, `{AGE_COLUMN}`, `Tâche`, `Score Enfant`.
+
+    Groupes d'âge reconnus : {", ".join(norms.age_groups)}.
+    """
+)
+
+uploaded = st.file_uploader("Fichier de scores", type=["csv", "xlsx"])
+
+if uploaded is not None and st.button("Calculer les résultats"):
+    try:
+        cohort = read_cohort(uploaded)
+        # Rapport d'import : les lignes signalées n'interrompent pas la cotation
+        with stage("batch_validation", profiling_active):
+            issues = validate_cohort(cohort, norms)
+        start = time.perf_counter()
+        with stage("batch_scoring", profiling_active):
+            results = score_cohort(cohort, norms, percentile_mode)
+        elapsed = time.perf_counter() - start
+    except ValueError as e:
+        st.error(f"Fichier non valide : {e}")
+    else:
+        st.session_state["batch_version"] = selected_version
+        st.session_state["batch_timing"] = (cohort[ID_COLUMN].nunique(), elapsed)
+        record = ResultsRecord.from_results(results, norms, percentile_mode)
+        session.set("batch_results", record)
+        session.set("batch_issues", issues)
+        session.set("batch_issue_lines", issues_by_line(issues))
+        st.session_state["batch_hash"] = cohort_hash(record)
+        st.session_state.pop("batch_saved", None)
+
+if "batch_results" in session:
+    record = session.get("batch_results")
+    n_children, elapsed = st.session_state["batch_timing"]
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Enfants", n_children)
+    col2.metric("Scores calculés", len(record))
+    col3.metric("Enfants / seconde", f"{n_children / max(elapsed, 1e-9):,.0f}")
+
+    issues = session.get("batch_issues")
+    if issues is not None and len(issues):
+        issue_lines = session.get("batch_issue_lines")
+        counts = issues[ISSUE_COLUMN].value_counts()
+        st.warning(f"{len(issue_lines)} lignes du fichier signalées : "
+                   + ", ".join(f"{issue.lower()} ({n})" for issue, n in counts.items()))
+        with st.expander("Rapport d'import"):
+            st.dataframe(issue_lines, hide_index=True)
+            st.download_button(
+                label="📥 Télécharger le rapport d'import (CSV)",
+                data=lambda: issues.to_csv(index=False, sep=";").encode("utf-8-sig"),
+                file_name="Rapport_import_cohorte.csv",
+                mime="text/csv",
+            )
+
+    # Tableau compact à l'écran ; le tableau complet (avec les normes) n'est construit qu'au téléchargement
+    st.dataframe(record.compact_frame(), hide_index=True)
+    st.download_button(
+        label="📥 Télécharger les résultats (CSV)",
+        data=lambda: record.frame().to_csv(index=False, sep=";").encode("utf-8-sig"),
+        file_name="Resultats_Comprendre_cohorte.csv",
+        mime="text/csv",
+    )
+    st.download_button(
+        label="📥 Télécharger les résultats (Excel)",
+        data=lambda: cohort_workbook(record),
+        file_name="Resultats_Comprendre_cohorte.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+    # Tableau de bord : répartition de la cohorte, filtrée par groupe d'âge et catégorie
+    with st.expander("Tableau de bord de la cohorte"):
+        if "batch_hash" not in st.session_state:
+            st.session_state["batch_hash"] = cohort_hash(record)
+        with stage("batch_dashboard", profiling_active):
+            summary = cohort_summary(st.session_state["batch_hash"], record)
+        present_ages = [a for a, n in zip(summary.age_groups, summary.children) if n]
+        present_categories = list(dict.fromkeys(c for c, n in zip(summary.categories, summary.counts.sum(axis=0)) if n))
+        col1, col2 = st.columns(2)
+        dashboard_ages = col1.multiselect("Groupes d'âge :", present_ages, default=present_ages)
+        dashboard_categories = col2.multiselect("Catégories :", present_categories, default=present_categories)
+
+        st.metric("Enfants sélectionnés", summary.n_children(dashboard_ages))
+        st.markdown("**Par catégorie** : nombre de scores par bande de percentiles, moyennes")
+        st.dataframe(summary.category_table(dashboard_ages, dashboard_categories).round(2))
+        st.markdown("**Par tâche** : nombre de scores par bande de percentiles")
+        bands = summary.band_table(dashboard_ages, dashboard_categories)
+        st.dataframe(bands)
+        st.bar_chart(bands, horizontal=True, stack="normalize",
+                     color=[color for _, _, color in PERCENTILE_ZONES])
+        st.markdown("**Percentile moyen** par tâche et groupe d'âge")
+        st.dataframe(summary.mean_table(dashboard_ages, dashboard_categories).round(1))
+        if len(bands):
+            histogram_task = st.selectbox("Histogramme des percentiles :", list(bands.index))
+            st.bar_chart(summary.histogram(histogram_task, dashboard_ages), x_label="Percentile (%)",
+                         y_label="Enfants")
+
+    # Enregistrement de toute la cohorte dans l'historique, en une seule transaction
+    if st.session_state.get("batch_saved"):
+        st.caption("Résultats enregistrés dans l'historique.")
+    elif st.button("Enregistrer dans l'historique"):
+        try:
+            start = time.perf_counter()
+            with stage("batch_store", profiling_active):
+                saved = open_store().save(record.frame(), st.session_state["batch_version"], record.mode)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            st.error(f"Les résultats n'ont pas pu être enregistrés : {e}")
+        else:
+            st.session_state["batch_saved"] = True
+            st.success(f"{len(saved)} évaluations enregistrées en {elapsed:.2f} s.")
+
+    # Comparaison avec les autres versions des normes
+    batch_version = st.session_state["batch_version"]
+    other_versions = [v for v in registry.versions if v != batch_version]
+    # Normes de la session remplacées depuis la cotation : la version de la cohorte peut avoir disparu
+    if other_versions and batch_version in registry.version_index:
+        st.subheader("Comparaison des versions des normes")
+        compared_versions = st.multiselect("Versions à comparer :", other_versions)
+        if compared_versions:
+            with stage("batch_version_compare", profiling_active):
+                by_version = score_versions(record.raw_scores(), registry,
+                                            [batch_version, *compared_versions], record.mode)
+                comparison = compare_versions(by_version, reference=batch_version)
+            st.dataframe(comparison, hide_index=True)
+            st.download_button(
+                label="📥 Télécharger la comparaison (CSV)",
+                data=lambda: comparison.to_csv(index=False, sep=";").encode("utf-8-sig"),
+                file_name="Comparaison_normes_Comprendre_cohorte.csv",
+                mime="text/csv",
+            )
+
+    # Rapports individuels : rendus en parallèle et écrits dans une archive sur disque,
+    # ou réunis dans un seul PDF (graphique et tableau de chaque enfant)
+    st.subheader("Rapports individuels")
+    report_format = st.radio("Format des rapports :", ["png", "svg", "pdf", "report"], horizontal=True,
+                             format_func={"png": "ZIP, graphiques PNG (300 DPI)", "svg": "ZIP, graphiques SVG",
+                                          "pdf": "ZIP, graphiques PDF", "report": "PDF unique"}.get)
+    # Rendus par la file d'export, une seule fois par cohorte et par format : la page reste utilisable
+    exports = export_queue()
+    reports_key = f"{st.session_state['batch_hash']}:{report_format}"
+    reports_path = exports.result(reports_key)
+    reports_job = exports.job(reports_key)
+    if reports_path is not None:
+        is_pdf = reports_path.endswith(".pdf")
+
+        def read_reports():
+            with open(reports_path, "rb") as f:
+                return f.read()
+
+        st.download_button(
+            label=f"📥 Télécharger les rapports individuels ({'PDF' if is_pdf else 'ZIP'})",
+            data=read_reports,
+            file_name=f"Rapports_Comprendre_cohorte.{'pdf' if is_pdf else 'zip'}",
+            mime="application/pdf" if is_pdf else "application/zip",
+        )
+    elif reports_job is None or reports_job.status == FAILED:
+        if reports_job is not None:
+            st.error(f"La génération des rapports a échoué : {reports_job.error}")
+        st.button("Générer les rapports de tous les enfants", on_click=exports.submit,
+                  args=(reports_key, build_reports, record, report_format, profiling_active),
+                  kwargs={"label": "Rapports de la cohorte", "cleanup": remove_file})
+    else:
+        reports_progress(reports_key)
@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from comprendre.cli import main
+from comprendre.norms import DEFAULT_NORMS_PATH, load_norms
+from comprendre.scoring import AGE_COLUMN, ID_COLUMN, ISSUE_NOT_NUMERIC, LINE_COLUMN, SCORE_COLUMN, TASK_COLUMN
+
+
+@pytest.fixture(scope="module")
+def norms():
+    return load_norms(DEFAULT_NORMS_PATH)
+
+
+def test_anomalies_numbered_with_file_lines(norms, tmp_path):
+    age_group = norms.age_groups[0]
+    a = norms.age_index[age_group]
+    first, second = [task for t, task in enumerate(norms.tasks) if norms.complete[a, t]][:2]
+    # Scores valides : la médiane des normes
+    valid = {task: str(norms.knots[a, norms.task_index[task], 4]) for task in (first, second)}
+    # Format long ; les lignes de « a » sont reportées au bloc suivant, le premier bloc a donc un trou
+    cohort = pd.DataFrame([
+        ("b", age_group, first, valid[first]),
+        ("a", age_group, first, valid[first]),
+        ("b", age_group, second, "x"),  # ligne 4
+        ("a", age_group, second, valid[second]),
+        ("c", age_group, first, "y"),  # ligne 6
+    ], columns=[ID_COLUMN, AGE_COLUMN, TASK_COLUMN, SCORE_COLUMN])
+    source = tmp_path / "cohorte.csv"
+    cohort.to_csv(source, sep=";", index=False)
+    anomalies = tmp_path / "anomalies.csv"
+
+    assert main([str(source), "-o", str(tmp_path / "resultats.csv"), "--anomalies", str(anomalies),
+                 "--chunksize", "4"]) == 0
+    report = pd.read_csv(anomalies, sep=";")
+    assert report[[LINE_COLUMN, ID_COLUMN]].values.tolist() == [[4, "b"], [6, "c"]]
+    assert report["Anomalies"].str.endswith(ISSUE_NOT_NUMERIC).all()
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from comprendre.dashboard import BAND_LABELS, CohortSummary, cohort_hash
+from comprendre.norms import DEFAULT_NORMS_PATH, load_norms
+from comprendre.records import ResultsRecord
+from comprendre.scoring import AGE_COLUMN, ID_COLUMN, TASK_COLUMN, score_cohort
+from comprendre.tasks import CATEGORY_BY_TASK
+
+PERCENTILE_COLUMN = "Percentile (%)"
+
+
+@pytest.fixture(scope="module")
+def norms():
+    return load_norms(DEFAULT_NORMS_PATH)
+
+
+@pytest.fixture(scope="module")
+def record(norms):
+    # 60 enfants répartis sur trois groupes d'âge, scores tirés autour de la moyenne des normes
+    rng = np.random.default_rng(0)
+    rows = []
+    for i in range(60):
+        age_group = norms.age_groups[i % 3]
+        a = norms.age_index[age_group]
+        mean, std = norms.stat("Moyenne")[a], norms.stat("Ecart-type")[a]
+        scores = {task: float(mean[t] + rng.normal() * std[t]) for t, task in enumerate(norms.tasks)
+                  if norms.complete[a, t] and rng.random() < 0.8}
+        rows.append({ID_COLUMN: f"E{i:03d}", AGE_COLUMN: age_group, **scores})
+    return ResultsRecord.from_results(score_cohort(pd.DataFrame(rows), norms), norms)
+
+
+@pytest.fixture(scope="module")
+def frame(record):
+    # Référence : les lignes de la cohorte, regroupées par pandas
+    frame = record.compact_frame()
+    frame[AGE_COLUMN] = frame[AGE_COLUMN].astype(str)
+    frame[TASK_COLUMN] = frame[TASK_COLUMN].astype(str)
+    frame["Catégorie"] = frame[TASK_COLUMN].map(lambda task: CATEGORY_BY_TASK.get(task, "Autre"))
+    frame["Bande"] = pd.cut(frame[PERCENTILE_COLUMN].astype(float), [-np.inf, 3, 15, 85, 97, 100],
+                            labels=BAND_LABELS)
+    return frame
+
+
+@pytest.fixture(scope="module")
+def summary(record):
+    return CohortSummary.from_record(record)
+
+
+SELECTIONS = [(None, None), ([1], None), ([0, 2], ["Langage", "Inhibition"])]
+
+
+def _select(frame, norms, age_groups, categories):
+    if age_groups is not None:
+        frame = frame[frame[AGE_COLUMN].isin([norms.age_groups[a] for a in age_groups])]
+    if categories is not None:
+        frame = frame[frame["Catégorie"].isin(categories)]
+    return frame
+
+
+def _ages(norms, age_groups):
+    return None if age_groups is None else [norms.age_groups[a] for a in age_groups]
+
+
+@pytest.mark.parametrize("age_groups, categories", SELECTIONS)
+def test_band_table(summary, frame, norms, age_groups, categories):
+    selected = _select(frame, norms, age_groups, categories)
+    expected = pd.crosstab(selected[TASK_COLUMN], selected["Bande"]).reindex(columns=BAND_LABELS, fill_value=0)
+    table = summary.band_table(_ages(norms, age_groups), categories)
+
+    assert set(table.index) == set(expected.index)
+    pd.testing.assert_frame_equal(table.loc[expected.index], expected, check_names=False, check_dtype=False)
+    assert summary.n_children(_ages(norms, age_groups)) == frame.loc[
+        frame[AGE_COLUMN].isin(_ages(norms, age_groups) or norms.age_groups), ID_COLUMN].nunique()
+
+
+@pytest.mark.parametrize("age_groups, categories", SELECTIONS)
+def test_category_table(summary, frame, norms, age_groups, categories):
+    selected = _select(frame, norms, age_groups, categories)
+    table = summary.category_table(_ages(norms, age_groups), categories)
+    grouped = selected.groupby("Catégorie")
+
+    assert set(table.index) == set(grouped.groups)
+    np.testing.assert_allclose(table["Z-Score moyen"], grouped["Z-Score"].mean().loc[table.index],
+                               rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(table["Percentile moyen"], grouped[PERCENTILE_COLUMN].mean().loc[table.index],
+                               rtol=1e-6, atol=1e-6)
+    assert table[BAND_LABELS].sum(axis=1).tolist() == grouped.size().loc[table.index].tolist()
+
+
+def test_mean_table(summary, frame, norms):
+    table = summary.mean_table(value="Z-Score")
+    expected = frame.pivot_table(index=TASK_COLUMN, columns=AGE_COLUMN, values="Z-Score", aggfunc="mean")
+    expected = expected.reindex(index=table.index, columns=table.columns)
+    np.testing.assert_allclose(table.to_numpy(), expected.to_numpy(), rtol=1e-6, atol=1e-6)
+
+
+def test_histogram(summary, frame):
+    task = frame[TASK_COLUMN].iloc[0]
+    histogram = summary.histogram(task)
+    percentiles = frame.loc[frame[TASK_COLUMN] == task, PERCENTILE_COLUMN].astype(float)
+    expected = np.histogram(percentiles, np.linspace(0, 100, 21))[0]
+    assert histogram.tolist() == expected.tolist()
+
+
+def test_cohort_hash(record, norms):
+    assert cohort_hash(record) == cohort_hash(ResultsRecord.from_results(record.frame(), norms))
+    other = ResultsRecord.from_results(record.frame().iloc[1:], norms)
+    assert cohort_hash(other) != cohort_hash(record)
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from comprendre.jobs import DONE, FAILED, ExportQueue, ResultCache
+
+
+def _wait(queue, key, timeout=5):
+    deadline = time.monotonic() + timeout
+    while queue.job(key).status not in (DONE, FAILED):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return queue.job(key)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResultCache(max_bytes=10)
+    evicted = []
+    for key in "abc":
+        cache.put(key, key.encode() * 4, 4, evicted.append)
+    assert evicted == [b"aaaa"]
+    assert "a" not in cache and len(cache) == 2 and cache.nbytes == 8
+
+    cache.get("b")  # b devient le plus récent : c est évincé à sa place
+    cache.put("d", b"dddd", 4, evicted.append)
+    assert evicted == [b"aaaa", b"cccc"]
+    assert list(cache._items) == ["b", "d"]
+
+
+def test_cache_keeps_newest_above_bound():
+    cache = ResultCache(max_bytes=10)
+    cache.put("a", b"a", 1)
+    cache.put("big", b"x" * 20, 20)
+    assert "big" in cache and "a" not in cache
+    assert cache.nbytes == 20
+
+
+def test_cache_replace_cleans_old_value():
+    cache = ResultCache(max_bytes=10)
+    cleaned = []
+    cache.put("a", b"old", 3, cleaned.append)
+    cache.put("a", b"new", 3, cleaned.append)
+    assert cleaned == [b"old"]
+    assert cache.get("a") == b"new" and cache.nbytes == 3
+
+
+def test_identical_keys_rendered_once():
+    queue = ExportQueue(workers=2)
+    release = threading.Event()
+    calls = []
+
+    def render(progress=None):
+        calls.append(1)
+        release.wait(5)
+        progress(1, 1)
+        return b"archive"
+
+    first = queue.submit("key", render)
+    assert queue.submit("key", render) is first  # en attente ou en cours
+    release.set()
+    assert _wait(queue, "key").status == DONE
+    assert queue.submit("key", render) is first  # terminé et en cache
+    assert queue.result("key") == b"archive"
+    assert len(calls) == 1
+
+
+def test_failed_job_resubmitted():
+    queue = ExportQueue(workers=1)
+    attempts = []
+
+    def render(progress=None):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("disque plein")
+        return b"archive"
+
+    failed = queue.submit("key", render)
+    assert _wait(queue, "key").error == "disque plein"
+    retried = queue.submit("key", render)
+    assert retried is not failed
+    assert _wait(queue, "key").status == DONE
+    assert queue.result("key") == b"archive" and len(attempts) == 2
+
+
+def test_eviction_cleans_up_and_forgets_job():
+    queue = ExportQueue(workers=1, max_bytes=10)
+    cleaned = []
+    for key in ("a", "b"):
+        queue.submit(key, lambda progress=None, key=key: key.encode() * 8, cleanup=cleaned.append)
+        _wait(queue, key)
+    assert cleaned == [b"aaaaaaaa"]
+    assert queue.job("a") is None and queue.result("a") is None
+    assert [job.id for job in queue.jobs()] == ["b"]
+
@@ -0,0 +1,90 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from comprendre import norms as norms_module
+from comprendre.norms import load_norms, snapshot_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / "NORMES_FEV_25.xlsx"
+    shutil.copy(os.path.join(ROOT, "NORMES_FEV_25.xlsx"), path)
+    return str(path)
+
+
+def _new_process(path, monkeypatch=None):
+    # Comme au démarrage d'un nouveau processus : cache mémoire vide ; avec ``monkeypatch``,
+    # toute relecture du classeur par openpyxl fait échouer le test
+    norms_module._cache.pop(os.path.abspath(path), None)
+    if monkeypatch is not None:
+        def parse(*args):
+            raise AssertionError("classeur relu")
+        monkeypatch.setattr(norms_module, "_parse_workbook", parse)
+
+
+def _touch(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def _snapshot_mtime(path):
+    with np.load(snapshot_path(path)) as snapshot:
+        return int(snapshot["mtime_ns"])
+
+
+def test_table_shared_in_process(workbook):
+    assert load_norms(workbook) is load_norms(workbook)
+
+
+def test_snapshot_reused_by_new_process(workbook, monkeypatch):
+    table = load_norms(workbook)
+    assert os.path.exists(snapshot_path(workbook))
+
+    _new_process(workbook, monkeypatch)
+    snapshot = load_norms(workbook)
+    assert snapshot is not table
+    assert (snapshot.sha256, snapshot.age_groups, snapshot.tasks) == (table.sha256, table.age_groups, table.tasks)
+    np.testing.assert_array_equal(snapshot.values, table.values)
+    np.testing.assert_array_equal(snapshot.present, table.present)
+
+
+def test_touched_workbook_checked_by_sha256(workbook, monkeypatch):
+    # Date de modification changée, contenu identique (copie, checkout) : l'instantané reste valide
+    table = load_norms(workbook)
+    _touch(workbook)
+
+    _new_process(workbook, monkeypatch)
+    touched = load_norms(workbook)
+    assert touched.sha256 == table.sha256
+    assert touched.mtime_ns == os.stat(workbook).st_mtime_ns != table.mtime_ns
+    assert _snapshot_mtime(workbook) == touched.mtime_ns  # réécrit avec la nouvelle date
+
+
+def test_modified_workbook_reparsed(workbook):
+    table = load_norms(workbook)
+    shutil.copy(os.path.join(ROOT, "NORMES_NOV_24.xlsx"), workbook)
+
+    modified = load_norms(workbook)  # même processus : taille ou date changée
+    assert modified.sha256 != table.sha256
+    assert modified.values.shape != table.values.shape or not np.array_equal(
+        modified.values, table.values, equal_nan=True)
+
+    _new_process(workbook)
+    assert load_norms(workbook).sha256 == modified.sha256  # instantané réécrit pour le nouveau contenu
+    assert _snapshot_mtime(workbook) == modified.mtime_ns
+
+
+def test_snapshot_of_other_content_ignored(workbook, tmp_path):
+    # Instantané d'un autre classeur copié à sa place : l'empreinte ne correspond pas, le classeur est relu
+    other = tmp_path / "NORMES_NOV_24.xlsx"
+    shutil.copy(os.path.join(ROOT, "NORMES_NOV_24.xlsx"), other)
+    load_norms(str(other))
+    shutil.copy(snapshot_path(str(other)), snapshot_path(workbook))
+
+    table = load_norms(workbook)
+    assert table.sha256 == norms_module._file_sha256(workbook)
@@ -0,0 +1,49 @@
+import io
+
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+from PIL import Image  # noqa: E402
+
+from comprendre.norms import DEFAULT_NORMS_PATH, load_norms  # noqa: E402
+from comprendre.plotting import ChartTemplate, encode_png, render_image  # noqa: E402
+from comprendre.scoring import score  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def results():
+    # Un enfant dont chaque score est la moyenne des normes de son groupe d'âge
+    norms = load_norms(DEFAULT_NORMS_PATH)
+    age_group = norms.age_groups[0]
+    a = norms.age_index[age_group]
+    raw_scores = {task: float(norms.stat("Moyenne")[a, t]) for t, task in enumerate(norms.tasks)
+                  if norms.complete[a, t]}
+    return score(age_group, raw_scores, norms)
+
+
+def _image(png):
+    return Image.open(io.BytesIO(png)).convert("RGB")
+
+
+@pytest.mark.parametrize("n_tasks", [5, 12, None])
+@pytest.mark.parametrize("dpi", [72, 100])
+def test_template_png_matches_full_render(results, n_tasks, dpi):
+    tasks = results["Tâche"].tolist()[:n_tasks]
+    data = results[results["Tâche"].isin(tasks)]
+    blitted = _image(ChartTemplate(tasks, dpi).render(data))
+    full = _image(render_image(results, tasks, "png", dpi))
+
+    assert blitted.size == full.size
+    # Mêmes éléments (titre de l'axe X compris), au décalage d'un pixel près
+    bottom = slice(-int(0.5 * dpi), None)
+    assert (np.asarray(blitted)[bottom] < 128).any()
+    assert np.abs(np.asarray(blitted, dtype=int) - np.asarray(full, dtype=int)).mean() < 5
+
+
+def test_encode_png_round_trip():
+    pixels = np.random.default_rng(0).integers(0, 256, (7, 5, 3), dtype=np.uint8)
+    image = Image.open(io.BytesIO(encode_png(pixels, 300)))
+    assert image.mode == "RGB"
+    assert image.info["dpi"] == pytest.approx((300, 300), abs=0.01)
+    np.testing.assert_array_equal(np.asarray(image), pixels)
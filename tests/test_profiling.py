@@ -0,0 +1,36 @@
+import threading
+import tracemalloc
+
+from comprendre.profiling import ProfileRegistry, Stage
+
+
+def test_tracing_stops_after_outermost_stage():
+    registry = ProfileRegistry()
+    with Stage("outer", True, registry):
+        with Stage("inner", True, registry):
+            data = [0] * 100_000
+        assert tracemalloc.is_tracing()
+    assert not tracemalloc.is_tracing()
+    assert registry.summary()["inner"]["max_peak_bytes"] >= 8 * len(data)
+
+
+def test_tracing_shared_between_threads():
+    registry = ProfileRegistry()
+    threads = [threading.Thread(target=lambda: Stage("thread", True, registry).__enter__().stop())
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.summary()["thread"]["count"] == 8
+    assert not tracemalloc.is_tracing()
+
+
+def test_external_tracing_left_running():
+    tracemalloc.start()
+    try:
+        with Stage("stage", True, ProfileRegistry()):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from comprendre.norms import DEFAULT_NORMS_PATH, load_norms
+from comprendre.records import COMPACT_COLUMNS, ResultsRecord
+from comprendre.scoring import (
+    AGE_COLUMN, CHILD_RESULT_COLUMNS, ID_COLUMN, RESULT_COLUMNS, score, score_cohort, score_long,
+)
+
+
+@pytest.fixture(scope="module")
+def norms():
+    return load_norms(DEFAULT_NORMS_PATH)
+
+
+def _tasks(norms, age_group):
+    # Deux premières tâches dont les normes sont complètes pour ``age_group``
+    a = norms.age_index[age_group]
+    return [task for t, task in enumerate(norms.tasks) if norms.complete[a, t]][:2]
+
+
+@pytest.fixture(scope="module")
+def results(norms):
+    # Trois enfants de groupes d'âge différents, scores autour de la moyenne des normes
+    rows = []
+    for i, age_group in enumerate(norms.age_groups[:3]):
+        a = norms.age_index[age_group]
+        mean, std = norms.stat("Moyenne")[a], norms.stat("Ecart-type")[a]
+        scores = {task: round(float(mean[t] + (i - 1) * std[t]), 2) for t, task in enumerate(norms.tasks)
+                  if norms.complete[a, t]}
+        rows.append({ID_COLUMN: f"E{i}", AGE_COLUMN: age_group, **scores})
+    return score_cohort(pd.DataFrame(rows), norms)
+
+
+@pytest.mark.parametrize("mode", ["normal", "empirical"])
+def test_frame_round_trip(norms, mode):
+    first, second = _tasks(norms, norms.age_groups[0])
+    cohort = pd.DataFrame({ID_COLUMN: ["E1", "E2"], AGE_COLUMN: [norms.age_groups[0]] * 2,
+                           first: [10.0, 12.5], second: [3.0, 1.0]})
+    results = score_cohort(cohort, norms, mode)
+    record = ResultsRecord.from_results(results, norms, mode)
+
+    assert len(record) == len(results) == 4
+    pd.testing.assert_frame_equal(record.frame(), results[RESULT_COLUMNS])
+
+
+def test_compact_frame(results, norms):
+    record = ResultsRecord.from_results(results, norms)
+    compact = record.compact_frame()
+
+    assert list(compact.columns) == COMPACT_COLUMNS
+    assert compact[ID_COLUMN].astype(str).tolist() == results[ID_COLUMN].tolist()
+    np.testing.assert_array_equal(compact["Score Enfant"], results["Score Enfant"])
+    np.testing.assert_allclose(compact["Z-Score"], results["Z-Score"], rtol=1e-6)
+    np.testing.assert_allclose(compact["Percentile (%)"], results["Percentile (%)"], rtol=1e-6)
+    assert record.nbytes < results.memory_usage(deep=True).sum() / 4
+
+
+def test_raw_scores_rescored_exactly(results, norms):
+    record = ResultsRecord.from_results(results, norms)
+    pd.testing.assert_frame_equal(score_long(record.raw_scores(), norms), results)
+
+
+def test_single_child(norms):
+    age_group = norms.age_groups[0]
+    first, second = _tasks(norms, age_group)
+    child = score(age_group, {first: 10.0, second: 3.0}, norms)
+    record = ResultsRecord.from_results(child, norms, child_id="E1", age_group=age_group)
+
+    pd.testing.assert_frame_equal(record.frame(with_ids=False), child[CHILD_RESULT_COLUMNS].reset_index(drop=True))
+    assert len(child) == 2
+    assert set(record.frame()[ID_COLUMN]) == {"E1"}
+    assert set(record.frame()[AGE_COLUMN]) == {age_group}
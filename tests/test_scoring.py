@@ -0,0 +1,215 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from comprendre.norms import DEFAULT_NORMS_PATH, NORM_COLUMNS, QUANTILE_LEVELS, load_norms, quantile_knots
+from comprendre.scoring import (
+    AGE_COLUMN, ID_COLUMN, ISSUE_COLUMN, ISSUE_NOT_NUMERIC, ISSUE_OUT_OF_RANGE, ISSUE_UNKNOWN_AGE,
+    ISSUE_UNKNOWN_TASK, LINE_COLUMN, SCORE_COLUMN, TASK_COLUMN, add_interferences, empirical_percentiles,
+    interference_scores, issues_by_line, normal_cdf, score, score_value, validate_cohort,
+)
+from comprendre.sheet import ScoreSheet
+from comprendre.tasks import INTERFERENCES, TIME_VARIABLES
+
+
+# Quantiles d'une ligne des normes (Minimum, 5e, 10e, Q1, médiane, Q3, 90e, Maximum) et leurs niveaux
+KNOTS = np.array([[0.0, 10, 20, 30, 40, 50, 60, 70]])
+LEVELS = np.array([[0.0, 5, 10, 25, 50, 75, 90, 100]])
+
+SCORE_TASK = "Inhibition verbale congruent score"
+VERBAL_INTERFERENCE_TIME = "Inhibition verbale interférence temps"
+
+
+@pytest.fixture(scope="module")
+def nov_24():
+    return load_norms(os.path.join(os.path.dirname(DEFAULT_NORMS_PATH), "NORMES_NOV_24.xlsx"))
+
+
+def _quantile_values(*rows):
+    # Tableau (statistique, 1, ligne) ne contenant que les quantiles de ``rows``
+    values = np.full((len(NORM_COLUMNS), 1, len(rows)), np.nan)
+    for i, column in enumerate(QUANTILE_LEVELS):
+        values[NORM_COLUMNS.index(column), 0] = [row[i] for row in rows]
+    return values
+
+
+def test_quantile_knots_reorders_rows():
+    knots, levels = quantile_knots(_quantile_values(
+        [0, 10, 20, 30, 40, 50, 60, 70],
+        [70, 60, 50, 40, 30, 20, 10, 0],  # quantiles décroissants
+        [70, 10, 20, 30, 40, 50, 60, 0],  # Minimum et Maximum inversés
+    ))
+    np.testing.assert_array_equal(knots[0], np.repeat(KNOTS, 3, axis=0))
+    np.testing.assert_array_equal(levels[0, [0, 2]], np.repeat(LEVELS, 2, axis=0))
+    np.testing.assert_array_equal(levels[0, 1], [0, 10, 25, 50, 75, 90, 95, 100])
+
+
+@pytest.mark.parametrize("value, expected", [
+    (15, 7.5),  # entre 10 (5 %) et 20 (10 %)
+    (45, 62.5),  # entre 40 (50 %) et 50 (75 %)
+    (10, 5.0),  # sur un quantile
+    (0, 0.0), (-5, 0.0),  # Minimum et en dessous
+    (70, 100.0), (80, 100.0),  # Maximum et au-dessus
+])
+def test_empirical_interpolates_between_knots(value, expected):
+    assert empirical_percentiles([value], KNOTS, LEVELS, [SCORE_TASK]) == pytest.approx([expected])
+    # Variable de temps : percentile inversé
+    assert empirical_percentiles([value], KNOTS, LEVELS, [TIME_VARIABLES[0]]) == pytest.approx([100 - expected])
+
+
+def test_empirical_ties():
+    # 5e percentile, 10e percentile et Q1 égaux à 10
+    knots = np.repeat([[0.0, 10, 10, 10, 40, 50, 60, 70]], 3, axis=0)
+    levels = np.repeat(LEVELS, 3, axis=0)
+    result = empirical_percentiles([10, 5, 25], knots, levels, [SCORE_TASK] * 3)
+    # Sur les quantiles égaux : milieu de leurs niveaux (5 et 25 %) ; de part et d'autre,
+    # interpolation vers le plus bas ou le plus haut d'entre eux
+    assert result == pytest.approx([15.0, 2.5, 37.5])
+
+
+@pytest.mark.parametrize("age_group, value, expected", [
+    # Quantiles décroissants, de −141,12 (Minimum) à −929,62 (Maximum) : −500 est entre
+    # −538,36 (50 %) et −464,82 (75 %), soit 50 + 38,36 / 73,54 × 25
+    ("5 ans - 5 ans 11 mois", -500, 63.04102),
+    ("5 ans - 5 ans 11 mois", -100, 100.0),
+    ("5 ans - 5 ans 11 mois", -1000, 0.0),
+    # Minimum (−117) et Maximum (−802) inversés : −200 est entre le 90e percentile (−308,27)
+    # et −117, soit 90 + 108,27 / 191,27 × 10
+    ("6 ans - 6 ans 11 mois", -200, 95.66054),
+    ("6 ans - 6 ans 11 mois", -802, 0.0),
+    ("6 ans - 6 ans 11 mois", -117, 100.0),
+])
+def test_empirical_nov_24_interference_time(nov_24, age_group, value, expected):
+    result = score_value(nov_24, age_group, VERBAL_INTERFERENCE_TIME, value, mode="empirical")
+    assert result["Percentile (%)"] == pytest.approx(expected, abs=1e-5)
+
+
+# Valeurs de référence de la loi normale (tables, 15 chiffres significatifs), pour chaque
+# intervalle des approximations de normal_cdf : |z| < √2, √2 ≤ |z| < 8√2, |z| ≥ 8√2
+NORMAL_CDF_VALUES = [
+    (0.0, 0.5),
+    (0.5, 0.691462461274013),
+    (-1.0, 0.158655253931457),
+    (1.2, 0.884930329778292),
+    (2.0, 0.977249868051821),
+    (-3.0, 1.34989803163010e-3),
+    (-8.0, 6.22096057427178e-16),
+    (-12.0, 1.77648211207768e-33),
+    (-20.0, 2.75362411860623e-89),
+    (12.0, 1.0),
+]
+
+
+@pytest.mark.parametrize("z, expected", NORMAL_CDF_VALUES)
+def test_normal_cdf_reference_values(z, expected):
+    assert normal_cdf(z) == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.mark.parametrize("low, high, rtol", [(-8 * math.sqrt(2), 9, 1e-13), (-37, -8 * math.sqrt(2), 1e-12)])
+def test_normal_cdf_matches_erfc(low, high, rtol):
+    z = np.linspace(low, high, 20_001)
+    expected = np.array([0.5 * math.erfc(-x / math.sqrt(2)) for x in z])
+    np.testing.assert_allclose(normal_cdf(z), expected, rtol=rtol, atol=0)
+
+
+def test_normal_cdf_special_values():
+    result = normal_cdf([np.nan, np.inf, -np.inf])
+    assert np.isnan(result[0])
+    assert result[1:].tolist() == [1.0, 0.0]
+
+
+@pytest.fixture(scope="module")
+def norms():
+    return load_norms(DEFAULT_NORMS_PATH)
+
+
+def _task(norms, age_group, n=0):
+    # n-ième tâche dont les normes sont complètes pour ``age_group``
+    a = norms.age_index[age_group]
+    return [task for t, task in enumerate(norms.tasks) if norms.complete[a, t]][n]
+
+
+def test_validate_wide_cohort(norms):
+    age_group = norms.age_groups[0]
+    task = _task(norms, age_group)
+    maximum = norms.knots[norms.age_index[age_group], norms.task_index[task], -1]
+    cohort = pd.DataFrame({
+        ID_COLUMN: ["a", "b", "c", "d"],
+        AGE_COLUMN: [age_group, age_group, "99 ans", age_group],
+        task: ["abc", maximum + 100, 1.0, None],
+        "Stok Lexical": [1, 2, 3, 4],
+    })
+    issues = validate_cohort(cohort, norms)
+
+    assert issues[[LINE_COLUMN, TASK_COLUMN, ISSUE_COLUMN]].values.tolist() == [
+        [1, "Stok Lexical", ISSUE_UNKNOWN_TASK],
+        [2, task, ISSUE_NOT_NUMERIC],
+        [3, task, ISSUE_OUT_OF_RANGE],
+        [4, "", ISSUE_UNKNOWN_AGE],
+    ]
+    assert issues["Maximum"].iloc[2] == maximum
+    assert issues_by_line(issues)[LINE_COLUMN].tolist() == [1, 2, 3, 4]
+
+
+def test_validate_long_cohort(norms):
+    age_group = norms.age_groups[0]
+    task = _task(norms, age_group)
+    cohort = pd.DataFrame({
+        ID_COLUMN: ["a", "a", "a"],
+        AGE_COLUMN: [age_group] * 3,
+        TASK_COLUMN: [task, "Stok Lexical", _task(norms, age_group, 1)],
+        SCORE_COLUMN: [" ", 3, np.nan],
+    })
+    issues = validate_cohort(cohort, norms)
+
+    assert issues[[LINE_COLUMN, ISSUE_COLUMN]].values.tolist() == [[3, ISSUE_UNKNOWN_TASK]]
+
+
+INTERFERENCE = "Inhibition verbale interférence score"
+FIRST, SECOND = INTERFERENCES[INTERFERENCE]
+
+
+@pytest.fixture(scope="module")
+def interference_age_group(norms):
+    # Premier groupe d'âge dont les normes de l'interférence et de ses opérandes sont complètes
+    t = [norms.task_index[task] for task in (INTERFERENCE, FIRST, SECOND)]
+    return next(age for a, age in enumerate(norms.age_groups) if norms.complete[a, t].all())
+
+
+def test_interference_needs_both_operands(norms, interference_age_group):
+    long = pd.DataFrame({
+        ID_COLUMN: ["a", "b", "b"],
+        AGE_COLUMN: [interference_age_group] * 3,
+        TASK_COLUMN: [FIRST, FIRST, SECOND],
+        SCORE_COLUMN: [35.0, 40.0, 40.0],
+    })
+    derived = add_interferences(long)
+    derived = derived[derived[TASK_COLUMN] == INTERFERENCE]
+
+    # Un seul opérande : pas d'interférence ; opérandes égaux : interférence nulle
+    assert derived[[ID_COLUMN, SCORE_COLUMN]].values.tolist() == [["b", 0.0]]
+    assert math.isnan(interference_scores({FIRST: 35.0})[INTERFERENCE])
+    assert interference_scores({FIRST: 40.0, SECOND: 40.0})[INTERFERENCE] == 0
+
+
+def test_single_operand_is_not_scored(norms, interference_age_group):
+    results = score(interference_age_group, {FIRST: 35.0}, norms)
+    assert INTERFERENCE not in set(results[TASK_COLUMN])
+
+    sheet = ScoreSheet(interference_age_group, norms)
+    sheet.update(FIRST, "35")
+    assert INTERFERENCE not in set(sheet.frame()[TASK_COLUMN])
+
+
+def test_equal_operands_are_scored(norms, interference_age_group):
+    results = score(interference_age_group, {FIRST: 40.0, SECOND: 40.0}, norms).set_index(TASK_COLUMN)
+    assert results.loc[INTERFERENCE, SCORE_COLUMN] == 0
+    assert np.isfinite(results.loc[INTERFERENCE, "Percentile (%)"])
+
+    sheet = ScoreSheet(interference_age_group, norms)
+    sheet.update(FIRST, "40")
+    sheet.update(SECOND, "40")
+    assert sheet.frame().set_index(TASK_COLUMN).loc[INTERFERENCE, SCORE_COLUMN] == 0
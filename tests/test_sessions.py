@@ -0,0 +1,87 @@
+import numpy as np
+
+from comprendre import sessions
+from comprendre.sessions import SessionData, SessionTracker, attach, deep_size
+
+
+def _idle(data, seconds):
+    data.last_seen -= seconds
+
+
+def test_set_replaces_and_cleans_up():
+    data = SessionData()
+    cleaned = []
+    data.set("archive", "a.zip", cleanup=cleaned.append)
+    data.set("archive", "b.zip", cleanup=cleaned.append)
+    assert cleaned == ["a.zip"]
+    assert data.pop("archive") == "b.zip"
+    assert cleaned == ["a.zip", "b.zip"]
+    assert "archive" not in data and len(data) == 0
+
+
+def test_sweep_frees_idle_sessions_only():
+    tracker = SessionTracker()
+    idle, active = SessionData(), SessionData()
+    cleaned = []
+    for data in (idle, active):
+        tracker.add(data)
+        data.set("results", np.zeros(1000), cleanup=lambda value: cleaned.append(len(value)))
+    _idle(idle, 120)
+
+    assert tracker.sweep(idle=60) == 1
+    assert len(idle) == 0 and "results" in active
+    assert cleaned == [1000]
+    assert tracker.sweep(idle=60) == 0  # déjà libérée
+
+
+def test_freed_keys_reported_once_per_prefix():
+    data = SessionData()
+    data.set("results", 1)
+    data.set("batch_results", 2)
+    data.set("batch_issues", 3)
+    data.free()
+
+    assert data.take_freed("batch_") == {"batch_results", "batch_issues"}
+    assert data.take_freed("batch_") == set()
+    assert data.take_freed() == {"results"}
+
+    # Une clé rangée à nouveau avant d'être signalée ne l'est plus
+    data.set("batch_results", 2)
+    data.free()
+    data.set("batch_results", 4)
+    assert data.take_freed("batch_") == set()
+
+
+def test_report_lists_session_memory():
+    tracker = SessionTracker()
+    data = SessionData()
+    tracker.add(data)
+    data.set("results", np.zeros(1000))
+    data.set("sheet", {"a": np.zeros(10)})
+
+    (row,) = tracker.report()
+    assert row["session"] == data.id
+    assert row["mémoire (octets)"] == 8000 + deep_size({"a": np.zeros(10)})
+    assert "results (8,000 o)" in row["objets"]
+
+
+def test_tracker_does_not_keep_sessions_alive():
+    tracker = SessionTracker()
+    tracker.add(SessionData())
+    assert tracker.sessions() == []
+
+
+def test_attach_reuses_session_data(monkeypatch):
+    tracker = SessionTracker()
+    monkeypatch.setattr(sessions, "idle_seconds", lambda: 60)
+    state = {}
+    data = attach(state, tracker)
+    assert attach(state, tracker) is data
+    assert tracker.sessions() == [data]
+
+    # Une autre session inactive est libérée au passage
+    other = attach({}, tracker)
+    other.set("results", 1)
+    _idle(other, 120)
+    attach(state, tracker)
+    assert len(other) == 0
@@ -0,0 +1,100 @@
+import pandas as pd
+import pytest
+
+from comprendre import sheet as sheet_module
+from comprendre.norms import DEFAULT_NORMS_PATH, load_norms
+from comprendre.scoring import CHILD_RESULT_COLUMNS, SCORE_COLUMN, TASK_COLUMN, score
+from comprendre.sheet import ScoreSheet
+from comprendre.tasks import INTERFERENCES
+
+INTERFERENCE = "Inhibition verbale interférence score"
+FIRST, SECOND = INTERFERENCES[INTERFERENCE]
+
+
+@pytest.fixture(scope="module")
+def norms():
+    return load_norms(DEFAULT_NORMS_PATH)
+
+
+@pytest.fixture(scope="module")
+def age_group(norms):
+    # Premier groupe d'âge dont les normes de l'interférence et de ses opérandes sont complètes
+    t = [norms.task_index[task] for task in (INTERFERENCE, FIRST, SECOND)]
+    return next(age for a, age in enumerate(norms.age_groups) if norms.complete[a, t].all())
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    # Tâches recalculées par la feuille
+    calls = []
+    score_value = sheet_module.score_value
+
+    def spy(norms, age_group, task, *args, **kwargs):
+        calls.append(task)
+        return score_value(norms, age_group, task, *args, **kwargs)
+
+    monkeypatch.setattr(sheet_module, "score_value", spy)
+    return calls
+
+
+def _raw_scores(norms, age_group):
+    # Moyenne des normes décalée de l'indice de la tâche, pour que les opérandes d'une interférence
+    # diffèrent ; les interférences elles-mêmes sont calculées
+    a = norms.age_index[age_group]
+    mean = norms.stat("Moyenne")[a]
+    return {task: round(float(mean[t]) + t, 1) for t, task in enumerate(norms.tasks)
+            if norms.complete[a, t] and task not in INTERFERENCES}
+
+
+def test_frame_matches_score(norms, age_group):
+    raw_scores = _raw_scores(norms, age_group)
+    sheet = ScoreSheet(age_group, norms)
+    for task, value in raw_scores.items():
+        assert sheet.update(task, str(value))
+
+    expected = score(age_group, raw_scores, norms)[CHILD_RESULT_COLUMNS].reset_index(drop=True)
+    pd.testing.assert_frame_equal(sheet.frame(), expected)
+    assert INTERFERENCE in set(sheet.frame()[TASK_COLUMN])
+
+
+def test_update_recomputes_edited_row_only(norms, age_group, calls):
+    sheet = ScoreSheet(age_group, norms)
+    other = next(task for task in _raw_scores(norms, age_group) if task not in (FIRST, SECOND))
+    sheet.update(other, "12")
+    assert calls == [other]
+
+    # Opérande d'une interférence : l'interférence est recalculée avec lui
+    sheet.update(FIRST, "30")
+    sheet.update(SECOND, "20")
+    calls.clear()
+    sheet.update(FIRST, "31")
+    assert calls == [FIRST, INTERFERENCE]
+    assert sheet.frame().set_index(TASK_COLUMN).loc[INTERFERENCE, SCORE_COLUMN] == 11
+
+
+def test_unchanged_input_keeps_frame(norms, age_group, calls):
+    sheet = ScoreSheet(age_group, norms)
+    sheet.update(FIRST, "30")
+    frame, version = sheet.frame(), sheet.version
+    calls.clear()
+
+    assert not sheet.update(FIRST, " 30.0 ")
+    assert calls == []
+    assert sheet.version == version and sheet.frame() is frame
+
+
+def test_invalid_and_cleared_input(norms, age_group):
+    first, second = [task for task in _raw_scores(norms, age_group) if task not in (FIRST, SECOND)][:2]
+    sheet = ScoreSheet(age_group, norms)
+    sheet.update(first, "30")
+    sheet.update(second, "20")
+
+    # Saisie non numérique : signalée, et la tâche n'est plus cotée
+    assert sheet.update(first, "trente")
+    assert sheet.errors == {first: "trente"}
+    assert sheet.frame()[TASK_COLUMN].tolist() == [second]
+
+    assert not sheet.update(first, "")
+    assert sheet.errors == {}
+    assert sheet.update(second, "")
+    assert sheet.frame().empty
@@ -0,0 +1,85 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from comprendre.norms import DEFAULT_NORMS_PATH, load_norms
+from comprendre.scoring import AGE_COLUMN, ID_COLUMN, SCORE_COLUMN, TASK_COLUMN, score_cohort
+from comprendre.store import ASSESSMENT_COLUMN, DATE_COLUMN, ResultsStore, open_store
+from comprendre.versions import VERSION_COLUMN
+
+
+@pytest.fixture(scope="module")
+def norms():
+    return load_norms(DEFAULT_NORMS_PATH)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / "historique.sqlite3"))
+    yield store
+    store.close()
+
+
+def _results(norms, scores, age_group=None):
+    # Résultats cotés d'enfants : {identifiant: score brut de chacune des deux premières tâches}
+    age_group = age_group or norms.age_groups[0]
+    a = norms.age_index[age_group]
+    tasks = [task for t, task in enumerate(norms.tasks) if norms.complete[a, t]][:2]
+    cohort = pd.DataFrame({ID_COLUMN: list(scores), AGE_COLUMN: age_group,
+                           **{task: list(scores.values()) for task in tasks}})
+    return score_cohort(cohort, norms)
+
+
+def test_save_one_assessment_per_child(store, norms):
+    results = _results(norms, {"E1": 10.0, "E2": 12.0})
+    ids = store.save(results, "FEV_25", assessed_at="2025-01-01T00:00:00+00:00")
+
+    assert len(ids) == store.count() == 2
+    assessments = store.assessments()
+    assert assessments[ID_COLUMN].tolist() == ["E1", "E2"]
+    assert assessments[ASSESSMENT_COLUMN].tolist() == ids
+    assert set(assessments[VERSION_COLUMN]) == {"FEV_25"}
+    assert store.assessments(child_id="E2")[ASSESSMENT_COLUMN].tolist() == ids[1:]
+    assert store.assessments(norms_version="NOV_24").empty
+    assert store.save(results.iloc[:0], "FEV_25") == []
+
+
+def test_history_in_date_order(store, norms):
+    first = _results(norms, {"E1": 10.0})
+    second = _results(norms, {"E1": 14.0}, norms.age_groups[1])
+    store.save(second, "FEV_25", assessed_at="2025-06-01T00:00:00+00:00")
+    store.save(first, "FEV_25", assessed_at="2025-01-01T00:00:00+00:00")
+    store.save(_results(norms, {"E2": 8.0}), "FEV_25")
+
+    history = store.history("E1")
+    assert history[DATE_COLUMN].is_monotonic_increasing
+    expected = pd.concat([first, second], ignore_index=True)
+    assert history[[AGE_COLUMN, TASK_COLUMN]].values.tolist() == expected[[AGE_COLUMN, TASK_COLUMN]].values.tolist()
+    pd.testing.assert_series_equal(history[SCORE_COLUMN], expected[SCORE_COLUMN])
+    pd.testing.assert_series_equal(history["Percentile (%)"], expected["Percentile (%)"])
+
+
+def test_latest(store, norms):
+    assert store.latest("E1") is None
+    store.save(_results(norms, {"E1": 10.0}), "NOV_24", "empirical", assessed_at="2025-01-01T00:00:00+00:00")
+    latest = _results(norms, {"E1": 14.0}, norms.age_groups[1])
+    store.save(latest, "FEV_25", assessed_at="2025-06-01T00:00:00+00:00")
+
+    meta, scores = store.latest("E1")
+    assert meta[AGE_COLUMN] == norms.age_groups[1]
+    assert meta[VERSION_COLUMN] == "FEV_25" and meta["Calcul des percentiles"] == "normal"
+    assert scores == dict(zip(latest[TASK_COLUMN], latest[SCORE_COLUMN]))
+
+
+def test_failed_save_rolled_back(store, norms):
+    results = _results(norms, {"E1": 10.0, "E2": 12.0})
+    results.loc[1, TASK_COLUMN] = None
+    with pytest.raises(sqlite3.IntegrityError):
+        store.save(results, "FEV_25")
+    assert store.count() == 0
+
+
+def test_open_store_shared(tmp_path):
+    path = str(tmp_path / "historique.sqlite3")
+    assert open_store(path) is open_store(path)
@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from comprendre.scoring import AGE_COLUMN, SCORE_COLUMN, TASK_COLUMN, score_value
+from comprendre.store import ASSESSMENT_COLUMN, DATE_COLUMN
+from comprendre.tasks import CATEGORY_BY_TASK
+from comprendre.trajectory import Trajectory, score_trajectory
+from comprendre.versions import NORMS_AGE_COLUMN, NORMS_DIR, VERSION_COLUMN, load_registry
+
+PATHS = [os.path.join(NORMS_DIR, name) for name in ("NORMES_NOV_24.xlsx", "NORMES_FEV_25.xlsx")]
+
+
+@pytest.fixture(scope="module")
+def registry():
+    return load_registry(PATHS)
+
+
+@pytest.fixture(scope="module")
+def tasks(registry):
+    # Trois tâches cotables à toutes les évaluations de l'historique, dans les deux versions
+    ages = ["5 ans - 5 ans 11 mois", "70 - 76 mois"]
+    usable = []
+    for task in registry.tasks:
+        t = registry.task_index[task]
+        if all(registry.complete[v, registry.age_index[registry.matching_age_group(age, version)], t]
+               for age in ages for v, version in enumerate(registry.versions)):
+            usable.append(task)
+    return usable[:3]
+
+
+@pytest.fixture(scope="module")
+def history(tasks):
+    # Deux évaluations (enregistrées dans le désordre), la seconde sans la dernière tâche
+    rows = [(2, "2025-06-01T00:00:00+00:00", "70 - 76 mois", "FEV_25", task, 12.0 + i)
+            for i, task in enumerate(tasks[:2])]
+    rows += [(1, "2024-12-01T00:00:00+00:00", "5 ans - 5 ans 11 mois", "NOV_24", task, 10.0 + i)
+             for i, task in enumerate(tasks)]
+    return pd.DataFrame(rows, columns=[ASSESSMENT_COLUMN, DATE_COLUMN, AGE_COLUMN, VERSION_COLUMN,
+                                       TASK_COLUMN, SCORE_COLUMN])
+
+
+@pytest.mark.parametrize("version", [None, "FEV_25", "NOV_24"])
+def test_score_trajectory_matches_single_scoring(registry, history, version):
+    scored = score_trajectory(history, registry, version)
+    assert len(scored) == len(history)
+    for _, row in scored.iterrows():
+        # Normes de ``version``, ou à défaut de l'évaluation, au groupe d'âge correspondant
+        expected_version = version or row[VERSION_COLUMN]
+        assert row[VERSION_COLUMN] == expected_version
+        assert row[NORMS_AGE_COLUMN] == registry.matching_age_group(row[AGE_COLUMN], expected_version)
+        expected = score_value(registry.table(expected_version), row[NORMS_AGE_COLUMN], row[TASK_COLUMN],
+                               row[SCORE_COLUMN])
+        assert row["Z-Score"] == pytest.approx(expected["Z-Score"])
+        assert row["Percentile (%)"] == pytest.approx(expected["Percentile (%)"])
+
+
+def test_unknown_rows_dropped(registry, history):
+    unknown = history.assign(**{AGE_COLUMN: "99 ans"}).iloc[:1]
+    scored = score_trajectory(pd.concat([history, unknown], ignore_index=True), registry)
+    assert len(scored) == len(history)
+
+
+def test_trajectory_matrix(registry, history, tasks):
+    scored = score_trajectory(history, registry)
+    trajectory = Trajectory.from_scores(scored)
+
+    assert trajectory.series == tuple(tasks)
+    assert trajectory.labels == ("2024-12-01\n5 ans - 5 ans 11 mois", "2025-06-01\n70 - 76 mois")
+    by_key = scored.set_index([ASSESSMENT_COLUMN, TASK_COLUMN])["Percentile (%)"]
+    np.testing.assert_allclose(trajectory.percentiles[0], [by_key[(1, task)] for task in tasks])
+    np.testing.assert_allclose(trajectory.percentiles[1, :2], [by_key[(2, task)] for task in tasks[:2]])
+    assert np.isnan(trajectory.percentiles[1, 2])  # tâche absente de la seconde évaluation
+
+    assert Trajectory.from_scores(scored, tasks[:1]).series == tuple(tasks[:1])
+
+
+def test_by_category_averages_available_tasks(registry, history):
+    trajectory = Trajectory.from_scores(score_trajectory(history, registry))
+    categories = trajectory.by_category()
+
+    for c, name in enumerate(categories.series):
+        members = [i for i, task in enumerate(trajectory.series) if CATEGORY_BY_TASK.get(task, "Autre") == name]
+        for session in range(len(trajectory.labels)):
+            values = trajectory.percentiles[session, members]
+            expected = np.nanmean(values) if not np.isnan(values).all() else np.nan
+            np.testing.assert_allclose(categories.percentiles[session, c], expected)
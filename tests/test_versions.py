@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from comprendre.scoring import AGE_COLUMN, ID_COLUMN, SCORE_COLUMN, TASK_COLUMN, score_value
+from comprendre.versions import (
+    NORMS_AGE_COLUMN, NORMS_DIR, VERSION_COLUMN, age_bounds, compare_versions, load_registry, score_versions,
+)
+
+PATHS = [os.path.join(NORMS_DIR, name) for name in ("NORMES_FEV_25.xlsx", "NORMES_NOV_24.xlsx")]
+
+
+@pytest.fixture(scope="module")
+def registry():
+    return load_registry(PATHS)
+
+
+@pytest.mark.parametrize("label, bounds", [
+    ("58 - 64 mois", (58, 64)),
+    ("5 ans - 5 ans 11 mois", (60, 72)),
+    ("8 ans - 8 ans 11 mois", (96, 108)),
+    ("64 - 58 mois", None),
+    ("Adultes", None),
+])
+def test_age_bounds(label, bounds):
+    assert age_bounds(label) == bounds
+
+
+def test_versions_in_chronological_order(registry):
+    assert registry.versions == ("NOV_24", "FEV_25")
+    assert registry.latest == "FEV_25"
+    assert load_registry(PATHS[::-1]).versions == registry.versions
+
+
+@pytest.mark.parametrize("age_group, version, expected", [
+    ("5 ans - 5 ans 11 mois", "NOV_24", "5 ans - 5 ans 11 mois"),
+    # Milieu de la tranche (66 mois) dans « 64 - 70 mois »
+    ("5 ans - 5 ans 11 mois", "FEV_25", "64 - 70 mois"),
+    ("58 - 64 mois", "NOV_24", "5 ans - 5 ans 11 mois"),
+    ("100 - 106 mois", "NOV_24", "8 ans - 8 ans 11 mois"),
+    ("106 - 112 mois", "NOV_24", None),
+    ("99 ans", "FEV_25", None),
+])
+def test_matching_age_group(registry, age_group, version, expected):
+    assert registry.matching_age_group(age_group, version) == expected
+
+
+def _common_tasks(registry, age_group):
+    # Tâches cotables dans les deux versions pour ``age_group``
+    tasks = []
+    for task in registry.tasks:
+        groups = [(registry.table(v), registry.matching_age_group(age_group, v)) for v in registry.versions]
+        if all(task in table.task_index and table.complete[table.age_index[group], table.task_index[task]]
+               for table, group in groups):
+            tasks.append(task)
+    return tasks
+
+
+def test_score_versions_matches_each_version(registry):
+    age_group = "5 ans - 5 ans 11 mois"
+    tasks = _common_tasks(registry, age_group)[:3]
+    cohort = pd.DataFrame({ID_COLUMN: ["a", "b"], AGE_COLUMN: [age_group, "106 - 112 mois"],
+                           **{task: [10.0 + i, 12.0] for i, task in enumerate(tasks)}})
+    results = score_versions(cohort, registry)
+
+    child = results[results[ID_COLUMN] == "a"]
+    assert child[[TASK_COLUMN, VERSION_COLUMN]].values.tolist() == [
+        [task, version] for task in tasks for version in registry.versions]
+    for _, row in child.iterrows():
+        expected = score_value(registry.table(row[VERSION_COLUMN]), row[NORMS_AGE_COLUMN], row[TASK_COLUMN],
+                               row[SCORE_COLUMN])
+        assert row[NORMS_AGE_COLUMN] == registry.matching_age_group(age_group, row[VERSION_COLUMN])
+        assert row["Z-Score"] == pytest.approx(expected["Z-Score"])
+        assert row["Percentile (%)"] == pytest.approx(expected["Percentile (%)"])
+
+    # Pas de groupe d'âge correspondant dans NOV_24 : seules les normes FEV_25 sont utilisées
+    assert set(results.loc[results[ID_COLUMN] == "b", VERSION_COLUMN]) == {"FEV_25"}
+
+
+def test_compare_versions(registry):
+    age_group = "5 ans - 5 ans 11 mois"
+    tasks = _common_tasks(registry, age_group)[:2]
+    cohort = pd.DataFrame({ID_COLUMN: ["a"], AGE_COLUMN: [age_group], **{task: [10.0] for task in tasks}})
+    results = score_versions(cohort, registry)
+    comparison = compare_versions(results)
+
+    assert comparison[TASK_COLUMN].tolist() == tasks
+    z = results.pivot(index=TASK_COLUMN, columns=VERSION_COLUMN, values="Z-Score").loc[tasks]
+    np.testing.assert_allclose(comparison["Z-Score NOV_24"], z["NOV_24"])
+    np.testing.assert_allclose(comparison["Δ Z-Score NOV_24"], z["NOV_24"] - z["FEV_25"])
+    assert "Δ Z-Score FEV_25" not in comparison
+
+    # Version de référence choisie : l'écart est pris par rapport à elle
+    comparison = compare_versions(results, reference="NOV_24")
+    np.testing.assert_allclose(comparison["Δ Z-Score FEV_25"], z["FEV_25"] - z["NOV_24"])
@@ -0,0 +1,63 @@
+import os
+import shutil
+
+import pytest
+
+from comprendre.versions import NORMS_DIR
+from comprendre.watcher import NormsWatcher
+
+WORKBOOKS = ("NORMES_NOV_24.xlsx", "NORMES_FEV_25.xlsx")
+
+
+@pytest.fixture
+def directory(tmp_path):
+    for name in WORKBOOKS:
+        shutil.copy(os.path.join(NORMS_DIR, name), tmp_path / name)
+    return tmp_path
+
+
+def _touch(path, seconds=10):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10**9))
+
+
+def test_invalid_workbook_keeps_previous_version(directory):
+    watcher = NormsWatcher(str(directory), interval=0)
+    registry = watcher.registry
+    assert registry.versions == ("NOV_24", "FEV_25")
+
+    invalid = directory / "NORMES_FEV_25.xlsx"
+    invalid.write_bytes(b"copie en cours")
+    assert not watcher.refresh()
+    assert watcher.registry is registry
+    assert list(watcher.errors) == [str(invalid)]
+
+    # Un autre classeur change : le classeur toujours invalide n'est pas relu, son ancienne version reste
+    _touch(directory / "NORMES_NOV_24.xlsx")
+    watcher.refresh()
+    assert watcher.registry.versions == ("NOV_24", "FEV_25")
+    assert list(watcher.errors) == [str(invalid)]
+
+
+def test_errors_replaced_not_mutated(directory):
+    watcher = NormsWatcher(str(directory), interval=0)
+    invalid = directory / "NORMES_FEV_25.xlsx"
+    original = invalid.read_bytes()
+    invalid.write_bytes(b"copie en cours")
+    watcher.refresh()
+    errors = watcher.errors
+
+    invalid.write_bytes(original)
+    _touch(invalid)
+    watcher.refresh()
+    assert watcher.errors == {}
+    assert list(errors) == [str(invalid)]  # l'ancien dictionnaire, en cours de lecture, est intact
+
+
+def test_new_workbook_published(directory):
+    watcher = NormsWatcher(str(directory), interval=0)
+    registry = watcher.registry
+    shutil.copy(directory / "NORMES_FEV_25.xlsx", directory / "NORMES_MAR_25.xlsx")
+    assert watcher.refresh()
+    assert watcher.registry.versions == ("NOV_24", "FEV_25", "MAR_25")
+    assert registry.versions == ("NOV_24", "FEV_25")